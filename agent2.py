@@ -13,8 +13,8 @@ from livekit.agents import (
     WorkerOptions,
     cli,
 )
-from livekit.plugins import openai, silero
 from livekit import rtc
+from components import components, make_prewarm
 
 logger = logging.getLogger("voice-agent")
 logger.setLevel(logging.DEBUG)  # Changed to DEBUG
@@ -53,17 +53,15 @@ async def entrypoint(ctx: JobContext):
     for track_pub in participant.track_publications.values():
         logger.info(f"📡 Existing track: {track_pub.kind} - subscribed: {track_pub.subscribed}")
 
+    shared = components(ctx)
     session = AgentSession(
-        stt=openai.STT(
+        stt=shared.openai_stt(
             model="whisper-1",
             language="fa",
         ),
-        llm=openai.LLM(model="gpt-4o-mini"),
-        tts=openai.TTS(voice="alloy"),
-        vad=silero.VAD.load(
-            min_speech_duration=0.1,
-            min_silence_duration=0.3,
-        ),
+        llm=shared.openai_llm(model="gpt-4o-mini"),
+        tts=shared.openai_tts(voice="alloy"),
+        vad=shared.vad('responsive'),
     )
 
     # Debug: Listen for speech events
@@ -92,6 +90,7 @@ async def entrypoint(ctx: JobContext):
             text_enabled=True,
         ),
     )
+    shared.report_job_start()
 
     await session.say("سلام! چطور می‌تونم کمکتون کنم؟", allow_interruptions=True)
 
@@ -101,6 +100,6 @@ async def entrypoint(ctx: JobContext):
 if __name__ == "__main__":
     cli.run_app(
         WorkerOptions(
-            entrypoint_fnc=entrypoint,
+            entrypoint_fnc=entrypoint, prewarm_fnc=make_prewarm('responsive'),
         )
     )
@@ -13,11 +13,14 @@ Features:
 """
 
 from dotenv import load_dotenv
-import os, json, re
+import os, json
 from datetime import datetime
 from livekit import agents
 from livekit.agents import Agent, AgentSession
-from livekit.plugins import openai, silero
+
+from intent_matcher import IntentMatcher, literal, normalize
+from postcall_queue import enqueue_session_report
+from components import components, prewarm
 
 load_dotenv()
 
@@ -52,6 +55,16 @@ OFFTOPIC_PATTERNS = [
 
 SKIP_KEYWORDS = ["رد کن", "نمی‌دانم", "نمیدونم", "نمی دونم", "skip", "pass", "next"]
 
+INTERVIEW_TOPIC_KEYWORDS = ["کار", "تجربه", "تحصیل", "پروژه"]
+
+# all keyword lists compiled once into one matcher over normalized text
+INTENT_MATCHER = IntentMatcher({
+    "manipulation": literal(*MANIPULATION_KEYWORDS),
+    "offtopic": literal(*OFFTOPIC_PATTERNS),
+    "skip": literal(*SKIP_KEYWORDS),
+    "on_topic": literal(*INTERVIEW_TOPIC_KEYWORDS),
+})
+
 HR_QUESTIONS = [
     "چرا علاقه‌مند هستید در شرکت OnTime کار کنید؟",
     "در محیط کاری چه چیزهایی برای شما مهم است؟",
@@ -79,6 +92,8 @@ class OnTimeInterviewAgent(Agent):
         self.insist = 0
         self.offtopic_count = 0
         self.manipulation_count = 0
+        self._last_text = None
+        self._last_intents = frozenset()
 
         self.candidate = {
             "name": None,
@@ -96,22 +111,24 @@ class OnTimeInterviewAgent(Agent):
     # HELPERS
     # -------------------------
 
+    def intents(self, text: str):
+        # one scan per utterance, shared by the checks below
+        if text != self._last_text:
+            self._last_text = text
+            self._last_intents = INTENT_MATCHER.match(text)
+        return self._last_intents
+
     def is_manipulation(self, text: str):
-        t = text.lower()
-        return any(k.lower() in t for k in MANIPULATION_KEYWORDS)
+        return "manipulation" in self.intents(text)
 
     def is_offtopic(self, text: str):
-        t = text.lower()
-        for p in OFFTOPIC_PATTERNS:
-            if re.search(p, t):
-                return True
-        if "?" in t and not any(k in t for k in ["کار", "تجربه", "تحصیل", "پروژه"]):
+        intents = self.intents(text)
+        if "offtopic" in intents:
             return True
-        return False
+        return "?" in normalize(text) and "on_topic" not in intents
 
     def wants_to_skip(self, text: str):
-        t = text.lower().strip()
-        return any(k in t for k in SKIP_KEYWORDS)
+        return "skip" in self.intents(text)
 
     def too_short(self, text: str):
         return len(text.split()) <= 4
@@ -265,19 +282,16 @@ class OnTimeInterviewAgent(Agent):
             "از محتوای زیر یک خلاصه رسمی مصاحبه بنویس:\n" +
             json.dumps(self.candidate, ensure_ascii=False)
         )
-        result = await self.session.llm.respond(summary_prompt)
-        summary = result.text.strip()
-
         data = {
             "timestamp": datetime.now().isoformat(),
             "candidate": self.candidate,
-            "summary": summary
+            "summary": None,
         }
 
-        with open("ontime_interview_fa_agent3.json", "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        # summarized and written by postcall_worker.py, after the call
+        await enqueue_session_report("ontime_interview_fa_agent3.json", data, {"summary": summary_prompt})
 
-        print("Saved interview summary → ontime_interview_fa_agent3.json")
+        print("Queued interview summary → ontime_interview_fa_agent3.json")
 
 
 
@@ -286,15 +300,17 @@ class OnTimeInterviewAgent(Agent):
 # -------------------------
 
 async def entrypoint(ctx: agents.JobContext):
+    shared = components(ctx)
     session = AgentSession(
-        stt=openai.STT(model="gpt-4o-mini-transcribe", language="fa"),
-        llm=openai.LLM(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini")),
-        tts=openai.TTS(voice="sage"),
-        vad=silero.VAD.load()
+        stt=shared.openai_stt(model="gpt-4o-mini-transcribe", language="fa"),
+        llm=shared.openai_llm(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini")),
+        tts=shared.openai_tts(voice="sage"),
+        vad=shared.vad()
     )
 
     await session.start(room=ctx.room, agent=OnTimeInterviewAgent())
+    shared.report_job_start()
 
 
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
+    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
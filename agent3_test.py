@@ -6,27 +6,33 @@
 import asyncio
 import logging
 from dotenv import load_dotenv
-import os, json, re
+import os
 from datetime import datetime
 
 load_dotenv()
 
 from livekit.agents import (
-    Agent,
     AgentSession,
     AutoSubscribe,
     JobContext,
     WorkerOptions,
     cli,
 )
-from livekit.plugins import openai, silero
 from livekit import rtc
 
+from interview_flow import compile_flow
+from intent_matcher import match_intents
+from speech_sequencer import Lookahead, say_sequence
+from tts_cache import CachedTTS
+from scripted_mode import ScriptedAgent
+from postcall_queue import enqueue_session_report
+from components import components, make_prewarm
+
 logger = logging.getLogger("interview-agent")
 logger.setLevel(logging.INFO)
 
 
-class OnTimeInterviewAgent(Agent):
+class OnTimeInterviewAgent(ScriptedAgent):
     """مصاحبه‌گر حرفه‌ای با کنترل کامل جریان"""
 
     def __init__(self):
@@ -65,41 +71,22 @@ class OnTimeInterviewAgent(Agent):
             "تفاوت یادگیری نظارت‌شده و بدون‌نظارت را شرح دهید."
         ]
         
-        self.hr_index = 0
-        self.tech_index = 0
-        self.retry_count = 0
+        # همان جدول جریان agent4، با تنظیمات ثابت به‌جای DB
+        self.settings = {
+            'company_name': 'آن‌تایم',
+            'conversation_flow': 'greeting,company_introduction,hr_interview,technical_interview,closing',
+            'strictness_level': 'medium',
+            'hr_questions': self.hr_questions,
+            'technical_questions': self.tech_questions,
+        }
+        self.flow = compile_flow(self.settings).start()
+        self.lookahead = Lookahead()
         self.off_topic_count = 0
 
 
     def detect_off_topic(self, text: str) -> bool:
         """تشخیص سوالات خارج از مصاحبه"""
-        off_topic_patterns = [
-            r"چطور.*می‌?تون",
-            r"چجوری",
-            r"آیا.*می‌?دون",
-            r"می‌?شه.*بگ",
-            r"می‌?شه.*کمک",
-            r"لطفا.*توضیح.*بد",
-            r"سوال.*دار",
-            r"می‌?خواستم.*بپرس",
-            r"یه.*سوال",
-            r"یک.*سوال",
-            r"راستی",
-            r"ببخشید.*چطور",
-            r"می‌?تونی.*بگی",
-        ]
-        text_lower = text.lower()
-        return any(re.search(p, text_lower) for p in off_topic_patterns)
-
-
-    def is_answer_sufficient(self, text: str, min_words: int = 5) -> bool:
-        """بررسی کفایت پاسخ"""
-        words = [w for w in text.split() if len(w) > 1]
-        if len(words) < min_words:
-            return False
-        
-        insufficient = ["نمی.*دون", "نمیدون", "^خیر$", "^نه$", "^رد$", "نمی‌دونم"]
-        return not any(re.search(p, text.lower()) for p in insufficient)
+        return 'off_topic' in match_intents(text)
 
 
     async def handle_off_topic_response(self, session) -> str:
@@ -121,14 +108,9 @@ class OnTimeInterviewAgent(Agent):
         logger.info("🎤 شروع مصاحبه")
         self.state = "GREETING"
         
-        greeting = (
-            "سلام و درود. به مصاحبه شرکت آن‌تایم خوش آمدید. "
-            "من مصاحبه‌گر این جلسه هستم. "
-            "لطفاً نام و نام‌خانوادگی کامل خود را بفرمایید."
-        )
-        
-        await session.say(greeting, allow_interruptions=True)
-        self.state = "ASK_NAME"
+        await say_sequence(session, [(self.flow.flow.greeting, True)])
+        self.state = self.flow.state
+        self.lookahead.prepare(session, self.flow.likely_next())
 
 
     async def on_user_spoke(self, session: AgentSession, text: str):
@@ -139,159 +121,41 @@ class OnTimeInterviewAgent(Agent):
 
         logger.info(f"👤 [{self.state}] کاربر گفت: {text[:100]}")
 
+        # 🔎 همه intentها (خارج از موضوع، رد کردن، پاسخ ناکافی) در یک پیمایش
+        intents = match_intents(text)
+
         # تشخیص خروج از موضوع (جز در سوالات ساده)
-        if self.state not in ["ASK_NAME", "ASK_AGE", "ASK_LOCATION"] and self.detect_off_topic(text):
+        if self.flow.step.check_off_topic and 'off_topic' in intents:
             response = await self.handle_off_topic_response(session)
-            await session.say(response, allow_interruptions=False)
             
-            # تکرار سوال فعلی
-            if self.state == "HR_STAGE" and self.hr_index < len(self.hr_questions):
-                await session.say(self.hr_questions[self.hr_index], allow_interruptions=True)
-            elif self.state == "TECH_STAGE" and self.tech_index < len(self.tech_questions):
-                await session.say(self.tech_questions[self.tech_index], allow_interruptions=True)
-            return
-
-        # ============= مراحل مصاحبه =============
-        
-        # نام
-        if self.state == "ASK_NAME":
-            self.candidate["name"] = text
-            self.off_topic_count = 0
-            await session.say("متشکرم. سن شما چند سال است؟", allow_interruptions=True)
-            self.state = "ASK_AGE"
-            return
-
-        # سن
-        elif self.state == "ASK_AGE":
-            self.candidate["age"] = text
-            self.off_topic_count = 0
-            await session.say("سپاس. محل سکونت فعلی شما کجاست؟", allow_interruptions=True)
-            self.state = "ASK_LOCATION"
-            return
-
-        # محل سکونت
-        elif self.state == "ASK_LOCATION":
-            self.candidate["location"] = text
-            self.off_topic_count = 0
-            await session.say(
-                "بسیار خوب. لطفاً آخرین مدرک تحصیلی و رشته تحصیلی خود را بیان کنید.",
-                allow_interruptions=True
-            )
-            self.state = "ASK_EDUCATION"
-            return
-
-        # تحصیلات
-        elif self.state == "ASK_EDUCATION":
-            self.candidate["education"] = text
-            self.off_topic_count = 0
-            await session.say(
-                "ممنون. لطفاً خلاصه‌ای از سوابق کاری و پروژه‌های مهم خود ارائه دهید.",
-                allow_interruptions=True
-            )
-            self.state = "ASK_EXPERIENCE"
+            # پاسخ و سپس تکرار سوال فعلی
+            await say_sequence(session, [
+                (response, False),
+                (self.flow.current_question(), True),
+            ], lookahead=self.lookahead)
             return
 
-        # تجربه کاری
-        elif self.state == "ASK_EXPERIENCE":
-            if not self.is_answer_sufficient(text, min_words=8):
-                if self.retry_count < 1:
-                    self.retry_count += 1
-                    await session.say(
-                        "لطفاً کمی بیشتر توضیح دهید. مثلاً چه پروژه‌هایی انجام داده‌اید؟",
-                        allow_interruptions=True
-                    )
-                    return
-            
-            self.candidate["experience"] = text
-            self.retry_count = 0
+        # ============= مراحل مصاحبه (جدول conversation_flow) =============
+        utterances = self.flow.handle(text, intents)
+        self.state = self.flow.state
+        self.candidate.update(self.flow.answers)
+        if self.flow.retry_count == 0:
             self.off_topic_count = 0
-            await session.say(
-                "بسیار خوب. حالا وارد بخش سوالات منابع انسانی می‌شویم.",
-                allow_interruptions=False
-            )
-            await asyncio.sleep(0.5)
-            await session.say(self.hr_questions[0], allow_interruptions=True)
-            self.state = "HR_STAGE"
-            return
 
-        # بخش HR
-        elif self.state == "HR_STAGE":
-            skip_keywords = ["رد", "بعدی", "نمیدون", "نمی‌دون", "پاس", "skip"]
-            is_skip = any(kw in text.lower() for kw in skip_keywords)
-            
-            if is_skip:
-                await session.say("بسیار خوب، می‌رویم سوال بعدی.", allow_interruptions=False)
-            else:
-                if not self.is_answer_sufficient(text, min_words=6):
-                    if self.retry_count < 1:
-                        self.retry_count += 1
-                        await session.say(
-                            "ممکن است کمی بیشتر شرح دهید؟",
-                            allow_interruptions=True
-                        )
-                        return
-                
-                self.candidate["hr_answers"].append(text)
-                await session.say("متشکرم.", allow_interruptions=False)
-            
-            self.retry_count = 0
-            self.off_topic_count = 0
-            self.hr_index += 1
-            
-            if self.hr_index < len(self.hr_questions):
-                await asyncio.sleep(0.3)
-                await session.say(self.hr_questions[self.hr_index], allow_interruptions=True)
-            else:
-                await session.say(
-                    "عالی. اکنون وارد بخش سوالات فنی می‌شویم.",
-                    allow_interruptions=False
-                )
-                await asyncio.sleep(0.5)
-                await session.say(self.tech_questions[0], allow_interruptions=True)
-                self.state = "TECH_STAGE"
-            return
+        # 🔊 جمله بعدی هم‌زمان با پخش جمله فعلی سنتز می‌شود (بدون sleep ثابت)
+        await say_sequence(session, utterances, lookahead=self.lookahead)
 
-        # بخش فنی
-        elif self.state == "TECH_STAGE":
-            skip_keywords = ["رد", "بعدی", "نمیدون", "نمی‌دون", "پاس", "skip"]
-            is_skip = any(kw in text.lower() for kw in skip_keywords)
-            
-            if is_skip:
-                await session.say("متوجه هستم. سوال بعدی.", allow_interruptions=False)
-            else:
-                if not self.is_answer_sufficient(text, min_words=8):
-                    if self.retry_count < 1:
-                        self.retry_count += 1
-                        await session.say(
-                            "لطفاً با جزئیات بیشتری توضیح دهید.",
-                            allow_interruptions=True
-                        )
-                        return
-                
-                self.candidate["technical_answers"].append(text)
-                await session.say("سپاس‌گزارم.", allow_interruptions=False)
-            
-            self.retry_count = 0
-            self.off_topic_count = 0
-            self.tech_index += 1
-            
-            if self.tech_index < len(self.tech_questions):
-                await asyncio.sleep(0.3)
-                await session.say(self.tech_questions[self.tech_index], allow_interruptions=True)
-            else:
-                await session.say(
-                    "مصاحبه به پایان رسید. از وقتی که گذاشتید متشکرم. "
-                    "نتیجه را در اسرع وقت به اطلاع شما خواهیم رساند. "
-                    "می‌توانید تماس را قطع کنید.",
-                    allow_interruptions=False
-                )
-                self.state = "FINISHED"
-                await self.save_interview_data(session)
-            return
+        # 🔮 تا کاربر پاسخ می‌دهد، جملات احتمالی بعدی از قبل سنتز می‌شوند
+        if not self.flow.finished:
+            self.lookahead.prepare(session, self.flow.likely_next())
+        else:
+            self.lookahead.close()
+            logger.info(f"📊 Look-ahead TTS: {self.lookahead.stats()}")
+            await self.save_interview_data(session)
 
 
     async def save_interview_data(self, session: AgentSession):
-        """ذخیره داده‌های مصاحبه"""
+        """ثبت داده‌های مصاحبه در صف پردازش پس از تماس"""
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             name_safe = self.candidate.get('name', 'unknown').replace(' ', '_')
@@ -308,11 +172,11 @@ class OnTimeInterviewAgent(Agent):
             }
             
             filename = f"interview_{name_safe}_{timestamp}.json"
-            
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(output, f, indent=2, ensure_ascii=False)
-            
-            logger.info(f"✅ مصاحبه ذخیره شد: {filename}")
+
+            # نوشتن فایل بعد از تماس در postcall_worker.py انجام می‌شود
+            await enqueue_session_report(filename, output, {})
+
+            logger.info(f"📨 مصاحبه در صف پردازش پس از تماس ثبت شد: {filename}")
             
         except Exception as e:
             logger.error(f"❌ خطا در ذخیره: {e}")
@@ -334,17 +198,15 @@ async def entrypoint(ctx: JobContext):
 
     agent = OnTimeInterviewAgent()
     
+    shared = components(ctx)
     session = AgentSession(
-        stt=openai.STT(
+        stt=shared.openai_stt(
             model="gpt-4o-transcribe",
             language="fa",
         ),
-        llm=openai.LLM(model="gpt-4o-mini"),
-        tts=openai.TTS(voice="alloy"),
-        vad=silero.VAD.load(
-            min_speech_duration=0.2,
-            min_silence_duration=0.5,
-        ),
+        llm=shared.openai_llm(model="gpt-4o-mini"),
+        tts=CachedTTS(shared.openai_tts(voice="alloy"), voice="alloy"),
+        vad=shared.vad('interview'),
     )
 
     # Event handlers برای session
@@ -357,11 +219,11 @@ async def entrypoint(ctx: JobContext):
         logger.info("🤐 کاربر ساکت شد")
 
     await session.start(agent=agent, room=ctx.room)
+    shared.report_job_start()
     
-    await agent.on_start(session)
     
     await asyncio.Future()
 
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
+    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=make_prewarm('interview')))
@@ -5,25 +5,36 @@
 
 import asyncio
 import logging
+from typing import Optional
 from dotenv import load_dotenv
-import os, json, re
+import os
+import uuid
 from datetime import datetime
 
 load_dotenv()
 
 from livekit.agents import (
-    Agent,
     AgentSession,
     AutoSubscribe,
+    ConversationItemAddedEvent,
     JobContext,
+    JobProcess,
     WorkerOptions,
     cli,
 )
-from livekit.plugins import openai, silero
 from livekit import rtc
 
 # Import Database Manager
 from db_manager import DatabaseManager
+from interview_flow import compile_flow
+from intent_matcher import match_intents
+from speech_sequencer import Lookahead, say_sequence
+from tts_cache import CachedTTS
+from loop_monitor import install_slow_callback_detector
+from scripted_mode import ScriptedAgent
+from rolling_summary import RollingSummary
+from summarizer import Summarizer
+from components import components, make_prewarm
 
 logger = logging.getLogger("interview-agent")
 logger.setLevel(logging.INFO)
@@ -32,12 +43,13 @@ logger.setLevel(logging.INFO)
 db_manager = DatabaseManager()
 
 
-class OnTimeInterviewAgent(Agent):
+class OnTimeInterviewAgent(ScriptedAgent):
     """مصاحبه‌گر حرفه‌ای با کنترل کامل جریان و تنظیمات پویا از DB"""
 
-    def __init__(self, settings_id: int = 1, candidate_name: str = "Unknown"):
-        # 🔥 بارگذاری تنظیمات از پایگاه داده
-        self.settings = db_manager.get_interview_settings(settings_id)
+    def __init__(self, settings: dict, settings_id: int = 1, candidate_name: str = "Unknown"):
+        # 🔥 تنظیمات قبل از ساخت Agent به‌صورت async از DB بارگذاری شده‌اند
+        # (load_interview_settings) تا event loop مسدود نشود
+        self.settings = settings
         
         company_name = self.settings.get('company_name', 'OnTime')
         field = self.settings.get('interview_field', 'Data Science')
@@ -55,7 +67,9 @@ class OnTimeInterviewAgent(Agent):
         )
         
         self.settings_id = settings_id
-        self.session_id = None
+        # شناسه یکتای نشست؛ entrypoint آن را به اتاق + job تغییر می‌دهد
+        self.session_id = f"session_{uuid.uuid4().hex}"
+        self.room_name = None
         self.state = "INIT"
         self.candidate = {
             "name": candidate_name,
@@ -71,11 +85,14 @@ class OnTimeInterviewAgent(Agent):
         self.hr_questions = self.settings.get('hr_questions', [])
         self.tech_questions = self.settings.get('technical_questions', [])
         
-        self.hr_index = 0
-        self.tech_index = 0
-        self.retry_count = 0
+        # 🧭 جریان مصاحبه یک‌بار برای هر نسخه از تنظیمات کامپایل می‌شود
+        self.flow = compile_flow(self.settings).start()
+        self.lookahead = Lookahead()
         self.off_topic_count = 0
+        # خلاصه مصاحبه بعد از هر پاسخ در پس‌زمینه به‌روز می‌شود (on_start)
+        self.rolling: Optional[RollingSummary] = None
         
+        # هر نوبت هم‌زمان در جدول interview_turns ذخیره می‌شود (record_turn)
         self.transcript = []
         
         logger.info(f"✅ Agent initialized:")
@@ -88,33 +105,7 @@ class OnTimeInterviewAgent(Agent):
 
     def detect_off_topic(self, text: str) -> bool:
         """تشخیص سوالات خارج از مصاحبه"""
-        off_topic_patterns = [
-            r"چطور.*می‌?تون",
-            r"چجوری",
-            r"آیا.*می‌?دون",
-            r"می‌?شه.*بگ",
-            r"می‌?شه.*کمک",
-            r"لطفا.*توضیح.*بد",
-            r"سوال.*دار",
-            r"می‌?خواستم.*بپرس",
-            r"یه.*سوال",
-            r"یک.*سوال",
-            r"راستی",
-            r"ببخشید.*چطور",
-            r"می‌?تونی.*بگی",
-        ]
-        text_lower = text.lower()
-        return any(re.search(p, text_lower) for p in off_topic_patterns)
-
-
-    def is_answer_sufficient(self, text: str, min_words: int = 5) -> bool:
-        """بررسی کفایت پاسخ"""
-        words = [w for w in text.split() if len(w) > 1]
-        if len(words) < min_words:
-            return False
-        
-        insufficient = ["نمی.*دون", "نمیدون", "^خیر$", "^نه$", "^رد$", "نمی‌دونم"]
-        return not any(re.search(p, text.lower()) for p in insufficient)
+        return 'off_topic' in match_intents(text)
 
 
     async def handle_off_topic_response(self, session) -> str:
@@ -131,21 +122,27 @@ class OnTimeInterviewAgent(Agent):
         return responses[idx]
 
 
+    def record_turn(self, speaker: str, text: str):
+        """ثبت یک نوبت گفتگو در transcript و ارسال آن به جدول interview_turns"""
+        turn_index = len(self.transcript)
+        self.transcript.append({
+            'speaker': speaker,
+            'text': text,
+            'timestamp': datetime.now().isoformat()
+        })
+        db_manager.record_turn(self.session_id, turn_index, speaker, self.state, text)
+
+
     async def on_start(self, session: AgentSession):
         """شروع مصاحبه"""
         logger.info("🎤 شروع مصاحبه")
         self.state = "GREETING"
+        self.rolling = RollingSummary(session.llm)
         
-        company_name = self.settings.get('company_name', 'آن‌تایم')
-        
-        greeting = (
-            f"سلام و درود. به مصاحبه شرکت {company_name} خوش آمدید. "
-            "من مصاحبه‌گر این جلسه هستم. "
-            "لطفاً نام و نام‌خانوادگی کامل خود را بفرمایید."
-        )
-        
-        await session.say(greeting, allow_interruptions=True)
-        self.state = "ASK_NAME"
+        # خوشامدگویی از جریان کامپایل‌شده (شامل نام شرکت)
+        await say_sequence(session, [(self.flow.flow.greeting, True)])
+        self.state = self.flow.state
+        self.lookahead.prepare(session, self.flow.likely_next())
 
 
     async def on_user_spoke(self, session: AgentSession, text: str):
@@ -157,254 +154,137 @@ class OnTimeInterviewAgent(Agent):
         logger.info(f"👤 [{self.state}] کاربر گفت: {text[:100]}")
         
         # ذخیره در transcript
-        self.transcript.append({
-            'speaker': 'candidate',
-            'text': text,
-            'timestamp': datetime.now().isoformat()
-        })
+        self.record_turn('candidate', text)
+
+        # 🔎 همه intentها (خارج از موضوع، رد کردن، پاسخ ناکافی) در یک پیمایش
+        intents = match_intents(text)
 
         # تشخیص خروج از موضوع (جز در سوالات ساده)
-        if self.state not in ["ASK_NAME", "ASK_AGE", "ASK_LOCATION"] and self.detect_off_topic(text):
+        if self.flow.step.check_off_topic and 'off_topic' in intents:
             response = await self.handle_off_topic_response(session)
-            await session.say(response, allow_interruptions=False)
             
-            # تکرار سوال فعلی
-            if self.state == "HR_STAGE" and self.hr_index < len(self.hr_questions):
-                await session.say(self.hr_questions[self.hr_index], allow_interruptions=True)
-            elif self.state == "TECH_STAGE" and self.tech_index < len(self.tech_questions):
-                await session.say(self.tech_questions[self.tech_index], allow_interruptions=True)
+            # پاسخ و سپس تکرار سوال فعلی
+            await say_sequence(session, [
+                (response, False),
+                (self.flow.current_question(), True),
+            ], lookahead=self.lookahead)
             return
 
-        # ============= مراحل مصاحبه =============
-        
-        # نام
-        if self.state == "ASK_NAME":
-            self.candidate["name"] = text
+        # ============= مراحل مصاحبه (جدول conversation_flow) =============
+        utterances = self.flow.handle(text, intents)
+        self.state = self.flow.state
+        self.candidate.update(self.flow.answers)
+        if self.flow.retry_count == 0:
             self.off_topic_count = 0
-            await session.say("متشکرم. سن شما چند سال است؟", allow_interruptions=True)
-            self.state = "ASK_AGE"
-            return
 
-        # سن
-        elif self.state == "ASK_AGE":
-            self.candidate["age"] = text
-            self.off_topic_count = 0
-            await session.say("سپاس. محل سکونت فعلی شما کجاست؟", allow_interruptions=True)
-            self.state = "ASK_LOCATION"
-            return
+        # 📝 پاسخ ثبت‌شده هم‌زمان با پخش سوال بعدی به خلاصه اضافه می‌شود
+        if self.flow.last_answer:
+            self.rolling.add(*self.flow.last_answer)
 
-        # محل سکونت
-        elif self.state == "ASK_LOCATION":
-            self.candidate["location"] = text
-            self.off_topic_count = 0
-            await session.say(
-                "بسیار خوب. لطفاً آخرین مدرک تحصیلی و رشته تحصیلی خود را بیان کنید.",
-                allow_interruptions=True
-            )
-            self.state = "ASK_EDUCATION"
-            return
+        # 🔊 جمله بعدی هم‌زمان با پخش جمله فعلی سنتز می‌شود (بدون sleep ثابت)
+        await say_sequence(session, utterances, lookahead=self.lookahead)
 
-        # تحصیلات
-        elif self.state == "ASK_EDUCATION":
-            self.candidate["education"] = text
-            self.off_topic_count = 0
-            await session.say(
-                "ممنون. لطفاً خلاصه‌ای از سوابق کاری و پروژه‌های مهم خود ارائه دهید.",
-                allow_interruptions=True
-            )
-            self.state = "ASK_EXPERIENCE"
-            return
-
-        # تجربه کاری
-        elif self.state == "ASK_EXPERIENCE":
-            if not self.is_answer_sufficient(text, min_words=8):
-                if self.retry_count < 1:
-                    self.retry_count += 1
-                    await session.say(
-                        "لطفاً کمی بیشتر توضیح دهید. مثلاً چه پروژه‌هایی انجام داده‌اید؟",
-                        allow_interruptions=True
-                    )
-                    return
-            
-            self.candidate["experience"] = text
-            self.retry_count = 0
-            self.off_topic_count = 0
-            
-            # 🔥 بررسی اینکه آیا سوالات HR وجود دارد
-            if self.settings.get('include_hr', True) and len(self.hr_questions) > 0:
-                await session.say(
-                    "بسیار خوب. حالا وارد بخش سوالات منابع انسانی می‌شویم.",
-                    allow_interruptions=False
-                )
-                await asyncio.sleep(0.5)
-                await session.say(self.hr_questions[0], allow_interruptions=True)
-                self.state = "HR_STAGE"
-            elif self.settings.get('include_technical', True) and len(self.tech_questions) > 0:
-                await session.say(
-                    "بسیار خوب. اکنون وارد بخش سوالات فنی می‌شویم.",
-                    allow_interruptions=False
-                )
-                await asyncio.sleep(0.5)
-                await session.say(self.tech_questions[0], allow_interruptions=True)
-                self.state = "TECH_STAGE"
-            else:
-                await session.say(
-                    "مصاحبه به پایان رسید. از وقتی که گذاشتید متشکرم.",
-                    allow_interruptions=False
-                )
-                self.state = "FINISHED"
-                await self.save_interview_data(session)
-            return
+        # 🔮 تا کاربر پاسخ می‌دهد، جملات احتمالی بعدی از قبل سنتز می‌شوند
+        if not self.flow.finished:
+            self.lookahead.prepare(session, self.flow.likely_next())
+        else:
+            self.lookahead.close()
+            logger.info(f"📊 Look-ahead TTS: {self.lookahead.stats()}")
+            await self.save_interview_data(session)
 
-        # بخش HR
-        elif self.state == "HR_STAGE":
-            skip_keywords = ["رد", "بعدی", "نمیدون", "نمی‌دون", "پاس", "skip"]
-            is_skip = any(kw in text.lower() for kw in skip_keywords)
-            
-            if is_skip:
-                await session.say("بسیار خوب، می‌رویم سوال بعدی.", allow_interruptions=False)
-            else:
-                if not self.is_answer_sufficient(text, min_words=6):
-                    if self.retry_count < 1:
-                        self.retry_count += 1
-                        await session.say(
-                            "ممکن است کمی بیشتر شرح دهید؟",
-                            allow_interruptions=True
-                        )
-                        return
-                
-                self.candidate["hr_answers"].append(text)
-                await session.say("متشکرم.", allow_interruptions=False)
-            
-            self.retry_count = 0
-            self.off_topic_count = 0
-            self.hr_index += 1
-            
-            if self.hr_index < len(self.hr_questions):
-                await asyncio.sleep(0.3)
-                await session.say(self.hr_questions[self.hr_index], allow_interruptions=True)
-            else:
-                # HR تمام شد
-                if self.settings.get('include_technical', True) and len(self.tech_questions) > 0:
-                    await session.say(
-                        "عالی. اکنون وارد بخش سوالات فنی می‌شویم.",
-                        allow_interruptions=False
-                    )
-                    await asyncio.sleep(0.5)
-                    await session.say(self.tech_questions[0], allow_interruptions=True)
-                    self.state = "TECH_STAGE"
-                else:
-                    await session.say(
-                        "مصاحبه به پایان رسید. از وقتی که گذاشتید متشکرم.",
-                        allow_interruptions=False
-                    )
-                    self.state = "FINISHED"
-                    await self.save_interview_data(session)
-            return
 
-        # بخش فنی
-        elif self.state == "TECH_STAGE":
-            skip_keywords = ["رد", "بعدی", "نمیدون", "نمی‌دون", "پاس", "skip"]
-            is_skip = any(kw in text.lower() for kw in skip_keywords)
-            
-            if is_skip:
-                await session.say("متوجه هستم. سوال بعدی.", allow_interruptions=False)
-            else:
-                if not self.is_answer_sufficient(text, min_words=8):
-                    if self.retry_count < 1:
-                        self.retry_count += 1
-                        await session.say(
-                            "لطفاً با جزئیات بیشتری توضیح دهید.",
-                            allow_interruptions=True
-                        )
-                        return
-                
-                self.candidate["technical_answers"].append(text)
-                await session.say("سپاس‌گزارم.", allow_interruptions=False)
-            
-            self.retry_count = 0
-            self.off_topic_count = 0
-            self.tech_index += 1
-            
-            if self.tech_index < len(self.tech_questions):
-                await asyncio.sleep(0.3)
-                await session.say(self.tech_questions[self.tech_index], allow_interruptions=True)
-            else:
-                await session.say(
-                    "مصاحبه به پایان رسید. از وقتی که گذاشتید متشکرم. "
-                    "نتیجه را در اسرع وقت به اطلاع شما خواهیم رساند. "
-                    "می‌توانید تماس را قطع کنید.",
-                    allow_interruptions=False
-                )
-                self.state = "FINISHED"
-                await self.save_interview_data(session)
-            return
+    def full_summary_prompt(self) -> str:
+        """پرامپت خلاصه کل مصاحبه، وقتی خلاصه تدریجی در دسترس نیست"""
+        lines = "\n".join(f"{turn['speaker']}: {turn['text']}" for turn in self.transcript)
+        return f"از گفتگوی مصاحبه زیر یک خلاصه رسمی و فشرده بنویس:\n{lines}"
 
 
     async def save_interview_data(self, session: AgentSession):
         """ذخیره داده‌های مصاحبه در PostgreSQL"""
         try:
-            # 💾 ذخیره در پایگاه داده
+            # خلاصه تا این لحظه تقریباً کامل است؛ فقط آخرین پاسخ باقی مانده
+            summary = await self.rolling.result()
+            logger.info(f"📊 Rolling summary: {self.rolling.stats()}")
+            if summary is None:
+                # به‌روزرسانی تدریجی شکست خورده؛ یک‌بار کل transcript خلاصه می‌شود
+                summary = await Summarizer(session.llm, concurrency=1, cache_size=0).summarize(
+                    self.full_summary_prompt()
+                )
+
+            # 💾 ذخیره در پایگاه داده (از طریق outbox محلی)
             evaluation = {
                 'hr_answers_count': len(self.candidate["hr_answers"]),
                 'technical_answers_count': len(self.candidate["technical_answers"]),
                 'completed': self.state == "FINISHED",
                 'total_hr_questions': len(self.hr_questions),
-                'total_tech_questions': len(self.tech_questions)
+                'total_tech_questions': len(self.tech_questions),
+                'turn_count': len(self.transcript),
+                'summary': summary,
             }
             
-            db_manager.save_interview_session(
-                session_id=self.session_id or f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            # نوبت‌ها قبلاً در interview_turns ذخیره شده‌اند؛ اینجا فقط متادیتا نهایی می‌شود
+            await db_manager.enqueue_interview_session(
+                session_id=self.session_id,
                 settings_id=self.settings_id,
                 candidate_name=self.candidate.get('name', 'Unknown'),
-                transcript=json.dumps(self.transcript, ensure_ascii=False),
+                transcript=None,
                 evaluation=evaluation,
-                metadata=self.candidate
+                metadata=self.candidate,
+                room_name=self.room_name
             )
             
-            logger.info(f"✅ مصاحبه در DB ذخیره شد")
-            
-            # همچنین ذخیره محلی به عنوان backup
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            name_safe = self.candidate.get('name', 'unknown').replace(' ', '_')
-            
-            output = {
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "settings_id": self.settings_id,
-                "session_id": self.session_id,
-                "candidate": self.candidate,
-                "transcript": self.transcript,
-                "metadata": {
-                    "total_hr_questions": len(self.hr_questions),
-                    "hr_answered": len(self.candidate["hr_answers"]),
-                    "total_tech_questions": len(self.tech_questions),
-                    "tech_answered": len(self.candidate["technical_answers"])
-                }
-            }
-            
-            filename = f"interview_{name_safe}_{timestamp}.json"
-            
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(output, f, indent=2, ensure_ascii=False)
-            
-            logger.info(f"✅ Backup local ذخیره شد: {filename}")
+            # outbox محلی جایگزین فایل‌های backup JSON شده است
+            logger.info(f"✅ مصاحبه در outbox ثبت شد")
             
         except Exception as e:
             logger.error(f"❌ خطا در ذخیره: {e}")
 
 
+async def load_interview_settings(settings_id: int) -> dict:
+    """بارگذاری async تنظیمات مصاحبه، قبل از ساخت Agent"""
+    return await db_manager.get_interview_settings_async(settings_id)
+
+
+def prewarm(proc: JobProcess):
+    """VAD و کلاینت‌ها + فایل outbox، یک‌بار برای هر process"""
+    make_prewarm('interview')(proc)
+    db_manager.prewarm()
+
+
 async def entrypoint(ctx: JobContext):
     """نقطه ورود عامل"""
+    # 🔥 pool پایگاه داده مال process است، نه job: هم‌زمان با اتصال به اتاق باز می‌شود
+    # (prewarm پیش از ساخت event loop اجرا می‌شود و pool asyncio را آن‌جا نمی‌توان باز کرد)
+    db_open = asyncio.create_task(db_manager.open())
+
     logger.info("⏳ اتصال به اتاق LiveKit...")
     await ctx.connect(auto_subscribe=AutoSubscribe.SUBSCRIBE_ALL)
     logger.info(f"✅ عامل متصل شد به اتاق: {ctx.room.name}")
 
+    # 🔍 در DEBUG_MODE هر callback که loop را بیش از حد مجاز نگه دارد لاگ می‌شود
+    loop_watchdog = install_slow_callback_detector()
+
+    async def close_db():
+        if loop_watchdog:
+            loop_watchdog.cancel()
+        logger.info(f"📊 DB pool stats: {db_manager.pool_stats()}")
+        logger.info(f"📊 Settings cache stats: {db_manager.cache_stats()}")
+        await db_manager.close()
+
+    # process job پس از پایان job خارج می‌شود (LiveKit 1.2)؛ این همان shutdown process
+    # و آخرین جایی است که event loop هنوز زنده است
+    ctx.add_shutdown_callback(close_db)
+    await db_open
+
     # 🔥 همیشه از settings_id = 1 استفاده کن
     settings_id = 1
     candidate_name = "Unknown"
     
     logger.info(f"⚙️ Settings ID: {settings_id}")
 
+    # 🔥 بارگذاری تنظیمات هم‌زمان با انتظار برای شرکت‌کننده
+    settings_task = asyncio.create_task(load_interview_settings(settings_id))
+
     # Event handlers
     @ctx.room.on("track_subscribed")
     def on_track(track: rtc.Track, publication, participant):
@@ -414,26 +294,28 @@ async def entrypoint(ctx: JobContext):
     logger.info(f"🎤 شرکت‌کننده وارد شد: {participant.identity}")
 
     # 🔥 ایجاد Agent
+    settings = await settings_task
     agent = OnTimeInterviewAgent(
+        settings=settings,
         settings_id=settings_id,
         candidate_name=candidate_name
     )
-    agent.session_id = ctx.room.name
+    # نام اتاق ممکن است دوباره استفاده شود؛ شناسه job هر نشست را یکتا می‌کند
+    agent.room_name = ctx.room.name
+    agent.session_id = f"{ctx.room.name}_{ctx.job.id}"
     
     # 🔥 استفاده از voice از DB
     voice = agent.settings.get('voice', 'alloy')
     
+    shared = components(ctx)
     session = AgentSession(
-        stt=openai.STT(
+        stt=shared.openai_stt(
             model="gpt-4o-mini-transcribe",
             language="fa",
         ),
-        llm=openai.LLM(model="gpt-4o-mini"),
-        tts=openai.TTS(voice=voice),
-        vad=silero.VAD.load(
-            min_speech_duration=0.2,
-            min_silence_duration=0.5,
-        ),
+        llm=shared.openai_llm(model="gpt-4o-mini"),
+        tts=CachedTTS(shared.openai_tts(voice=voice), voice=voice),
+        vad=shared.vad('interview'),
     )
 
     @session.on("user_started_speaking")
@@ -444,18 +326,17 @@ async def entrypoint(ctx: JobContext):
     def on_stopped():
         logger.info("🤐 کاربر ساکت شد")
     
-    @session.on("agent_speech")
-    def on_agent_speech(text: str):
-        agent.transcript.append({
-            'speaker': 'agent',
-            'text': text,
-            'timestamp': datetime.now().isoformat()
-        })
+    # جمله‌های عامل وقتی پخش شدند به chat context اضافه می‌شوند؛ همان‌جا ثبت می‌شوند
+    @session.on("conversation_item_added")
+    def on_conversation_item(ev: ConversationItemAddedEvent):
+        item = ev.item
+        if getattr(item, 'role', None) == 'assistant' and item.text_content:
+            agent.record_turn('agent', item.text_content)
 
     await session.start(agent=agent, room=ctx.room)
-    await agent.on_start(session)
+    shared.report_job_start()
     await asyncio.Future()
 
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
+    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
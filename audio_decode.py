@@ -0,0 +1,148 @@
+"""
+Incremental Audio Decoding
+==========================
+Turns a compressed TTS byte stream (MP3 from the Avasho proxy) into
+fixed-size PCM frames while it is still downloading.
+
+Bytes are parsed and decoded as they arrive, resampled once to the output
+rate and layout, and cut into 10-20 ms frames through a preallocated buffer
+and memoryview slicing, so the first frame is ready after the first MP3
+packet and the hot path does not allocate a buffer per frame.
+
+Consumers that cut frames themselves (the LiveKit AudioEmitter does) use
+pcm()/flush_pcm() instead: they yield the PCM of each decoded packet as a
+view into the frame PyAV already allocated, with no copy at all.
+
+Uses PyAV (the `av` dependency in pyproject.toml).
+"""
+
+from typing import Iterator, Optional
+
+import av
+
+BYTES_PER_SAMPLE = 2  # s16
+ID3_HEADER = 10
+
+
+class StreamingDecoder:
+    """Compressed bytes in, s16 PCM frames of frame_ms out."""
+
+    def __init__(
+        self,
+        codec: str = "mp3",
+        sample_rate: int = 24000,
+        num_channels: int = 1,
+        frame_ms: int = 20,
+    ):
+        if not 10 <= frame_ms <= 60:
+            raise ValueError("frame_ms must be between 10 and 60")
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+        self.samples_per_frame = sample_rate * frame_ms // 1000
+        self.frame_bytes = self.samples_per_frame * num_channels * BYTES_PER_SAMPLE
+
+        self._codec = av.CodecContext.create(codec, "r")
+        # the only resampling step between the provider and the room
+        self._resampler = av.AudioResampler(
+            format="s16",
+            layout="mono" if num_channels == 1 else "stereo",
+            rate=sample_rate,
+        )
+        self._buf = bytearray(self.frame_bytes)
+        self._view = memoryview(self._buf)
+        self._fill = 0
+        # leading ID3v2 tag: the MP3 parser turns it into an invalid packet
+        self._head: Optional[bytearray] = bytearray()
+        self._skip = 0
+
+        self.frames = 0
+        self.decoded_bytes = 0
+
+    def feed(self, data: bytes) -> Iterator[memoryview]:
+        """
+        Decode a chunk of the stream. Yields full frames as memoryviews into
+        an internal buffer, valid only until the next frame is requested —
+        copy (e.g. bytes(frame)) anything that outlives the iteration.
+        """
+        for packet in self._codec.parse(self._strip_tag(data)):
+            for frame in self._resampled(packet):
+                yield from self._slice(frame)
+
+    def flush(self) -> Iterator[memoryview]:
+        """Drain the decoder; the last frame is padded with silence."""
+        for frame in self._drain():
+            yield from self._slice(frame)
+        if self._fill:
+            self._view[self._fill:] = bytes(self.frame_bytes - self._fill)
+            self._fill = 0
+            self.frames += 1
+            yield self._view
+
+    def pcm(self, data: bytes) -> Iterator[memoryview]:
+        """
+        Decode a chunk of the stream. Yields the PCM of each decoded packet,
+        any length, as a view owned by its own PyAV frame: never reused, so
+        it can be queued without copying.
+        """
+        for packet in self._codec.parse(self._strip_tag(data)):
+            for frame in self._resampled(packet):
+                yield self._pcm(frame)
+
+    def flush_pcm(self) -> Iterator[memoryview]:
+        """Drain the decoder (pcm() counterpart of flush(); no padding)."""
+        for frame in self._drain():
+            yield self._pcm(frame)
+
+    def _strip_tag(self, data: bytes) -> bytes:
+        if self._skip:
+            n = min(self._skip, len(data))
+            self._skip -= n
+            return data[n:]
+        if self._head is None:
+            return data
+        self._head += data
+        if len(self._head) < ID3_HEADER:
+            return b""
+        head, self._head = bytes(self._head), None
+        if not head.startswith(b"ID3"):
+            return head
+        size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]  # syncsafe
+        if head[5] & 0x10:
+            size += ID3_HEADER  # footer
+        self._skip = ID3_HEADER + size
+        return self._strip_tag(head)
+
+    def _resampled(self, packet: Optional[av.Packet]) -> Iterator[av.AudioFrame]:
+        for frame in self._codec.decode(packet):
+            yield from self._resampler.resample(frame)
+        if packet is None:
+            yield from self._resampler.resample(None)
+
+    def _drain(self) -> Iterator[av.AudioFrame]:
+        if self._head:
+            # stream shorter than a tag header
+            head, self._head = bytes(self._head), None
+            for packet in self._codec.parse(head):
+                yield from self._resampled(packet)
+        for packet in self._codec.parse(None):
+            yield from self._resampled(packet)
+        yield from self._resampled(None)
+
+    def _pcm(self, frame: av.AudioFrame) -> memoryview:
+        size = frame.samples * self.num_channels * BYTES_PER_SAMPLE
+        self.decoded_bytes += size
+        return memoryview(frame.planes[0])[:size]  # packed s16: one plane
+
+    def _slice(self, frame: av.AudioFrame) -> Iterator[memoryview]:
+        pcm = self._pcm(frame)
+        size = len(pcm)
+        offset = 0
+        while offset < size:
+            n = min(self.frame_bytes - self._fill, size - offset)
+            self._view[self._fill:self._fill + n] = pcm[offset:offset + n]
+            self._fill += n
+            offset += n
+            if self._fill == self.frame_bytes:
+                self._fill = 0
+                self.frames += 1
+                yield self._view
@@ -0,0 +1,215 @@
+"""
+Avasho Client
+=============
+Async client for the Avasho v2 gateway API (request -> audio URL -> file).
+
+One aiohttp session with a keep-alive connection pool is shared by every
+request, so a text costs two pipelined round trips on warm connections
+instead of two fresh TLS handshakes. Audio is streamed straight into memory
+(no temporary file), and render_many() keeps several texts in flight at once:
+while one download is running the next request is already being synthesized.
+
+Batch mode renders a file of texts (one per line) with a concurrency limit
+and prints throughput and latency stats:
+
+    uv run python avasho_client.py batch texts.txt --concurrency 4 --out-dir renders/
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import aiohttp
+from dotenv import load_dotenv
+
+API_URL = "https://partai.gw.isahab.ir/avasho/v2/avasho/request"
+CHUNK_SIZE = 16384
+
+# Voices:
+#  Male: kiani, nourai, dara, parviz, bahman, farhad, shahriyar, ariya
+#  Female: sara, pune, bahar, shahrzad, sheyda, shirin
+
+
+class AvashoError(Exception):
+    """The gateway rejected a request or returned an unexpected response."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class RenderResult:
+    text: str
+    url: Optional[str] = None
+    audio: bytes = b""
+    request_ms: float = 0.0
+    download_ms: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def total_ms(self) -> float:
+        return self.request_ms + self.download_ms
+
+
+class AvashoClient:
+    """Persistent-session Avasho client; use as an async context manager."""
+
+    def __init__(
+        self,
+        gateway_token: Optional[str] = None,
+        api_url: Optional[str] = None,
+        max_connections: int = 8,
+        timeout: float = 60.0,
+    ):
+        self.gateway_token = gateway_token or os.getenv("AVASHO_GATEWAY_TOKEN")
+        self.api_url = api_url or os.getenv("AVASHO_API_URL", API_URL)
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "AvashoClient":
+        self._ensure_session()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def request(self, text: str, speaker: str = "shahrzad", speed: float = 1, timestamp: bool = True) -> str:
+        """Submit text for synthesis; returns the URL of the audio file."""
+        payload = {"text": text, "speaker": speaker, "speed": speed, "timestamp": timestamp}
+        headers = {"gateway-token": self.gateway_token or "", "accept": "application/json"}
+        async with self._ensure_session().post(self.api_url, json=payload, headers=headers) as resp:
+            if resp.status != 201:
+                raise AvashoError(f"request failed ({resp.status}): {await resp.text()}", resp.status)
+            result = await resp.json()
+        try:
+            return result["data"]["data"]["aiResponse"]["result"]["filename"]
+        except (KeyError, TypeError):
+            raise AvashoError("unexpected response: no filename in result") from None
+
+    async def download(self, url: str) -> bytes:
+        """Stream the audio file into memory."""
+        buf = bytearray()
+        async with self._ensure_session().get(url) as resp:
+            if resp.status != 200:
+                raise AvashoError(f"download failed ({resp.status}): {url}", resp.status)
+            async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                buf += chunk
+        return bytes(buf)
+
+    async def render(self, text: str, speaker: str = "shahrzad", speed: float = 1) -> RenderResult:
+        """Request and download one text; errors are returned, not raised."""
+        result = RenderResult(text=text)
+        started = time.perf_counter()
+        try:
+            result.url = await self.request(text, speaker=speaker, speed=speed)
+            requested = time.perf_counter()
+            result.request_ms = (requested - started) * 1000
+            result.audio = await self.download(result.url)
+            result.download_ms = (time.perf_counter() - requested) * 1000
+        except (AvashoError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            result.error = str(e) or type(e).__name__
+        return result
+
+    async def render_many(self, texts: Sequence[str], concurrency: int = 4, speaker: str = "shahrzad",
+                          speed: float = 1) -> List[RenderResult]:
+        """Render texts with at most concurrency in flight; results keep input order."""
+        limit = asyncio.Semaphore(concurrency)
+
+        async def one(text: str) -> RenderResult:
+            async with limit:
+                return await self.render(text, speaker=speaker, speed=speed)
+
+        return await asyncio.gather(*(one(t) for t in texts))
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def batch_stats(results: Sequence[RenderResult], elapsed: float) -> dict:
+    ok = [r for r in results if r.ok]
+    audio_bytes = sum(len(r.audio) for r in ok)
+    stats = {
+        'texts': len(results),
+        'ok': len(ok),
+        'failed': len(results) - len(ok),
+        'elapsed_s': round(elapsed, 2),
+        'texts_per_s': round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        'kb_per_s': round(audio_bytes / 1024 / elapsed, 1) if elapsed else 0.0,
+    }
+    for name, values in (
+        ('request', [r.request_ms for r in ok]),
+        ('download', [r.download_ms for r in ok]),
+        ('total', [r.total_ms for r in ok]),
+    ):
+        stats[f'{name}_p50_ms'] = round(_percentile(values, 0.5))
+        stats[f'{name}_p95_ms'] = round(_percentile(values, 0.95))
+    return stats
+
+
+async def run_batch(path: str, concurrency: int, out_dir: Optional[str], speaker: str, speed: float) -> dict:
+    with open(path, encoding="utf-8") as f:
+        texts = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    print(f"📄 {len(texts)} texts from {path}, concurrency {concurrency}")
+
+    started = time.perf_counter()
+    async with AvashoClient(max_connections=concurrency * 2) as client:
+        results = await client.render_many(texts, concurrency=concurrency, speaker=speaker, speed=speed)
+    elapsed = time.perf_counter() - started
+
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    for result in results:
+        if not result.ok:
+            print(f"  ❌ {result.text[:40]!r}: {result.error}")
+        elif out_dir:
+            name = hashlib.sha1(result.text.encode("utf-8")).hexdigest()[:16]
+            with open(os.path.join(out_dir, f"{name}.mp3"), "wb") as f:
+                f.write(result.audio)
+
+    stats = batch_stats(results, elapsed)
+    print(f"📊 {stats}")
+    return stats
+
+
+def main():
+    load_dotenv(".env")
+    parser = argparse.ArgumentParser(description="Avasho TTS client")
+    sub = parser.add_subparsers(dest="command", required=True)
+    batch = sub.add_parser("batch", help="render a file of texts (one per line)")
+    batch.add_argument("path")
+    batch.add_argument("--concurrency", type=int, default=4)
+    batch.add_argument("--out-dir", default=None, help="write each render as <sha1>.mp3")
+    batch.add_argument("--speaker", default="shahrzad")
+    batch.add_argument("--speed", type=float, default=1)
+    args = parser.parse_args()
+
+    if args.command == "batch":
+        asyncio.run(run_batch(args.path, args.concurrency, args.out_dir, args.speaker, args.speed))
+
+
+if __name__ == "__main__":
+    main()
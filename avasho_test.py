@@ -1,76 +1,48 @@
-import requests
-import json
+import asyncio
 import sys
 from playsound3 import playsound
 from dotenv import load_dotenv
-import os
+
+from avasho_client import AvashoClient
 
 
 # ---------------------- ENV SETUP ----------------------
 load_dotenv(".env")
 
-API_URL = "https://partai.gw.isahab.ir/avasho/v2/avasho/request"
-GATEWAY_TOKEN = os.getenv("AVASHO_GATEWAY_TOKEN")
-
-# Voices:
-#  Male: kiani, nourai, dara, parviz, bahman, farhad, shahriyar, ariya 
-#  Female: sara, pune, bahar, shahrzad, sheyda, shirin
-
+OUTPUT_FILE = "avasho_output.mp3"
 
-def generate_tts(text, speaker="shahrzad", speed=1, timestamp=True):
-    """ارسال متن به سرویس و دریافت لینک فایل صوتی"""
-    payload = {
-        "text": text,
-        "speaker": speaker,
-        "speed": speed,
-        "timestamp": timestamp
-    }
 
-    headers = {
-        "gateway-token": GATEWAY_TOKEN,
-        "accept": "application/json",
-        "Content-Type": "application/json"
-    }
+async def generate_and_download(text, speaker="shahrzad", speed=1):
+    """ارسال متن به سرویس و دریافت مستقیم فایل صوتی در حافظه"""
+    async with AvashoClient() as client:
+        result = await client.render(text, speaker=speaker, speed=speed)
 
-    response = requests.post(API_URL, headers=headers, data=json.dumps(payload))
-
-    if response.status_code == 201:
-        result = response.json()
-        try:
-            url = result["data"]["data"]["aiResponse"]["result"]["filename"]
-            print(f"✅ لینک فایل گفتار تولید شد:\n{url}")
-            return url
-        except KeyError:
-            print("❌ خطا در ساختار پاسخ، کلید filename یافت نشد.")
-    else:
-        print(f"🚫 درخواست ناموفق بود ({response.status_code}):")
-        print(response.text)
-    return None
+    if not result.ok:
+        print(f"🚫 درخواست ناموفق بود: {result.error}")
+        return None
+    print(f"✅ لینک فایل گفتار تولید شد:\n{result.url}")
+    print(f"⏱️ درخواست {result.request_ms:.0f} ms، دانلود {result.download_ms:.0f} ms")
+    return result.audio
 
 
-def download_and_play(audio_url):
-    """دانلود فایل از لینک و پخش در کنسول"""
-    r = requests.get(audio_url)
-    if r.status_code == 200:
-        filename = "avasho_output.mp3"
-        with open(filename, "wb") as f:
-            f.write(r.content)
-        print(f"🎵 فایل با موفقیت ذخیره شد: {filename}")
+def play(audio):
+    """ذخیره و پخش صدا در کنسول"""
+    with open(OUTPUT_FILE, "wb") as f:
+        f.write(audio)
+    print(f"🎵 فایل با موفقیت ذخیره شد: {OUTPUT_FILE}")
 
-        # پخش صدا در کنسول (با playsound)
-        print("▶️ در حال پخش گفتار...")
-        playsound(filename)
-    else:
-        print(f"⚠️ دانلود ناموفق بود ({r.status_code}): {audio_url}")
+    # پخش صدا در کنسول (با playsound)
+    print("▶️ در حال پخش گفتار...")
+    playsound(OUTPUT_FILE)
 
 
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "console":
         sample_text = "اینشتین از همکاران مؤسسه مطالعات پیشرفته در دانشگاه پرینستون در شهر نیوجرسی بود که تا پایان عمرش در سال ۱۹۵۵ نیز این همکاری را حفظ کرد. او بیش از ۳۰۰ مقاله علمی و ۱۵۰ مقاله غیرعلمی منتشر کرد. دستاوردهای فکری و جدید او موجب شد که نام اینشتین در فرهنگ عامه معادلی برای هوش و نبوغ محسوب شود."
 
-        
-        audio_link = generate_tts(sample_text)
-        if audio_link:
-            download_and_play(audio_link)
+        audio = asyncio.run(generate_and_download(sample_text))
+        if audio:
+            play(audio)
     else:
-        print("Usage: python avasho.py console")
+        print("Usage: python avasho_test.py console")
+        print("Batch:  python avasho_client.py batch texts.txt --concurrency 4")
@@ -0,0 +1,175 @@
+"""
+Avasho TTS
+==========
+LiveKit TTS plugin for the Avasho FastAPI proxy (POST /tts -> MP3 stream).
+
+The response body is pushed into the audio emitter chunk by chunk as it
+arrives, so playout can start on the first bytes instead of after the whole
+file is synthesized and downloaded. Requests share one keep-alive aiohttp
+connection pool per TTS instance, no temporary files are written, and
+cancelling the stream (e.g. the candidate interrupts) closes the upstream
+response.
+
+The proxy needs no credentials. A gateway token is only sent when the
+caller passes one explicitly, and only to an https server_url; it is never
+read from AVASHO_GATEWAY_TOKEN, which belongs to the v2 gateway
+(avasho_client.py). A stalled response fails after conn_options.timeout
+without data (APITimeoutError), so the framework can retry it.
+
+MP3 responses are decoded incrementally (audio_decode.StreamingDecoder)
+into PCM at the TTS sample rate and handed to the emitter without copying;
+the emitter cuts them into 20 ms frames. If the proxy is configured to
+return PCM (audio_format="pcm") the bytes are passed through as is.
+"""
+
+import asyncio
+import os
+from typing import Optional
+
+import aiohttp
+
+from audio_decode import StreamingDecoder
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    APIConnectionError,
+    APIConnectOptions,
+    APIStatusError,
+    APITimeoutError,
+    tts,
+    utils,
+)
+
+DEFAULT_SERVER_URL = "http://37.32.26.165:8000/tts"
+SAMPLE_RATE = 24000
+NUM_CHANNELS = 1
+CHUNK_SIZE = 4096
+FRAME_MS = 20
+PCM_MIME_TYPES = ("audio/pcm", "audio/l16", "audio/x-raw")
+
+
+class AvashoTTS(tts.TTS):
+    """Streaming Avasho TTS with pooled HTTP connections."""
+
+    def __init__(
+        self,
+        *,
+        speaker: str = "shahrzad",
+        speed: float = 1.0,
+        audio_format: str = "mp3",
+        server_url: Optional[str] = None,
+        gateway_token: Optional[str] = None,
+        max_connections: int = 8,
+        keepalive_timeout: float = 60.0,
+        http_session: Optional[aiohttp.ClientSession] = None,
+    ):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=SAMPLE_RATE,
+            num_channels=NUM_CHANNELS,
+        )
+        self.speaker = speaker
+        self.speed = speed
+        self.audio_format = audio_format
+        self.server_url = server_url or os.getenv("AVASHO_TTS_URL", DEFAULT_SERVER_URL)
+        if gateway_token and not self.server_url.lower().startswith("https://"):
+            raise ValueError("gateway_token is only sent over https; server_url is not https")
+        self.gateway_token = gateway_token
+        self._max_connections = max_connections
+        self._keepalive_timeout = keepalive_timeout
+        self._session = http_session
+        self._owns_session = http_session is None
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self._max_connections,
+                    keepalive_timeout=self._keepalive_timeout,
+                ),
+            )
+            self._owns_session = True
+        return self._session
+
+    def prewarm(self) -> None:
+        # open the pool early so the first request only pays for the TCP handshake
+        self._ensure_session()
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> tts.ChunkedStream:
+        return _AvashoChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    async def aclose(self) -> None:
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+class _AvashoChunkedStream(tts.ChunkedStream):
+    def __init__(self, *, tts: AvashoTTS, input_text: str, conn_options: APIConnectOptions):
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._avasho = tts
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        owner = self._avasho
+        payload = {
+            "text": self.input_text,
+            "speaker": owner.speaker,
+            "speed": owner.speed,
+            "timestamp": True,
+        }
+        if owner.audio_format != "mp3":
+            payload["format"] = owner.audio_format
+        headers = {"gateway-token": owner.gateway_token} if owner.gateway_token else {}
+
+        try:
+            async with owner._ensure_session().post(
+                owner.server_url,
+                json=payload,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(
+                    total=None,
+                    sock_connect=self._conn_options.timeout,
+                    # per read, so long utterances still stream, but a stalled proxy fails
+                    sock_read=self._conn_options.timeout,
+                ),
+            ) as resp:
+                if resp.status >= 400:
+                    raise APIStatusError(
+                        message=await resp.text(),
+                        status_code=resp.status,
+                        request_id=None,
+                        body=None,
+                    )
+                output_emitter.initialize(
+                    request_id=utils.shortuuid(),
+                    sample_rate=owner.sample_rate,
+                    num_channels=owner.num_channels,
+                    mime_type="audio/pcm",
+                    frame_size_ms=FRAME_MS,
+                )
+                decoder = None
+                if resp.content_type.lower() not in PCM_MIME_TYPES:
+                    decoder = StreamingDecoder(
+                        "mp3", sample_rate=owner.sample_rate,
+                        num_channels=owner.num_channels, frame_ms=FRAME_MS,
+                    )
+                try:
+                    async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                        if decoder is None:
+                            output_emitter.push(chunk)
+                            continue
+                        # each view is owned by its decoded frame, so it is queued as is
+                        for pcm in decoder.pcm(chunk):
+                            output_emitter.push(pcm)
+                    if decoder is not None:
+                        for pcm in decoder.flush_pcm():
+                            output_emitter.push(pcm)
+                except asyncio.CancelledError:
+                    # drop the connection instead of draining the rest of the audio
+                    resp.close()
+                    raise
+                output_emitter.flush()
+        except asyncio.TimeoutError:
+            raise APITimeoutError() from None
+        except aiohttp.ClientError as e:
+            raise APIConnectionError() from e
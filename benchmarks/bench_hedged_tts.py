@@ -0,0 +1,179 @@
+"""
+Hedged TTS Benchmark
+====================
+Fake TTS providers with injectable latency (base + jitter, a slow tail,
+a failure rate) run through hedged_tts.HedgedTTS, compared with the
+primary provider on its own. No network or LiveKit server is needed.
+
+Usage:
+    uv run python benchmarks/bench_hedged_tts.py --requests 300 --concurrency 8
+    uv run python benchmarks/bench_hedged_tts.py --scenario outage
+
+Scenarios:
+    tail    primary is fast but 5% of its requests stall for 2 s
+    outage  primary fails every request after the first third
+    slow    primary is consistently slower than the secondary
+
+Time to first audio is reported as p50 / p95 / p99, with the number of
+hedged requests (each one is an extra provider call) and failures.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from livekit.agents import (  # noqa: E402
+    DEFAULT_API_CONNECT_OPTIONS,
+    APIConnectionError,
+    APIConnectOptions,
+    tts,
+    utils,
+)
+
+from hedged_tts import HedgedTTS  # noqa: E402
+
+SAMPLE_RATE = 24000
+FRAME_MS = 20
+FRAMES_PER_UTTERANCE = 25
+NO_RETRY = APIConnectOptions(max_retry=0)
+
+
+class FakeTTS(tts.TTS):
+    """Emits silence after a configurable, randomized first-audio delay."""
+
+    def __init__(self, name: str, base_ms: float, jitter_ms: float = 0.0, tail_prob: float = 0.0,
+                 tail_ms: float = 0.0, fail_prob: float = 0.0, seed: int = 0):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=SAMPLE_RATE,
+            num_channels=1,
+        )
+        self.name = name
+        self.base_ms = base_ms
+        self.jitter_ms = jitter_ms
+        self.tail_prob = tail_prob
+        self.tail_ms = tail_ms
+        self.fail_prob = fail_prob
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> tts.ChunkedStream:
+        self.calls += 1
+        delay = self.base_ms + self.rng.uniform(0, self.jitter_ms)
+        if self.rng.random() < self.tail_prob:
+            delay += self.tail_ms
+        fails = self.rng.random() < self.fail_prob
+        return _FakeStream(tts=self, input_text=text, conn_options=conn_options, delay=delay / 1000, fails=fails)
+
+
+class _FakeStream(tts.ChunkedStream):
+    def __init__(self, *, tts: FakeTTS, input_text: str, conn_options: APIConnectOptions,
+                 delay: float, fails: bool):
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._delay = delay
+        self._fails = fails
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        await asyncio.sleep(self._delay)
+        if self._fails:
+            raise APIConnectionError("fake provider failure")
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=SAMPLE_RATE,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+        silence = bytes(SAMPLE_RATE * FRAME_MS // 1000 * 2)
+        for _ in range(FRAMES_PER_UTTERANCE):
+            output_emitter.push(silence)
+            await asyncio.sleep(0)
+        output_emitter.flush()
+
+
+def build(scenario: str, requests: int):
+    if scenario == 'tail':
+        primary = FakeTTS("primary", base_ms=150, jitter_ms=60, tail_prob=0.05, tail_ms=2000, seed=1)
+        secondary = FakeTTS("secondary", base_ms=300, jitter_ms=100, seed=2)
+    elif scenario == 'slow':
+        primary = FakeTTS("primary", base_ms=600, jitter_ms=200, seed=1)
+        secondary = FakeTTS("secondary", base_ms=250, jitter_ms=80, seed=2)
+    elif scenario == 'outage':
+        primary = FakeTTS("primary", base_ms=150, jitter_ms=60, seed=1)
+        secondary = FakeTTS("secondary", base_ms=300, jitter_ms=100, seed=2)
+        original = primary.synthesize
+
+        def failing_after_a_third(text, *, conn_options=DEFAULT_API_CONNECT_OPTIONS):
+            if primary.calls >= requests // 3:
+                primary.fail_prob = 1.0
+            return original(text, conn_options=conn_options)
+
+        primary.synthesize = failing_after_a_third
+    else:
+        raise SystemExit(f"unknown scenario {scenario!r}")
+    return primary, secondary
+
+
+async def first_audio(engine: tts.TTS, text: str):
+    started = time.perf_counter()
+    try:
+        async with engine.synthesize(text, conn_options=NO_RETRY) as stream:
+            ttfb = None
+            async for _ in stream:
+                if ttfb is None:
+                    ttfb = time.perf_counter() - started
+            return ttfb
+    except APIConnectionError:
+        return None
+
+
+async def run(name: str, engine: tts.TTS, requests: int, concurrency: int):
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with limit:
+            return await first_audio(engine, f"جمله آزمایشی شماره {i}")
+
+    results = await asyncio.gather(*(one(i) for i in range(requests)))
+    ok = sorted(r for r in results if r is not None)
+    failed = len(results) - len(ok)
+
+    def pct(q: float) -> str:
+        return f"{ok[min(len(ok) - 1, int(q * len(ok)))] * 1000:6.0f}" if ok else "     -"
+
+    print(f"{name:<10} p50 {pct(0.5)} ms  p95 {pct(0.95)} ms  p99 {pct(0.99)} ms  failed {failed}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=("tail", "outage", "slow"), default="tail")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--hedge-ms", type=float, default=None, help="fixed hedge delay (default: adaptive p95)")
+    args = parser.parse_args()
+
+    primary, _ = build(args.scenario, args.requests)
+    await run("primary", primary, args.requests, args.concurrency)
+
+    primary, secondary = build(args.scenario, args.requests)
+    hedged = HedgedTTS(
+        {"primary": primary, "secondary": secondary},
+        hedge_after=args.hedge_ms / 1000 if args.hedge_ms is not None else None,
+        pin_for=0,  # independent requests, not sentences of one reply
+    )
+    await run("hedged", hedged, args.requests, args.concurrency)
+    stats = hedged.stats()
+    print(f"hedges {stats['hedges']} (won {stats['hedge_wins']}), "
+          f"extra calls {primary.calls + secondary.calls - args.requests}")
+    for name, provider in stats['providers'].items():
+        print(f"  {name:<10} {provider}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""
+Intent Matcher Benchmark
+========================
+Compares the per-turn checks the interview agents used to run (separate
+pattern lists for off-topic, skip and insufficient answers, scanned one by
+one on raw text) with intent_matcher's single normalized scan, over a corpus
+of candidate utterances.
+
+Usage:
+    uv run python benchmarks/bench_intent_matcher.py --iterations 2000
+
+Utterances whose intents differ between the two paths are listed first;
+the differences are what normalization (ZWNJ, Arabic ye/kaf, split "می")
+and word-bounded skip words change.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intent_matcher import content_word_count, match_intents, normalize  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "candidate_utterances.txt")
+
+# the checks exactly as agent4.py / agent3_test.py ran them before
+LEGACY_OFF_TOPIC = [
+    r"چطور.*می‌?تون", r"چجوری", r"آیا.*می‌?دون", r"می‌?شه.*بگ", r"می‌?شه.*کمک",
+    r"لطفا.*توضیح.*بد", r"سوال.*دار", r"می‌?خواستم.*بپرس", r"یه.*سوال", r"یک.*سوال",
+    r"راستی", r"ببخشید.*چطور", r"می‌?تونی.*بگی",
+]
+LEGACY_SKIP = ["رد", "بعدی", "نمیدون", "نمی‌دون", "پاس", "skip"]
+LEGACY_INSUFFICIENT = ["نمی.*دون", "نمیدون", "^خیر$", "^نه$", "^رد$", "نمی‌دونم"]
+
+
+def legacy_intents(text: str) -> tuple:
+    lowered = text.lower()
+    intents = set()
+    if any(re.search(p, lowered) for p in LEGACY_OFF_TOPIC):
+        intents.add('off_topic')
+    if any(kw in lowered for kw in LEGACY_SKIP):
+        intents.add('skip')
+    if any(re.search(p, lowered) for p in LEGACY_INSUFFICIENT):
+        intents.add('insufficient')
+    words = len([w for w in text.split() if len(w) > 1])
+    return frozenset(intents), words
+
+
+def matcher_intents(text: str) -> tuple:
+    normalized = normalize(text)
+    return match_intents(text), content_word_count(normalized)
+
+
+def load_corpus(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def run(name: str, fn, corpus: list, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for text in corpus:
+            fn(text)
+    elapsed = time.perf_counter() - started
+    per_call = elapsed / (iterations * len(corpus)) * 1e6
+    print(f"{name:<8} {iterations * len(corpus):>8} calls  {per_call:7.2f} µs/utterance")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--corpus", default=CORPUS)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    print(f"📄 {len(corpus)} utterances from {args.corpus}")
+
+    for text in corpus:
+        old, _ = legacy_intents(text)
+        new, _ = matcher_intents(text)
+        if old != new:
+            print(f"  ≠ {text[:60]!r}: legacy={sorted(old)} matcher={sorted(new)}")
+
+    legacy = run("legacy", legacy_intents, corpus, args.iterations)
+    matcher = run("matcher", matcher_intents, corpus, args.iterations)
+    print(f"speedup  x{legacy / matcher:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Job Start Benchmark
+===================
+Time to build a voice session's components (VAD, STT/LLM/TTS plugins) for
+a job, in a process without prewarm (VAD loaded and clients created per
+job, as the entrypoints used to) and in a prewarmed process (everything
+taken from components.Components). No LiveKit server or API calls needed.
+
+Usage:
+    uv run python benchmarks/bench_job_start.py --jobs 5 --preset interview
+
+In production the same numbers are logged per job by
+Components.report_job_start() ("🚀 Job #N started in ... ms").
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from livekit.plugins import openai, silero  # noqa: E402
+
+from components import VAD_PRESETS, Components  # noqa: E402
+
+
+def per_job(preset: str):
+    """What every entrypoint did before: load VAD and build fresh clients."""
+    return (
+        openai.STT(model="gpt-4o-mini-transcribe", language="fa"),
+        openai.LLM(model="gpt-4o-mini"),
+        openai.TTS(voice="alloy"),
+        silero.VAD.load(**VAD_PRESETS[preset]),
+    )
+
+
+def from_registry(shared: Components, preset: str):
+    return (
+        shared.openai_stt(model="gpt-4o-mini-transcribe", language="fa"),
+        shared.openai_llm(model="gpt-4o-mini"),
+        shared.openai_tts(voice="alloy"),
+        shared.vad(preset),
+    )
+
+
+def timed(fn, *args) -> float:
+    started = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - started) * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=5)
+    parser.add_argument("--preset", choices=sorted(VAD_PRESETS), default="default")
+    args = parser.parse_args()
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+    cold = [timed(per_job, args.preset) for _ in range(args.jobs)]
+
+    started = time.perf_counter()
+    shared = Components(prewarmed=True)
+    shared.vad(args.preset)
+    _ = shared.openai_client
+    prewarm_ms = (time.perf_counter() - started) * 1000
+    warm = [timed(from_registry, shared, args.preset) for _ in range(args.jobs)]
+
+    print(f"without prewarm  avg {sum(cold) / len(cold):7.1f} ms/job  first {cold[0]:7.1f} ms")
+    print(f"with prewarm     avg {sum(warm) / len(warm):7.1f} ms/job  first {warm[0]:7.1f} ms"
+          f"  (prewarm {prewarm_ms:.1f} ms, once per process)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
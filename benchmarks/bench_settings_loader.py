@@ -0,0 +1,177 @@
+"""
+Interview Settings Loader Benchmark
+===================================
+Compares the ways of loading interview settings against a local Postgres:
+
+- legacy:  three queries, each on a fresh connection (the original behaviour)
+- pooled:  the same three queries on one pooled connection
+- single:  SETTINGS_WITH_QUESTIONS_QUERY as a server-side prepared statement
+
+Usage:
+    uv run python benchmarks/bench_settings_loader.py --seed --iterations 500
+
+--seed creates an isolated `settings_bench` schema with sample settings and
+questions (plus the migrations/001 indexes), so it never touches real data.
+Connection settings come from the usual DB_* environment variables.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import psycopg
+from psycopg.rows import dict_row
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_manager import (  # noqa: E402
+    HR_QUESTIONS_QUERY,
+    SETTINGS_QUERY,
+    SETTINGS_WITH_QUESTIONS_QUERY,
+    TECH_QUESTIONS_QUERY,
+)
+from db_pool import SyncDatabasePool, build_conninfo  # noqa: E402
+
+SCHEMA = "settings_bench"
+
+SEED_SQL = f"""
+DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+CREATE SCHEMA {SCHEMA};
+SET search_path TO {SCHEMA};
+
+CREATE TABLE interview_settings (
+    id SERIAL PRIMARY KEY,
+    company_id TEXT NOT NULL,
+    interview_field TEXT,
+    include_hr BOOLEAN DEFAULT TRUE,
+    include_technical BOOLEAN DEFAULT TRUE,
+    voice TEXT,
+    language TEXT,
+    strictness_level TEXT,
+    conversation_flow TEXT
+);
+
+CREATE TABLE custom_hr_questions (
+    id SERIAL PRIMARY KEY,
+    company_id TEXT NOT NULL,
+    question_text TEXT NOT NULL,
+    field TEXT,
+    ask BOOLEAN DEFAULT TRUE,
+    order_index INT
+);
+
+CREATE TABLE custom_technical_questions (LIKE custom_hr_questions INCLUDING ALL);
+
+INSERT INTO interview_settings
+    (company_id, interview_field, voice, language, strictness_level, conversation_flow)
+SELECT 'company_' || g, 'Data Science', 'alloy', 'persian', 'medium',
+       'greeting,company_introduction,hr_interview,technical_interview,closing'
+FROM generate_series(1, 200) g;
+
+INSERT INTO custom_hr_questions (company_id, question_text, field, ask, order_index)
+SELECT 'company_' || (g % 200 + 1), 'سوال منابع انسانی شماره ' || g,
+       CASE WHEN g % 3 = 0 THEN 'Data Science' WHEN g % 3 = 1 THEN NULL ELSE 'Backend' END,
+       g % 5 <> 0, g
+FROM generate_series(1, 20000) g;
+
+INSERT INTO custom_technical_questions (company_id, question_text, field, ask, order_index)
+SELECT 'company_' || (g % 200 + 1), 'سوال فنی شماره ' || g,
+       CASE WHEN g % 3 = 0 THEN 'Data Science' WHEN g % 3 = 1 THEN '' ELSE 'Backend' END,
+       g % 5 <> 0, g
+FROM generate_series(1, 20000) g;
+
+CREATE INDEX idx_custom_hr_questions_lookup
+    ON custom_hr_questions (company_id, ask, field, order_index);
+CREATE INDEX idx_custom_technical_questions_lookup
+    ON custom_technical_questions (company_id, ask, field, order_index);
+ANALYZE;
+"""
+
+
+def conninfo_for_bench(seeded: bool) -> str:
+    conninfo = build_conninfo()
+    if seeded:
+        conninfo += f" options='-c search_path={SCHEMA}'"
+    return conninfo
+
+
+def legacy_load(conninfo: str, settings_id: int) -> tuple:
+    """Original path: a new connection for every statement."""
+    def query(sql, params, one=False):
+        with psycopg.connect(conninfo, row_factory=dict_row) as conn:
+            cur = conn.execute(sql, params)
+            return cur.fetchone() if one else cur.fetchall()
+
+    row = query(SETTINGS_QUERY, (settings_id,), one=True)
+    params = (row['company_id'], row['interview_field'])
+    hr = [r['question_text'] for r in query(HR_QUESTIONS_QUERY, params)] if row['include_hr'] else []
+    tech = [r['question_text'] for r in query(TECH_QUESTIONS_QUERY, params)] if row['include_technical'] else []
+    return hr, tech
+
+
+def pooled_load(pool: SyncDatabasePool, settings_id: int) -> tuple:
+    """Three queries, but on one pooled connection."""
+    with pool.connection() as conn:
+        row = conn.execute(SETTINGS_QUERY, (settings_id,)).fetchone()
+        params = (row['company_id'], row['interview_field'])
+        hr = [r['question_text'] for r in conn.execute(HR_QUESTIONS_QUERY, params)] if row['include_hr'] else []
+        tech = [r['question_text'] for r in conn.execute(TECH_QUESTIONS_QUERY, params)] if row['include_technical'] else []
+    return hr, tech
+
+
+def single_load(pool: SyncDatabasePool, settings_id: int) -> tuple:
+    """One round trip, server-side prepared."""
+    with pool.connection() as conn:
+        row = conn.execute(SETTINGS_WITH_QUESTIONS_QUERY, (settings_id,), prepare=True).fetchone()
+    return row['hr_questions'], row['technical_questions']
+
+
+def run(name: str, fn, iterations: int, settings_ids: list) -> list:
+    timings = []
+    for i in range(iterations):
+        settings_id = settings_ids[i % len(settings_ids)]
+        started = time.perf_counter()
+        fn(settings_id)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) >= 20 else timings[-1]
+    print(
+        f"{name:<8} n={iterations:<5} mean={statistics.mean(timings):7.2f} ms  "
+        f"p50={statistics.median(timings):7.2f} ms  p95={p95:7.2f} ms"
+    )
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--seed", action="store_true", help="create and use the settings_bench schema")
+    parser.add_argument("--settings-id", type=int, action="append", help="settings ids to cycle through")
+    args = parser.parse_args()
+
+    if args.seed:
+        with psycopg.connect(build_conninfo(), autocommit=True) as conn:
+            conn.execute(SEED_SQL)
+        print(f"🌱 Seeded schema '{SCHEMA}'")
+
+    conninfo = conninfo_for_bench(args.seed)
+    settings_ids = args.settings_id or (list(range(1, 201)) if args.seed else [1])
+    pool = SyncDatabasePool(conninfo, min_size=1, max_size=2)
+    pool.open()
+
+    # Results must match before timing means anything
+    for settings_id in settings_ids[:10]:
+        expected = legacy_load(conninfo, settings_id)
+        assert pooled_load(pool, settings_id) == expected, f"pooled mismatch for id={settings_id}"
+        assert tuple(single_load(pool, settings_id)) == expected, f"single mismatch for id={settings_id}"
+
+    run("legacy", lambda sid: legacy_load(conninfo, sid), args.iterations, settings_ids)
+    run("pooled", lambda sid: pooled_load(pool, sid), args.iterations, settings_ids)
+    run("single", lambda sid: single_load(pool, sid), args.iterations, settings_ids)
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Shared Components
+=================
+Per-process registry of the expensive parts of a voice session: Silero VAD
+models, the turn detector, and pooled HTTP clients for OpenAI and Deepgram.
+
+The registry is built in the worker's prewarm_fnc, before any job is
+assigned to the process, and every entrypoint takes its VAD and plugin
+clients from it instead of loading models and opening connections per job:
+
+    from components import components, make_prewarm
+
+    async def entrypoint(ctx):
+        shared = components(ctx)
+        session = AgentSession(
+            stt=shared.openai_stt(model="gpt-4o-mini-transcribe", language="fa"),
+            llm=shared.openai_llm(model="gpt-4.1-mini"),
+            tts=shared.openai_tts(voice="sage"),
+            vad=shared.vad("interview"),
+        )
+        ...
+        shared.report_job_start()
+
+    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=make_prewarm("interview")))
+
+A process that was not prewarmed builds the registry on its first job;
+report_job_start() logs the job-start latency either way, so the two can be
+compared (see also benchmarks/bench_job_start.py).
+
+Plugin instances (STT/LLM/TTS) are still created per session, since the
+session attaches its own metrics listeners to them; only the clients and
+models underneath come from the registry.
+
+LiveKit job processes run a single job and exit, so nothing here is shared
+between jobs: what prewarming buys is that the models are loaded (and the
+clients built) while the process waits in the idle pool, not after the job
+was assigned. HTTP connections still open during the job, on first use.
+"""
+
+import logging
+import time
+from typing import Dict, Optional
+
+import aiohttp
+import httpx
+import openai as openai_sdk
+
+from livekit.agents import JobContext, JobProcess
+from livekit.plugins import deepgram, openai, silero
+
+logger = logging.getLogger("components")
+logger.setLevel(logging.INFO)
+
+USERDATA_KEY = "components"
+
+# name -> silero.VAD.load() options
+VAD_PRESETS: Dict[str, dict] = {
+    'default': {},
+    'interview': {'min_speech_duration': 0.2, 'min_silence_duration': 0.5},
+    'responsive': {'min_speech_duration': 0.1, 'min_silence_duration': 0.3},
+}
+
+
+class Components:
+    """Models and clients shared by every job a worker process runs."""
+
+    def __init__(self, prewarmed: bool = False):
+        self.prewarmed = prewarmed
+        self._vads: Dict[str, silero.VAD] = {}
+        self._turn_detector = None
+        self._openai_client: Optional[openai_sdk.AsyncClient] = None
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        self._job_started: Optional[float] = None
+
+        self.jobs = 0
+        self.load_ms: Dict[str, float] = {}
+
+    # ---------------- models ----------------
+    def vad(self, preset: str = 'default') -> silero.VAD:
+        """Silero VAD for a preset, loaded once per process."""
+        vad = self._vads.get(preset)
+        if vad is None:
+            started = time.perf_counter()
+            vad = silero.VAD.load(**VAD_PRESETS[preset])
+            self.load_ms[f'vad:{preset}'] = (time.perf_counter() - started) * 1000
+            self._vads[preset] = vad
+        return vad
+
+    def turn_detector(self):
+        """Multilingual end-of-turn model (the plugin must be imported by the worker script)."""
+        if self._turn_detector is None:
+            from livekit.plugins.turn_detector.multilingual import MultilingualModel
+
+            self._turn_detector = MultilingualModel()
+        return self._turn_detector
+
+    # ---------------- clients ----------------
+    @property
+    def openai_client(self) -> openai_sdk.AsyncClient:
+        """One keep-alive connection pool for OpenAI STT, LLM and TTS."""
+        if self._openai_client is None:
+            # without this every plugin instance opens its own pool, per job
+            self._openai_client = openai_sdk.AsyncClient(
+                max_retries=0,
+                http_client=httpx.AsyncClient(
+                    timeout=httpx.Timeout(connect=15.0, read=30.0, write=5.0, pool=5.0),
+                    follow_redirects=True,
+                    limits=httpx.Limits(max_connections=50, max_keepalive_connections=50, keepalive_expiry=120),
+                ),
+            )
+        return self._openai_client
+
+    @property
+    def http_session(self) -> aiohttp.ClientSession:
+        """aiohttp session for Deepgram; created inside the job's event loop."""
+        if self._http_session is None or self._http_session.closed:
+            self._http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=50, keepalive_timeout=120),
+            )
+        return self._http_session
+
+    def openai_stt(self, **kwargs) -> openai.STT:
+        return openai.STT(client=self.openai_client, **kwargs)
+
+    def openai_llm(self, **kwargs) -> openai.LLM:
+        return openai.LLM(client=self.openai_client, **kwargs)
+
+    def openai_tts(self, **kwargs) -> openai.TTS:
+        return openai.TTS(client=self.openai_client, **kwargs)
+
+    def deepgram_stt(self, **kwargs) -> deepgram.STT:
+        return deepgram.STT(http_session=self.http_session, **kwargs)
+
+    # ---------------- job-start latency ----------------
+    def job_started(self):
+        self.jobs += 1
+        self._job_started = time.perf_counter()
+
+    def report_job_start(self) -> float:
+        """Log the time from components(ctx) to now (call after session.start)."""
+        if self._job_started is None:
+            return 0.0
+        elapsed = (time.perf_counter() - self._job_started) * 1000
+        self._job_started = None
+        logger.info(f"🚀 Job #{self.jobs} started in {elapsed:.0f} ms "
+                    f"(prewarmed: {'yes' if self.prewarmed else 'no'}, loads: "
+                    f"{ {k: round(v) for k, v in self.load_ms.items()} })")
+        self.load_ms.clear()
+        return elapsed
+
+
+def make_prewarm(*vad_presets: str):
+    """prewarm_fnc that loads the given VAD presets (default: 'default')."""
+
+    def prewarm(proc: JobProcess):
+        started = time.perf_counter()
+        shared = Components(prewarmed=True)
+        for preset in vad_presets or ('default',):
+            shared.vad(preset)
+        _ = shared.openai_client  # the pool itself; connections open on first use
+        shared.load_ms.clear()
+        proc.userdata[USERDATA_KEY] = shared
+        logger.info(f"🔥 Prewarmed components in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    return prewarm
+
+
+prewarm = make_prewarm()
+
+
+def components(ctx: JobContext) -> Components:
+    """This process's registry; built on the spot if the process was not prewarmed."""
+    shared = ctx.proc.userdata.get(USERDATA_KEY)
+    if shared is None:
+        shared = ctx.proc.userdata[USERDATA_KEY] = Components(prewarmed=False)
+    shared.job_started()
+    return shared
@@ -0,0 +1,235 @@
+"""
+Context Compaction
+==================
+Keeps the chat context sent to the LLM bounded in long free-form sessions.
+
+The LLM-driven agents (restaurant order, Airbnb assistant, MCP agent) send
+the whole chat history on every turn, including large tool results such as
+view_menu or search_airbnbs that stopped mattering several turns ago, so
+latency and token cost grow with the length of the call. Before every LLM
+call, CompactingAgent rebuilds the context as:
+
+    instructions
+    + summary of older turns      (one system message)
+    + the last `keep_turns` user turns, verbatim
+      (tool results from earlier turns trimmed to `max_tool_chars`)
+
+Older turns are folded into the summary in the background (RollingSummary),
+so compaction never waits for the LLM; turns that are not folded in yet are
+listed as short transcript lines instead. If the result is still over
+`token_budget`, the verbatim window shrinks one user turn at a time (the
+current turn is always kept). The window starts at a user message, so a
+tool call is never separated from its result.
+
+Token counts are estimates (about 4 characters per token). Per-turn counts
+before and after compaction are kept in stats(), next to the prompt tokens
+the LLM reported for the conversation's own calls (the background summary
+runs on the same LLM; its requests are recognized by id and left out), and
+logged when the agent exits.
+"""
+
+import logging
+import os
+from typing import List, Optional, Set, Tuple
+
+from livekit.agents import Agent, ModelSettings, llm
+from livekit.agents.metrics import LLMMetrics
+
+from rolling_summary import RollingSummary
+
+logger = logging.getLogger("context-compaction")
+logger.setLevel(logging.INFO)
+
+SUMMARY_INSTRUCTIONS = (
+    "Update the running summary of this phone conversation with the new lines. "
+    "Keep every fact the assistant may still need (names, choices, orders, "
+    "addresses, booking or confirmation numbers, open questions) and drop "
+    "greetings and small talk. At most {max_words} words; return only the summary."
+)
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD = 4  # role and separators, per item
+
+
+def item_text(item: llm.ChatItem) -> str:
+    if item.type == "message":
+        return item.text_content or ""
+    if item.type == "function_call":
+        return f"{item.name}({item.arguments})"
+    if item.type == "function_call_output":
+        return item.output
+    return ""
+
+
+def estimate_tokens(items: List[llm.ChatItem]) -> int:
+    return sum(len(item_text(item)) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD for item in items)
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit] + " …(truncated)"
+
+
+def _is_user(item: llm.ChatItem) -> bool:
+    return item.type == "message" and item.role == "user"
+
+
+class _TranscriptSummary(RollingSummary):
+    """RollingSummary over (speaker, text) lines instead of interview answers."""
+
+    def prompt(self, batch: List[Tuple[str, str]]) -> str:
+        lines = "\n".join(f"{speaker}: {text}" for speaker, text in batch)
+        return (
+            f"{self.instructions}\n\n"
+            f"Current summary:\n{self.summary or '(empty)'}\n\n"
+            f"New lines:\n{lines}"
+        )
+
+
+class ContextCompactor:
+    """Builds the bounded chat context for one session."""
+
+    def __init__(
+        self,
+        token_budget: Optional[int] = None,
+        keep_turns: Optional[int] = None,
+        max_tool_chars: int = 400,
+        max_summary_words: int = 200,
+    ):
+        self.token_budget = token_budget or int(os.getenv('CONTEXT_TOKEN_BUDGET', '3000'))
+        self.keep_turns = keep_turns or int(os.getenv('CONTEXT_KEEP_TURNS', '4'))
+        self.max_tool_chars = max_tool_chars
+        self.max_summary_words = max_summary_words
+
+        self._summary: Optional[_TranscriptSummary] = None
+        self._folded: Set[str] = set()
+
+        # estimated prompt tokens per LLM call
+        self.tokens_before: List[int] = []
+        self.tokens_after: List[int] = []
+
+    def compact(self, chat_ctx: llm.ChatContext, model: llm.LLM) -> llm.ChatContext:
+        if self._summary is None:
+            self._summary = _TranscriptSummary(model, SUMMARY_INSTRUCTIONS, self.max_summary_words)
+
+        items = list(chat_ctx.items)
+        n_head = 0
+        while n_head < len(items) and items[n_head].type == "message" and items[n_head].role in ("system", "developer"):
+            n_head += 1
+        head, body = items[:n_head], items[n_head:]
+
+        # the window starts at a user message, never before turns already summarized
+        floor = max((i + 1 for i, item in enumerate(body) if item.id in self._folded), default=0)
+        starts = [i for i, item in enumerate(body) if _is_user(item) and i >= floor]
+        start = starts[-self.keep_turns] if len(starts) > self.keep_turns else floor
+
+        compacted = self._build(head, body, start)
+        while estimate_tokens(compacted) > self.token_budget:
+            later = [i for i in starts if i > start]
+            if not later:
+                break
+            start = later[0]
+            compacted = self._build(head, body, start)
+
+        self._fold(body[:start])
+        self.tokens_before.append(estimate_tokens(items))
+        self.tokens_after.append(estimate_tokens(compacted))
+        logger.info(f"🗜️ Context: {self.tokens_before[-1]} → {self.tokens_after[-1]} tokens (est.), "
+                    f"{len(items)} → {len(compacted)} items")
+        return llm.ChatContext(compacted)
+
+    # ---------------- internals ----------------
+    def _build(self, head: List[llm.ChatItem], body: List[llm.ChatItem], start: int) -> List[llm.ChatItem]:
+        summary = self._summary_text(body[:start])
+        out = list(head)
+        if summary:
+            out.append(llm.ChatMessage(role="system", content=[f"Summary of the earlier conversation:\n{summary}"]))
+        recent = body[start:]
+        last_user = max((i for i, item in enumerate(recent) if _is_user(item)), default=0)
+        for i, item in enumerate(recent):
+            # results of earlier turns are stale; the current turn's results stay whole
+            if i < last_user and item.type == "function_call_output" and len(item.output) > self.max_tool_chars:
+                item = item.model_copy(update={"output": _clip(item.output, self.max_tool_chars)})
+            out.append(item)
+        return out
+
+    def _summary_text(self, old: List[llm.ChatItem]) -> str:
+        lines = self._summary.unsummarized() + [
+            line for item in old if item.id not in self._folded for line in self._lines(item)
+        ]
+        parts = [self._summary.summary] if self._summary.summary else []
+        parts += [f"{speaker}: {_clip(text, 200)}" for speaker, text in lines]
+        return "\n".join(parts)
+
+    def _lines(self, item: llm.ChatItem) -> List[Tuple[str, str]]:
+        text = item_text(item).strip()
+        if not text:
+            return []
+        if item.type == "message":
+            return [(item.role, text)]
+        if item.type == "function_call":
+            return [("tool call", text)]
+        return [("tool result", _clip(text, self.max_tool_chars))]
+
+    def _fold(self, old: List[llm.ChatItem]):
+        for item in old:
+            if item.id in self._folded:
+                continue
+            self._folded.add(item.id)
+            for speaker, text in self._lines(item):
+                self._summary.add(speaker, text)
+
+    def summary_request_ids(self) -> Set[str]:
+        """LLM requests made by the background summary, not by the conversation."""
+        return self._summary.request_ids if self._summary else set()
+
+    def stats(self) -> dict:
+        turns = len(self.tokens_before)
+        before = sum(self.tokens_before)
+        after = sum(self.tokens_after)
+        return {
+            'turns': turns,
+            'avg_tokens_before': before // turns if turns else 0,
+            'avg_tokens_after': after // turns if turns else 0,
+            'max_tokens_after': max(self.tokens_after, default=0),
+            'saved_pct': round(100 * (before - after) / before, 1) if before else 0.0,
+            'summary': self._summary.stats() if self._summary else None,
+        }
+
+
+class CompactingAgent(Agent):
+    """Agent whose LLM calls go through a ContextCompactor."""
+
+    def __init__(self, *args, compactor: Optional[ContextCompactor] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.compactor = compactor or ContextCompactor()
+        self._counted_llm: Optional[llm.LLM] = None
+        # (request id, prompt tokens) reported by the LLM, per call
+        self._reported: List[Tuple[str, int]] = []
+
+    async def llm_node(self, chat_ctx: llm.ChatContext, tools: list, model_settings: ModelSettings):
+        model = self.session.llm
+        if self._counted_llm is None and model is not None:
+            self._counted_llm = model
+            model.on("metrics_collected", self._count_prompt_tokens)
+        chat_ctx = self.compactor.compact(chat_ctx, model)
+        async for chunk in Agent.default.llm_node(self, chat_ctx, tools, model_settings):
+            yield chunk
+
+    async def on_exit(self):
+        if self._counted_llm is not None:
+            self._counted_llm.off("metrics_collected", self._count_prompt_tokens)
+        logger.info(f"📊 Context compaction: {self.context_stats()}")
+
+    def _count_prompt_tokens(self, metrics: LLMMetrics):
+        self._reported.append((metrics.request_id, metrics.prompt_tokens))
+
+    @property
+    def reported_prompt_tokens(self) -> List[int]:
+        """Prompt tokens of the conversation's LLM calls; the summary's calls on the same LLM are left out."""
+        summary_ids = self.compactor.summary_request_ids()
+        return [tokens for request_id, tokens in self._reported if request_id not in summary_ids]
+
+    def context_stats(self) -> dict:
+        stats = self.compactor.stats()
+        stats['reported_prompt_tokens'] = self.reported_prompt_tokens
+        return stats
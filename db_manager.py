@@ -1,60 +1,260 @@
-import psycopg2
-from psycopg2.extras import RealDictCursor
 import os
+import asyncio
+import copy
 import logging
 import json
 from datetime import datetime
 
+import psycopg
+
+from db_pool import AsyncDatabasePool, SyncDatabasePool
+from outbox import Outbox
+from settings_cache import AsyncTTLCache
+from write_behind import WriteBehindQueue
+
 logger = logging.getLogger("db-manager")
 logger.setLevel(logging.INFO)
 
 
+# مسیر قدیمی سه‌queryای (برای benchmarks/bench_settings_loader.py نگه داشته شده)
+SETTINGS_QUERY = """
+    SELECT 
+        company_id,
+        interview_field,
+        include_hr,
+        include_technical,
+        voice,
+        language,
+        strictness_level,
+        conversation_flow
+    FROM interview_settings
+    WHERE id = %s
+"""
+
+# 🔥 سوالات HR (فقط سوالاتی که ask=True و field مطابق باشد)
+HR_QUESTIONS_QUERY = """
+    SELECT question_text 
+    FROM custom_hr_questions 
+    WHERE company_id = %s 
+    AND ask = TRUE
+    AND (field = %s OR field IS NULL OR field = '')
+    ORDER BY order_index
+"""
+
+# 🔥 سوالات فنی (فقط سوالاتی که ask=True و field مطابق باشد)
+TECH_QUESTIONS_QUERY = """
+    SELECT question_text 
+    FROM custom_technical_questions 
+    WHERE company_id = %s 
+    AND ask = TRUE
+    AND (field = %s OR field IS NULL OR field = '')
+    ORDER BY order_index
+"""
+
+# 🔥 تنظیمات + هر دو آرایه سوالات مرتب‌شده در یک رفت‌وبرگشت
+# (به‌صورت prepared statement سمت سرور اجرا می‌شود؛ ایندکس‌ها در migrations/001)
+SETTINGS_WITH_QUESTIONS_QUERY = """
+    SELECT 
+        s.company_id,
+        s.interview_field,
+        s.include_hr,
+        s.include_technical,
+        s.voice,
+        s.language,
+        s.strictness_level,
+        s.conversation_flow,
+        COALESCE(hr.questions, '[]'::json) AS hr_questions,
+        COALESCE(tech.questions, '[]'::json) AS technical_questions
+    FROM interview_settings s
+    CROSS JOIN LATERAL (
+        SELECT json_agg(q.question_text ORDER BY q.order_index) AS questions
+        FROM custom_hr_questions q
+        WHERE s.include_hr
+        AND q.company_id = s.company_id
+        AND q.ask = TRUE
+        AND (q.field = s.interview_field OR q.field IS NULL OR q.field = '')
+    ) hr
+    CROSS JOIN LATERAL (
+        SELECT json_agg(q.question_text ORDER BY q.order_index) AS questions
+        FROM custom_technical_questions q
+        WHERE s.include_technical
+        AND q.company_id = s.company_id
+        AND q.ask = TRUE
+        AND (q.field = s.interview_field OR q.field IS NULL OR q.field = '')
+    ) tech
+    WHERE s.id = %s
+"""
+
+# کانال NOTIFY که triggerهای migrations/002 روی آن اعلام تغییر می‌کنند
+SETTINGS_CHANGED_CHANNEL = "interview_settings_changed"
+
+# session_id یکتاست (اتاق + job)؛ نام اتاق جداگانه در room_name (migrations/004)
+SESSION_COLUMNS = (
+    'session_id', 'settings_id', 'candidate_name', 'transcript',
+    'evaluation', 'metadata', 'created_at', 'room_name',
+)
+
+TURN_COLUMNS = ('session_id', 'turn_index', 'speaker', 'stage', 'text', 'created_at')
+
+
 class DatabaseManager:
     """مدیریت اتصال و عملیات پایگاه داده PostgreSQL"""
 
     def __init__(self):
-        self.connection_params = {
-            'host': os.getenv('DB_HOST', 'localhost'),
-            'port': os.getenv('DB_PORT', '5432'),
-            'database': os.getenv('DB_NAME', 'interview_db'),
-            'user': os.getenv('DB_USER', 'postgres'),
-            'password': os.getenv('DB_PASSWORD', '')
-        }
+        # pool اصلی asyncio برای Agentها + pool همگام برای فراخوانی‌های قدیمی
+        self.pool = AsyncDatabasePool()
+        self.sync_pool = SyncDatabasePool(self.pool.conninfo)
+        # کش سراسری process برای تنظیمات و بانک سوالات (TTL + LRU + single-flight)
+        self.settings_cache = AsyncTTLCache(
+            ttl=float(os.getenv('SETTINGS_CACHE_TTL', '300')),
+            max_size=int(os.getenv('SETTINGS_CACHE_MAX_SIZE', '256')),
+            name="interview-settings",
+        )
+        self._listener_task = None
+        # نوشتن دسته‌ای با COPY؛ کلیدهای تکراری نادیده گرفته می‌شوند (idempotent)
+        self.session_writer = WriteBehindQueue(
+            self.pool, 'interview_sessions', SESSION_COLUMNS,
+            conflict_columns=('session_id',),
+        )
+        # نوبت‌های مکالمه در حین مصاحبه و با فاصله flush کوتاه‌تر ذخیره می‌شوند
+        self.turn_writer = WriteBehindQueue(
+            self.pool, 'interview_turns', TURN_COLUMNS,
+            conflict_columns=('session_id', 'turn_index'),
+            flush_interval=float(os.getenv('TURN_FLUSH_INTERVAL', '1')),
+            on_failure=self._spill_turns,
+        )
+        # outbox محلی (SQLite/WAL): نتیجه هر نشست ابتدا اینجا نوشته و سپس
+        # در پس‌زمینه با retry به PostgreSQL منتقل می‌شود
+        self.outbox = Outbox()
+        self.outbox.register('session', lambda rows: self.session_writer.write_batch(rows, max_retries=0, raise_rejected=True))
+        self.outbox.register('turn', lambda rows: self.turn_writer.write_batch(rows, max_retries=0, raise_rejected=True))
         logger.info("✅ DatabaseManager initialized")
 
+    def prewarm(self):
+        """بخش همگام راه‌اندازی (فایل SQLite outbox) در prewarm process، پیش از ساخت event loop"""
+        self.outbox.open()
+
+    async def open(self):
+        """
+        باز کردن pool غیرهمگام، drainer صف outbox و LISTEN تنظیمات؛ یک‌بار برای
+        کل process (idempotent: فراخوانی‌های بعدی همان منابع باز را برمی‌گردانند)
+        """
+        self.outbox.start()
+        await self.pool.open()
+        self.start_cache_invalidation()
+
+    async def close(self):
+        """flush صف‌های write-behind و outbox و بستن pool غیرهمگام (در shutdown process)"""
+        await self.stop_cache_invalidation()
+        await self.turn_writer.close()
+        await self.session_writer.close()
+        await self.outbox.close()
+        await self.pool.close()
+
+    def cache_stats(self) -> dict:
+        """شمارنده‌های hit/miss کش تنظیمات"""
+        return self.settings_cache.stats()
+
+    def start_cache_invalidation(self):
+        """
+        شروع گوش دادن به LISTEN/NOTIFY برای باطل کردن کش تنظیمات
+        (triggerها در migrations/002_settings_notify.sql)
+        """
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = asyncio.create_task(
+                self._listen_for_settings_changes(), name="settings-cache-listener"
+            )
+        return self._listener_task
+
+    async def stop_cache_invalidation(self):
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+    async def _listen_for_settings_changes(self):
+        backoff = 1.0
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    self.pool.conninfo, autocommit=True
+                ) as conn:
+                    await conn.execute(f"LISTEN {SETTINGS_CHANGED_CHANNEL}")
+                    # تغییرات زمان قطع اتصال را از دست داده‌ایم
+                    self.settings_cache.clear()
+                    logger.info(f"👂 LISTEN {SETTINGS_CHANGED_CHANNEL}")
+                    backoff = 1.0
+                    async for notify in conn.notifies():
+                        self._handle_settings_notify(notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ LISTEN قطع شد ({e})، تلاش مجدد در {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    def _handle_settings_notify(self, payload: str):
+        try:
+            change = json.loads(payload)
+        except ValueError:
+            self.settings_cache.clear()
+            return
+
+        if change.get('table') == 'interview_settings' and change.get('id') is not None:
+            self.settings_cache.invalidate(int(change['id']))
+        elif change.get('company_id') is not None:
+            company_id = change['company_id']
+            self.settings_cache.invalidate_where(
+                lambda _key, value: value.get('company_id') == company_id
+            )
+        else:
+            self.settings_cache.clear()
+        logger.info(f"♻️ کش تنظیمات باطل شد: {change}")
+
+    def pool_stats(self) -> dict:
+        """آمار pool ها: تعداد اتصالات در حال استفاده، در انتظار و تاخیر acquire"""
+        return {'async': self.pool.stats(), 'sync': self.sync_pool.stats()}
+
     def get_connection(self):
-        """ایجاد اتصال جدید به پایگاه داده"""
+        """گرفتن اتصال از pool همگام (context manager)"""
+        return self.sync_pool.connection()
+
+    def execute_query(self, query: str, params: tuple = None, fetch_one: bool = False):
+        """اجرای یک query و بازگشت نتیجه (shim همگام روی pool)"""
         try:
-            conn = psycopg2.connect(**self.connection_params)
-            return conn
+            with self.sync_pool.connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, params)
+
+                    if cursor.description is not None:
+                        if fetch_one:
+                            return cursor.fetchone()
+                        return cursor.fetchall()
+                    return True
+
         except Exception as e:
-            logger.error(f"❌ خطا در اتصال به DB: {e}")
+            logger.error(f"❌ خطا در اجرای query: {e}")
             raise
 
-    def execute_query(self, query: str, params: tuple = None, fetch_one: bool = False):
-        """اجرای یک query و بازگشت نتیجه"""
-        conn = None
+    async def execute_query_async(self, query: str, params: tuple = None, fetch_one: bool = False):
+        """اجرای غیرهمگام یک query روی pool و بازگشت نتیجه"""
         try:
-            conn = self.get_connection()
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute(query, params)
-                
-                if query.strip().upper().startswith('SELECT'):
-                    if fetch_one:
-                        return cursor.fetchone()
-                    return cursor.fetchall()
-                else:
-                    conn.commit()
+            async with self.pool.connection() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(query, params)
+
+                    if cursor.description is not None:
+                        if fetch_one:
+                            return await cursor.fetchone()
+                        return await cursor.fetchall()
                     return True
-                    
+
         except Exception as e:
             logger.error(f"❌ خطا در اجرای query: {e}")
-            if conn:
-                conn.rollback()
             raise
-        finally:
-            if conn:
-                conn.close()
 
     def get_interview_settings(self, settings_id: int = 1) -> dict:
         """
@@ -67,84 +267,81 @@ class DatabaseManager:
             دیکشنری شامل تمام تنظیمات + سوالات
         """
         try:
-            # دریافت تنظیمات اصلی
-            settings_query = """
-                SELECT 
-                    company_id,
-                    interview_field,
-                    include_hr,
-                    include_technical,
-                    voice,
-                    language,
-                    strictness_level,
-                    conversation_flow
-                FROM interview_settings
-                WHERE id = %s
-            """
-            
-            result = self.execute_query(settings_query, (settings_id,), fetch_one=True)
+            with self.sync_pool.connection() as conn:
+                result = conn.execute(
+                    SETTINGS_WITH_QUESTIONS_QUERY, (settings_id,), prepare=True
+                ).fetchone()
             
             if not result:
                 logger.warning(f"⚠️ تنظیماتی با ID={settings_id} پیدا نشد.")
                 return self._get_default_settings()
             
-            company_id = result['company_id']
-            interview_field = result['interview_field']  # 🔥 فیلد مصاحبه
-            
-            # 🔥 دریافت سوالات HR (فقط سوالاتی که ask=True و field مطابق باشد)
-            hr_questions = []
-            if result['include_hr']:
-                hr_query = """
-                    SELECT question_text 
-                    FROM custom_hr_questions 
-                    WHERE company_id = %s 
-                    AND ask = TRUE
-                    AND (field = %s OR field IS NULL OR field = '')
-                    ORDER BY order_index
-                """
-                hr_results = self.execute_query(hr_query, (company_id, interview_field))
-                hr_questions = [row['question_text'] for row in hr_results]
-            
-            # 🔥 دریافت سوالات فنی (فقط سوالاتی که ask=True و field مطابق باشد)
-            tech_questions = []
-            if result['include_technical']:
-                tech_query = """
-                    SELECT question_text 
-                    FROM custom_technical_questions 
-                    WHERE company_id = %s 
-                    AND ask = TRUE
-                    AND (field = %s OR field IS NULL OR field = '')
-                    ORDER BY order_index
-                """
-                tech_results = self.execute_query(tech_query, (company_id, interview_field))
-                tech_questions = [row['question_text'] for row in tech_results]
-            
-            settings = {
-                'company_id': company_id,
-                'company_name': company_id.title(),
-                'interview_field': interview_field,
-                'include_hr': result['include_hr'],
-                'include_technical': result['include_technical'],
-                'voice': result['voice'],
-                'language': result['language'],
-                'strictness_level': result['strictness_level'],
-                'conversation_flow': result['conversation_flow'],
-                'hr_questions': hr_questions,
-                'technical_questions': tech_questions
-            }
-            
-            logger.info(f"✅ تنظیمات بارگذاری شد:")
-            logger.info(f"   Company: {company_id}")
-            logger.info(f"   Field: {interview_field}")
-            logger.info(f"   HR Questions (filtered): {len(hr_questions)}")
-            logger.info(f"   Tech Questions (filtered): {len(tech_questions)}")
-            
-            return settings
+            return self._build_settings(result, result['hr_questions'], result['technical_questions'])
             
         except Exception as e:
             logger.error(f"❌ خطا در دریافت تنظیمات: {e}")
             return self._get_default_settings()
 
+    async def get_interview_settings_async(self, settings_id: int = 1) -> dict:
+        """
+        نسخه غیرهمگام get_interview_settings (یک query، یک رفت‌وبرگشت)
+        
+        نتیجه در کش سراسری process نگه داشته می‌شود؛ درخواست‌های هم‌زمان
+        برای یک settings_id فقط یک query اجرا می‌کنند.
+        """
+        try:
+            settings = await self.settings_cache.get_or_load(
+                settings_id, lambda: self._fetch_interview_settings(settings_id)
+            )
+        except Exception as e:
+            logger.error(f"❌ خطا در دریافت تنظیمات: {e}")
+            return self._get_default_settings()
+        
+        if settings is None:
+            logger.warning(f"⚠️ تنظیماتی با ID={settings_id} پیدا نشد.")
+            return self._get_default_settings()
+        
+        # هر Agent نسخه خودش را می‌گیرد تا کش مشترک دستکاری نشود
+        return copy.deepcopy(settings)
+
+    async def _fetch_interview_settings(self, settings_id: int):
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                SETTINGS_WITH_QUESTIONS_QUERY, (settings_id,), prepare=True
+            )
+            result = await cursor.fetchone()
+        
+        if not result:
+            return None
+        return self._build_settings(result, result['hr_questions'], result['technical_questions'])
+
+    def _build_settings(self, result: dict, hr_questions: list, tech_questions: list) -> dict:
+        """ساخت دیکشنری تنظیمات از ردیف interview_settings و سوالات"""
+        company_id = result['company_id']
+        interview_field = result['interview_field']  # 🔥 فیلد مصاحبه
+        
+        settings = {
+            'company_id': company_id,
+            'company_name': company_id.title(),
+            'interview_field': interview_field,
+            'include_hr': result['include_hr'],
+            'include_technical': result['include_technical'],
+            'voice': result['voice'],
+            'language': result['language'],
+            'strictness_level': result['strictness_level'],
+            'conversation_flow': result['conversation_flow'],
+            'hr_questions': hr_questions,
+            'technical_questions': tech_questions
+        }
+        
+        logger.info(f"✅ تنظیمات بارگذاری شد:")
+        logger.info(f"   Company: {company_id}")
+        logger.info(f"   Field: {interview_field}")
+        logger.info(f"   HR Questions (filtered): {len(hr_questions)}")
+        logger.info(f"   Tech Questions (filtered): {len(tech_questions)}")
+        
+        return settings
+
 
     def _get_default_settings(self) -> dict:
         """تنظیمات پیش‌فرض در صورت خطا"""
@@ -168,46 +365,62 @@ class DatabaseManager:
             ]
         }
 
-    def save_interview_session(
+    def record_turn(self, session_id: str, turn_index: int, speaker: str, stage: str, text: str) -> bool:
+        """
+        افزودن یک نوبت گفتگو (کاندیدا یا عامل) به صف interview_turns
+        
+        غیرمسدودکننده است تا از event handlerهای همگام هم قابل فراخوانی باشد؛
+        اگر صف پر باشد نوبت رها و در آمار dropped شمرده می‌شود.
+        """
+        return self.turn_writer.put_nowait(
+            (session_id, turn_index, speaker, stage, text, datetime.now())
+        )
+
+    async def _spill_turns(self, rows: list):
+        """نوبت‌هایی که به DB نرسیدند به outbox منتقل می‌شوند تا از دست نروند"""
+        await self.outbox.put_many('turn', [(f"{row[0]}:{row[1]}", row) for row in rows])
+
+    async def enqueue_interview_session(
         self, 
         session_id: str,
         settings_id: int,
         candidate_name: str,
         transcript: str,
         evaluation: dict,
-        metadata: dict
+        metadata: dict,
+        room_name: str = None
     ):
         """
-        ذخیره نشست مصاحبه در DB
+        ثبت نشست در outbox محلی (بدون انتظار برای DB)
         
-        Args:
-            session_id: شناسه یکتای جلسه
-            settings_id: ID تنظیمات استفاده شده
-            candidate_name: نام کاندیدا
-            transcript: متن کامل مکالمه (JSON string)
-            evaluation: نتیجه ارزیابی (dict)
-            metadata: اطلاعات اضافی (dict)
+        فقط یک insert محلی در SQLite است؛ drainer پس‌زمینه آن را به‌صورت
+        دسته‌ای و با retry به interview_sessions منتقل می‌کند و تکرار
+        session_id نادیده گرفته می‌شود. در صورت قطعی DB داده از دست نمی‌رود.
+        transcript می‌تواند None باشد وقتی نوبت‌ها در interview_turns ذخیره شده‌اند.
+        session_id باید برای هر نشست یکتا باشد (نه فقط نام اتاق، که تکرار می‌شود).
         """
-        try:
-            query = """
-                INSERT INTO interview_sessions 
-                (session_id, settings_id, candidate_name, transcript, evaluation, metadata, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """
-            
-            params = (
-                session_id,
-                settings_id,
-                candidate_name,
-                transcript,  # JSON string
-                json.dumps(evaluation, ensure_ascii=False),
-                json.dumps(metadata, ensure_ascii=False),
-                datetime.now()
-            )
-            
-            self.execute_query(query, params)
-            logger.info(f"✅ Session {session_id} ذخیره شد در DB")
-            
-        except Exception as e:
-            logger.error(f"❌ خطا در ذخیره session: {e}")
-            # این خطا را raise نکن تا Agent crash نکند
+        await self.outbox.put('session', session_id, self._session_params(
+            session_id, settings_id, candidate_name, transcript, evaluation, metadata, room_name
+        ))
+        logger.info(f"📥 Session {session_id} در outbox ثبت شد")
+
+    def _session_params(
+        self,
+        session_id: str,
+        settings_id: int,
+        candidate_name: str,
+        transcript: str,
+        evaluation: dict,
+        metadata: dict,
+        room_name: str = None
+    ) -> tuple:
+        return (
+            session_id,
+            settings_id,
+            candidate_name,
+            transcript,  # JSON string یا None (نوبت‌ها در interview_turns)
+            json.dumps(evaluation, ensure_ascii=False),
+            json.dumps(metadata, ensure_ascii=False),
+            datetime.now(),
+            room_name
+        )
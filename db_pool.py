@@ -0,0 +1,227 @@
+"""
+Database Connection Pool
+========================
+Pooled PostgreSQL access for DatabaseManager and the interview agents.
+
+- AsyncDatabasePool: asyncio-native pool (psycopg 3) used by the agents
+- SyncDatabasePool: thread-safe pool kept as a shim for synchronous callers
+
+Both pools share the same connection settings, size limits, health checks
+and acquire timeout, and expose the same stats() dictionary.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+logger = logging.getLogger("db-pool")
+logger.setLevel(logging.INFO)
+
+
+def build_conninfo() -> str:
+    """Build a libpq connection string from the DB_* environment variables."""
+    params = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'port': os.getenv('DB_PORT', '5432'),
+        'dbname': os.getenv('DB_NAME', 'interview_db'),
+        'user': os.getenv('DB_USER', 'postgres'),
+        'password': os.getenv('DB_PASSWORD', ''),
+    }
+    return " ".join(f"{k}={v}" for k, v in params.items() if v != '')
+
+
+def pool_settings() -> dict:
+    """Pool sizing and timeouts, overridable through the environment."""
+    return {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+        'timeout': float(os.getenv('DB_POOL_ACQUIRE_TIMEOUT', '5')),
+        'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+    }
+
+
+class _AcquireStats:
+    """Acquire latency and in-use bookkeeping shared by both pool flavours."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.waiting = 0
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def begin(self) -> float:
+        with self._lock:
+            self.waiting += 1
+        return time.perf_counter()
+
+    def acquired_after(self, started: float):
+        waited = time.perf_counter() - started
+        with self._lock:
+            self.waiting -= 1
+            self.in_use += 1
+            self.acquired += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def failed(self):
+        with self._lock:
+            self.waiting -= 1
+
+    def released(self):
+        with self._lock:
+            self.in_use -= 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            avg = self.total_wait / self.acquired if self.acquired else 0.0
+            return {
+                'in_use': self.in_use,
+                'waiting': self.waiting,
+                'acquired_total': self.acquired,
+                'acquire_avg_ms': round(avg * 1000, 2),
+                'acquire_max_ms': round(self.max_wait * 1000, 2),
+            }
+
+
+class AsyncDatabasePool:
+    """Asyncio-native connection pool with health checks and pool stats."""
+
+    def __init__(self, conninfo: Optional[str] = None, **settings):
+        self.conninfo = conninfo or build_conninfo()
+        self.settings = {**pool_settings(), **settings}
+        self._pool: Optional[AsyncConnectionPool] = None
+        self._open_lock: Optional[asyncio.Lock] = None
+        self._stats = _AcquireStats()
+
+    @property
+    def is_open(self) -> bool:
+        return self._pool is not None and not self._pool.closed
+
+    async def open(self):
+        """Open the pool and wait until min_size connections are ready."""
+        if self._open_lock is None:
+            self._open_lock = asyncio.Lock()
+        async with self._open_lock:
+            if self.is_open:
+                return
+            await self._open()
+
+    async def _open(self):
+        self._pool = AsyncConnectionPool(
+            self.conninfo,
+            min_size=self.settings['min_size'],
+            max_size=self.settings['max_size'],
+            timeout=self.settings['timeout'],
+            max_idle=self.settings['max_idle'],
+            kwargs={'row_factory': dict_row},
+            check=AsyncConnectionPool.check_connection,
+            open=False,
+            name="interview-db",
+        )
+        await self._pool.open(wait=True, timeout=self.settings['timeout'])
+        logger.info(
+            f"✅ Async DB pool opened (min={self.settings['min_size']}, max={self.settings['max_size']})"
+        )
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            logger.info(f"🔌 Async DB pool closed. Stats: {self.stats()}")
+            self._pool = None
+
+    @asynccontextmanager
+    async def connection(self):
+        """Borrow a connection; commits on success and rolls back on error."""
+        if not self.is_open:
+            await self.open()
+        started = self._stats.begin()
+        acquired = False
+        try:
+            async with self._pool.connection(timeout=self.settings['timeout']) as conn:
+                self._stats.acquired_after(started)
+                acquired = True
+                yield conn
+        finally:
+            if acquired:
+                self._stats.released()
+            else:
+                self._stats.failed()
+
+    def stats(self) -> dict:
+        """in-use / waiting / acquire latency plus the driver's own counters."""
+        stats = self._stats.as_dict()
+        if self._pool is not None:
+            driver = self._pool.get_stats()
+            stats['pool_size'] = driver.get('pool_size', 0)
+            stats['pool_available'] = driver.get('pool_available', 0)
+            stats['requests_errors'] = driver.get('requests_errors', 0)
+            stats['connections_lost'] = driver.get('connections_lost', 0)
+        return stats
+
+
+class SyncDatabasePool:
+    """Blocking counterpart of AsyncDatabasePool for existing sync callers."""
+
+    def __init__(self, conninfo: Optional[str] = None, **settings):
+        self.conninfo = conninfo or build_conninfo()
+        self.settings = {**pool_settings(), **settings}
+        self._pool: Optional[ConnectionPool] = None
+        self._open_lock = threading.Lock()
+        self._stats = _AcquireStats()
+
+    def open(self):
+        with self._open_lock:
+            if self._pool is not None:
+                return
+            self._pool = ConnectionPool(
+                self.conninfo,
+                min_size=self.settings['min_size'],
+                max_size=self.settings['max_size'],
+                timeout=self.settings['timeout'],
+                max_idle=self.settings['max_idle'],
+                kwargs={'row_factory': dict_row},
+                check=ConnectionPool.check_connection,
+                open=True,
+                name="interview-db-sync",
+            )
+            logger.info("✅ Sync DB pool opened")
+
+    def close(self):
+        with self._open_lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+
+    @contextmanager
+    def connection(self):
+        if self._pool is None:
+            self.open()
+        started = self._stats.begin()
+        acquired = False
+        try:
+            with self._pool.connection(timeout=self.settings['timeout']) as conn:
+                self._stats.acquired_after(started)
+                acquired = True
+                yield conn
+        finally:
+            if acquired:
+                self._stats.released()
+            else:
+                self._stats.failed()
+
+    def stats(self) -> dict:
+        stats = self._stats.as_dict()
+        if self._pool is not None:
+            driver = self._pool.get_stats()
+            stats['pool_size'] = driver.get('pool_size', 0)
+            stats['pool_available'] = driver.get('pool_available', 0)
+        return stats
@@ -0,0 +1,21 @@
+#!/usr/bin/env bash
+# Runs the LiveKit agent worker and the post-call worker side by side.
+# They share the SQLite post-call queue (POSTCALL_QUEUE_PATH), so they must
+# share a filesystem; if either one exits, the other is stopped too and the
+# container exits, so the orchestrator restarts both.
+
+uv run postcall_worker.py &
+postcall=$!
+uv run multi_agent_worker.py "${@:-start}" &
+agent=$!
+
+stop() {
+    kill -TERM "$agent" "$postcall" 2>/dev/null
+}
+trap stop TERM INT
+
+wait -n "$agent" "$postcall"
+status=$?
+stop
+wait
+exit "$status"
@@ -0,0 +1,333 @@
+"""
+Hedged TTS
+==========
+Composite TTS over several Persian-capable providers (Avasho, openai.TTS).
+
+Each provider's time-to-first-audio is tracked over a rolling window, and
+every request goes to the provider with the lowest current p50. If that
+provider has not produced audio within the hedge delay (its own p95,
+clamped), the same text is sent to the next provider as well, and whichever
+produces audio first is played; the other request is cancelled.
+
+Providers speak in different voices, so the winner is pinned: requests
+that start within pin_for seconds of the last decided one (the following
+sentences of the same reply) go to the same provider without hedging.
+Another provider is used only if the pinned one fails.
+
+A provider that fails several times in a row is taken out of rotation for
+a cooldown (circuit breaker); after it the provider is tried again and one
+more failure reopens the circuit. If every circuit is open the providers
+are tried anyway rather than staying silent.
+
+benchmarks/bench_hedged_tts.py drives this with fake providers of
+injectable latency to compare the tail with and without hedging.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, List, Mapping, Optional
+
+from livekit import rtc
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    APIConnectionError,
+    APIConnectOptions,
+    tts,
+    utils,
+)
+
+logger = logging.getLogger("hedged-tts")
+logger.setLevel(logging.INFO)
+
+_END = object()
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ProviderHealth:
+    """Rolling first-audio latency and circuit breaker for one provider."""
+
+    def __init__(self, name: str, window: int = 50, failure_threshold: int = 3, cooldown: float = 30.0):
+        self.name = name
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+        self.requests = 0
+        self.wins = 0
+        self.failures = 0
+        self.lost_races = 0  # cancelled before any audio (censored, not sampled)
+
+    @property
+    def p50(self) -> Optional[float]:
+        return _percentile(list(self.samples), 0.5) if self.samples else None
+
+    @property
+    def p95(self) -> Optional[float]:
+        return _percentile(list(self.samples), 0.95) if self.samples else None
+
+    @property
+    def available(self) -> bool:
+        # after the cooldown the circuit is half-open: the next request is the trial
+        return time.monotonic() >= self.open_until
+
+    def record_success(self, ttfb: float):
+        self.samples.append(ttfb)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+    def record_slow(self):
+        # cancelled before its first audio: only a lower bound on its latency, so it is
+        # counted apart instead of pulling the p50 towards the winner's latency
+        self.lost_races += 1
+
+    def record_failure(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.failure_threshold:
+            self.open_until = time.monotonic() + self.cooldown
+            logger.warning(f"⚡ TTS provider {self.name} failed {self.consecutive_failures}x, "
+                           f"circuit open for {self.cooldown:.0f}s")
+
+    def stats(self) -> dict:
+        return {
+            'requests': self.requests,
+            'wins': self.wins,
+            'failures': self.failures,
+            'lost_races': self.lost_races,
+            'p50_ms': round(self.p50 * 1000) if self.samples else None,
+            'p95_ms': round(self.p95 * 1000) if self.samples else None,
+            'circuit': 'closed' if self.available else 'open',
+        }
+
+
+class HedgedTTS(tts.TTS):
+    """Routes each request to the fastest healthy provider, hedging slow ones."""
+
+    def __init__(
+        self,
+        providers: Mapping[str, tts.TTS],
+        *,
+        hedge_after: Optional[float] = None,
+        min_hedge: float = 0.25,
+        max_hedge: float = 1.5,
+        default_hedge: float = 0.8,
+        min_samples: int = 5,
+        window: int = 50,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        pin_for: float = 2.0,
+    ):
+        if not providers:
+            raise ValueError("at least one TTS provider is required")
+        first = next(iter(providers.values()))
+        for name, provider in providers.items():
+            if (provider.sample_rate, provider.num_channels) != (first.sample_rate, first.num_channels):
+                raise ValueError(f"TTS provider {name} has a different audio format")
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=first.sample_rate,
+            num_channels=first.num_channels,
+        )
+        self.providers: Dict[str, tts.TTS] = dict(providers)
+        self.health: Dict[str, ProviderHealth] = {
+            name: ProviderHealth(name, window, failure_threshold, cooldown) for name in providers
+        }
+        self.hedge_after = hedge_after
+        self.min_hedge = min_hedge
+        self.max_hedge = max_hedge
+        self.default_hedge = default_hedge
+        self.min_samples = min_samples
+        self.pin_for = pin_for
+        self._pinned: Optional[str] = None
+        self._pinned_until = 0.0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.pinned_requests = 0
+
+    def ranked(self) -> List[str]:
+        """
+        Providers in the order to try them: healthy ones by p50 (untried
+        first, so each gets measured), then open circuits by reopen time.
+        """
+        order = {name: i for i, name in enumerate(self.providers)}
+        healthy = [n for n in self.providers if self.health[n].available]
+        broken = [n for n in self.providers if not self.health[n].available]
+        healthy.sort(key=lambda n: (self.health[n].p50 or 0.0, order[n]))
+        broken.sort(key=lambda n: self.health[n].open_until)
+        return healthy + broken
+
+    def pinned(self) -> Optional[str]:
+        """The provider the current reply is pinned to, if any."""
+        if self._pinned is None or time.monotonic() >= self._pinned_until:
+            return None
+        return self._pinned if self.health[self._pinned].available else None
+
+    def pin(self, name: str):
+        self._pinned = name
+        self._pinned_until = time.monotonic() + self.pin_for
+
+    def hedge_delay(self, name: str) -> float:
+        if self.hedge_after is not None:
+            return self.hedge_after
+        health = self.health[name]
+        if len(health.samples) < self.min_samples:
+            return self.default_hedge
+        return min(self.max_hedge, max(self.min_hedge, health.p95))
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> tts.ChunkedStream:
+        return _HedgedChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def prewarm(self) -> None:
+        for provider in self.providers.values():
+            provider.prewarm()
+
+    async def aclose(self) -> None:
+        for provider in self.providers.values():
+            await provider.aclose()
+
+    def stats(self) -> dict:
+        return {
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'pinned_requests': self.pinned_requests,
+            'providers': {name: h.stats() for name, h in self.health.items()},
+        }
+
+
+class _Attempt:
+    """One provider's request: frames are queued, ready resolves on first audio."""
+
+    def __init__(self, owner: HedgedTTS, name: str, text: str, conn_options: APIConnectOptions):
+        self.name = name
+        self.health = owner.health[name]
+        self.health.requests += 1
+        self.started = time.monotonic()
+        self.ready: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.error: Optional[BaseException] = None
+        self.hedge = False
+        self._frames: asyncio.Queue = asyncio.Queue()
+        self._task = asyncio.create_task(
+            self._run(owner.providers[name], text, conn_options), name=f"hedged-tts-{name}"
+        )
+
+    async def _run(self, provider: tts.TTS, text: str, conn_options: APIConnectOptions):
+        try:
+            async with provider.synthesize(text, conn_options=conn_options) as stream:
+                async for audio in stream:
+                    if not self.ready.done():
+                        self.health.record_success(time.monotonic() - self.started)
+                        self.ready.set_result(True)
+                    self._frames.put_nowait(audio.frame)
+            if not self.ready.done():
+                self.health.record_success(time.monotonic() - self.started)
+                self.ready.set_result(True)
+        except asyncio.CancelledError:
+            if not self.ready.done():
+                self.health.record_slow()
+            raise
+        except Exception as e:
+            self.error = e
+            self.health.record_failure()
+            logger.warning(f"⚠️ TTS provider {self.name} failed: {e}")
+            if not self.ready.done():
+                self.ready.set_result(False)
+        finally:
+            self._frames.put_nowait(_END)
+
+    async def frames(self):
+        while True:
+            frame = await self._frames.get()
+            if frame is _END:
+                if self.error is not None:
+                    raise APIConnectionError(f"TTS provider {self.name} failed mid-utterance") from self.error
+                return
+            yield frame
+
+    async def cancel(self):
+        await utils.aio.cancel_and_wait(self._task)
+
+
+class _HedgedChunkedStream(tts.ChunkedStream):
+    def __init__(self, *, tts: HedgedTTS, input_text: str, conn_options: APIConnectOptions):
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._hedged = tts
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        owner = self._hedged
+        # failures are handled by moving to the next provider, not by inner retries
+        inner_options = APIConnectOptions(max_retry=0, timeout=self._conn_options.timeout)
+        queue = owner.ranked()
+        pinned = owner.pinned()
+        if pinned is not None:
+            # same reply as the previous request: keep its voice, fall back only on failure
+            owner.pinned_requests += 1
+            queue.remove(pinned)
+            queue.insert(0, pinned)
+        active: List[_Attempt] = []
+        failed: List[str] = []
+        winner: Optional[_Attempt] = None
+
+        def launch(hedge: bool = False):
+            attempt = _Attempt(owner, queue.pop(0), self.input_text, inner_options)
+            attempt.hedge = hedge
+            active.append(attempt)
+
+        try:
+            launch()
+            while winner is None:
+                if not active:
+                    if not queue:
+                        raise APIConnectionError(f"all TTS providers failed: {', '.join(failed)}")
+                    launch()
+                timeout = owner.hedge_delay(active[0].name) if queue and pinned is None else None
+                done, _ = await asyncio.wait(
+                    [a.ready for a in active], timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # primary is late: hedge to the next provider, keep both running
+                    owner.hedges += 1
+                    logger.info(f"🪁 {active[0].name} has no audio after {timeout * 1000:.0f} ms, "
+                                f"hedging to {queue[0]}")
+                    launch(hedge=True)
+                    continue
+                for attempt in list(active):
+                    if not attempt.ready.done():
+                        continue
+                    if attempt.ready.result():
+                        winner = winner or attempt
+                    else:
+                        active.remove(attempt)
+                        failed.append(attempt.name)
+
+            for attempt in active:
+                if attempt is not winner:
+                    await attempt.cancel()
+            active = [winner]
+            owner.pin(winner.name)
+            winner.health.wins += 1
+            if winner.hedge:
+                owner.hedge_wins += 1
+
+            output_emitter.initialize(
+                request_id=utils.shortuuid(),
+                sample_rate=owner.sample_rate,
+                num_channels=owner.num_channels,
+                mime_type="audio/pcm",
+            )
+            frame: rtc.AudioFrame
+            async for frame in winner.frames():
+                output_emitter.push(frame.data.tobytes())
+            output_emitter.flush()
+        finally:
+            for attempt in active:
+                await attempt.cancel()
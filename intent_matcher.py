@@ -0,0 +1,155 @@
+"""
+Intent Matcher
+==============
+Normalized, precompiled intent detection for candidate utterances.
+
+Every utterance is normalized once (Arabic ye/kaf, diacritics, tatweel,
+ZWNJ and split "می"/"نمی" prefixes, Persian/Arabic digits, "؟") and then
+scanned by a single combined regex that holds the patterns of every
+intent. The pass returns all intents found in the utterance, so an agent can
+check off-topic, skip, insufficient and manipulation with one call instead
+of looping over pattern lists on every turn.
+
+Patterns are written against normalized text: no ZWNJ, "می" joined to the
+verb ("میدونم", "نمیتونم"), Persian ye/kaf, lower-case Latin.
+"""
+
+import re
+from typing import Dict, FrozenSet, Iterable, List, Sequence, Tuple
+
+# ---------------- normalization ----------------
+_CHAR_MAP = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ئ': 'ی', 'ك': 'ک', 'ة': 'ه', 'ۀ': 'ه', 'أ': 'ا', 'إ': 'ا', 'ٱ': 'ا',
+    '؟': '?', '،': ',', '؛': ';',
+    '\u200c': '',  # ZWNJ
+    '\u200f': '',  # RLM
+    '\u200e': '',  # LRM
+    '\u0640': '',  # tatweel
+    **{chr(c): '' for c in range(0x064B, 0x0653)},  # fathatan .. maddah
+    '\u0670': '',  # superscript alef
+    **{chr(0x06F0 + d): str(d) for d in range(10)},  # Persian digits
+    **{chr(0x0660 + d): str(d) for d in range(10)},  # Arabic digits
+})
+# str.translate looks up every character; most utterances only need the
+# ZWNJ removed, so the full map runs only when one of its other keys is there
+_NEEDS_MAP_RE = re.compile("[" + re.escape("".join(k for k in map(chr, _CHAR_MAP) if k != "\u200c")) + "]")
+_PREFIX_SPACE_RE = re.compile(r"\b(ن?می) (?=\w)")
+
+
+def normalize(text: str) -> str:
+    """Canonical form of a Persian/English utterance for matching."""
+    text = text.replace("\u200c", "")
+    if _NEEDS_MAP_RE.search(text):
+        text = text.translate(_CHAR_MAP)
+    text = " ".join(text.lower().split())
+    if "می " in text:
+        text = _PREFIX_SPACE_RE.sub(r"\1", text)
+    return text
+
+
+def literal(*words: str) -> List[str]:
+    """Patterns matching these words/phrases literally (after normalization)."""
+    return [re.escape(normalize(w)) for w in words]
+
+
+def word(*words: str) -> List[str]:
+    """Patterns matching these as whole words ("رد" but not "کردم")."""
+    out = []
+    for w in words:
+        w = re.escape(normalize(w))
+        # literal first so the scan can use its fast prefix search
+        out.append(f"{w}(?<!\\w{w})(?!\\w)")
+    return out
+
+
+def whole(*words: str) -> List[str]:
+    """Patterns matching only when the whole utterance is one of these."""
+    out = []
+    for w in words:
+        w = re.escape(normalize(w))
+        out.append(f"{w}(?<=^{w})$")
+    return out
+
+
+# ---------------- interview intents ----------------
+INTERVIEW_INTENTS: Dict[str, Sequence[str]] = {
+    # questions back to the interviewer instead of an answer
+    'off_topic': [
+        r"چطور.*میتون", r"چجوری", r"آیا.*میدون", r"میشه.*بگ", r"میشه.*کمک",
+        r"لطفا.*توضیح.*بد", r"سوال.*دار", r"میخواستم.*بپرس", r"یه.*سوال",
+        r"یک.*سوال", r"راستی", r"ببخشید.*چطور", r"میتونی.*بگی",
+    ],
+    # asks to move on; short words are bounded so "کردم" is not "رد"
+    'skip': word("رد", "بعدی", "پاس", "skip") + [r"نمیدون", r"نمیدان"],
+    # answers that carry no content
+    'insufficient': [r"نمیدون", r"نمیدان"] + whole("خیر", "نه", "رد"),
+}
+
+
+class IntentMatcher:
+    """
+    All intents of an utterance in one pass over the text.
+
+    Patterns should start with a literal (see word()/whole()): the union of
+    all patterns is then searched with the regex engine's fast prefix scan,
+    and only at the few positions where something starts is a second regex
+    run to report every intent matching there.
+    """
+
+    def __init__(self, intents: Dict[str, Iterable[str]]):
+        self._group_intents: Dict[str, str] = {}
+        branches = []
+        for i, (intent, patterns) in enumerate(intents.items()):
+            patterns = list(patterns)
+            if patterns:
+                self._group_intents[f"i{i}"] = intent
+                branches.append((f"i{i}", "|".join(patterns)))
+
+        self.intents = frozenset(self._group_intents.values())
+        if not branches:
+            self._scan = self._probe = None
+            return
+        self._scan = re.compile("|".join(f"(?:{alt})" for _, alt in branches))
+        # one optional lookahead per intent, so overlapping intents that start
+        # at the same position are all reported
+        self._probe = re.compile("".join(f"(?:(?=(?P<{group}>{alt})))?" for group, alt in branches))
+
+    def match(self, text: str) -> FrozenSet[str]:
+        return self.match_normalized(normalize(text))
+
+    def match_normalized(self, text: str) -> FrozenSet[str]:
+        if self._scan is None:
+            return frozenset()
+        found = set()
+        pos = 0
+        while True:
+            m = self._scan.search(text, pos)
+            if m is None:
+                break
+            probe = self._probe.match(text, m.start())
+            found.update(
+                intent for group, intent in self._group_intents.items()
+                if probe.group(group) is not None
+            )
+            if len(found) == len(self.intents):
+                break
+            pos = m.start() + 1
+        return frozenset(found)
+
+    def analyze(self, text: str) -> Tuple[str, FrozenSet[str]]:
+        """(normalized text, intents) — for callers that also count words."""
+        normalized = normalize(text)
+        return normalized, self.match_normalized(normalized)
+
+
+INTERVIEW_MATCHER = IntentMatcher(INTERVIEW_INTENTS)
+
+
+def match_intents(text: str) -> FrozenSet[str]:
+    """Interview intents (off_topic, skip, insufficient) found in text."""
+    return INTERVIEW_MATCHER.match(text)
+
+
+def content_word_count(normalized: str) -> int:
+    """Words longer than one character, as used by the answer-length checks."""
+    return sum(1 for w in normalized.split() if len(w) > 1)
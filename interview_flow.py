@@ -0,0 +1,308 @@
+"""
+Interview Flow Engine
+=====================
+Table-driven interview flow compiled from interview settings.
+
+interview_settings.conversation_flow (e.g.
+"greeting,company_introduction,hr_interview,technical_interview,closing")
+is compiled once per settings version into a transition table of FlowSteps:
+prompts, retry prompts, min-word thresholds, retry limits and skip rules.
+Compiled flows are cached across sessions, and each candidate turn is a
+dict lookup on the current state plus one handler call. The agent just
+speaks the utterances that come back.
+
+Used by agent4.py (settings from PostgreSQL) and agent3_test.py (settings
+built in code); any agent with a settings dict in the same shape can use it.
+"""
+
+import logging
+from functools import lru_cache
+from typing import AbstractSet, Dict, List, Optional, Tuple
+
+from intent_matcher import INTERVIEW_MATCHER, content_word_count, normalize
+
+logger = logging.getLogger("interview-flow")
+logger.setLevel(logging.INFO)
+
+# ---------------- section texts ----------------
+GREETING_TEMPLATE = (
+    "سلام و درود. به مصاحبه شرکت {company_name} خوش آمدید. "
+    "من مصاحبه‌گر این جلسه هستم. "
+    "لطفاً نام و نام‌خانوادگی کامل خود را بفرمایید."
+)
+
+PROFILE_STEPS = (
+    # (state, candidate field, prompt spoken when entering the step, min words, retry prompt)
+    ("ASK_AGE", "age", "متشکرم. سن شما چند سال است؟", 0, None),
+    ("ASK_LOCATION", "location", "سپاس. محل سکونت فعلی شما کجاست؟", 0, None),
+    ("ASK_EDUCATION", "education",
+     "بسیار خوب. لطفاً آخرین مدرک تحصیلی و رشته تحصیلی خود را بیان کنید.", 0, None),
+    ("ASK_EXPERIENCE", "experience",
+     "ممنون. لطفاً خلاصه‌ای از سوابق کاری و پروژه‌های مهم خود ارائه دهید.", 8,
+     "لطفاً کمی بیشتر توضیح دهید. مثلاً چه پروژه‌هایی انجام داده‌اید؟"),
+)
+
+HR_INTRO = "بسیار خوب. حالا وارد بخش سوالات منابع انسانی می‌شویم."
+TECH_INTRO = "بسیار خوب. اکنون وارد بخش سوالات فنی می‌شویم."
+CLOSING = (
+    "مصاحبه به پایان رسید. از وقتی که گذاشتید متشکرم. "
+    "نتیجه را در اسرع وقت به اطلاع شما خواهیم رساند. "
+    "می‌توانید تماس را قطع کنید."
+)
+
+# strictness_level -> (extra min words, max retries)
+STRICTNESS = {
+    'low': (-2, 1),
+    'medium': (0, 1),
+    'high': (4, 2),
+}
+
+KNOWN_SECTIONS = {
+    'greeting', 'company_introduction', 'candidate_profile',
+    'hr_interview', 'technical_interview', 'closing',
+}
+
+
+class FlowStep:
+    """One state of the interview: a single field or a bank of questions."""
+
+    __slots__ = (
+        'state', 'kind', 'field', 'prompt', 'questions', 'intro', 'retry_prompt',
+        'min_words', 'max_retries', 'skippable', 'ack', 'skip_ack', 'check_off_topic',
+    )
+
+    def __init__(self, state: str, kind: str, field: Optional[str] = None, prompt: str = "",
+                 questions: Tuple[str, ...] = (), intro: Optional[str] = None,
+                 retry_prompt: Optional[str] = None, min_words: int = 0, max_retries: int = 0,
+                 skippable: bool = False, ack: Optional[str] = None, skip_ack: Optional[str] = None,
+                 check_off_topic: bool = True):
+        self.state = state
+        self.kind = kind
+        self.field = field
+        self.prompt = prompt
+        self.questions = questions
+        self.intro = intro
+        self.retry_prompt = retry_prompt
+        self.min_words = min_words
+        self.max_retries = max_retries
+        self.skippable = skippable
+        self.ack = ack
+        self.skip_ack = skip_ack
+        self.check_off_topic = check_off_topic
+
+
+class CompiledFlow:
+    """Immutable transition table shared by every session with the same settings."""
+
+    def __init__(self, greeting: str, steps: List[FlowStep]):
+        self.greeting = greeting
+        self.steps: Dict[str, FlowStep] = {step.state: step for step in steps}
+        self.next_state: Dict[str, str] = {
+            a.state: b.state for a, b in zip(steps, steps[1:])
+        }
+        self.first_state = steps[0].state
+
+    @staticmethod
+    def is_answer_sufficient(normalized: str, intents: AbstractSet[str], min_words: int) -> bool:
+        if content_word_count(normalized) < min_words:
+            return False
+        return 'insufficient' not in intents
+
+    def start(self) -> "FlowRun":
+        return FlowRun(self)
+
+    def spoken_texts(self) -> List[str]:
+        """Every fixed line this flow can say, in order and without duplicates."""
+        texts = [self.greeting]
+        for step in self.steps.values():
+            texts += [step.prompt, step.intro, *step.questions, step.retry_prompt, step.ack, step.skip_ack]
+        return [t for t in dict.fromkeys(texts) if t]
+
+
+class FlowRun:
+    """Per-session cursor over a CompiledFlow."""
+
+    def __init__(self, flow: CompiledFlow):
+        self.flow = flow
+        self.state = flow.first_state
+        self.question_index = 0
+        self.retry_count = 0
+        self.answers: Dict[str, object] = {}
+        # (question or field, answer) recorded by the last handle() call, if any
+        self.last_answer: Optional[Tuple[str, str]] = None
+
+    @property
+    def step(self) -> FlowStep:
+        return self.flow.steps[self.state]
+
+    @property
+    def finished(self) -> bool:
+        return self.step.kind == 'end'
+
+    def current_question(self) -> Optional[str]:
+        step = self.step
+        if step.kind == 'questions' and self.question_index < len(step.questions):
+            return step.questions[self.question_index]
+        return None
+
+    def likely_next(self) -> List[str]:
+        """
+        What the agent may say after the next answer, most likely first:
+        the next question or stage entry, the acknowledgements, the retry prompt.
+        """
+        step = self.step
+        if step.kind == 'end':
+            return []
+        texts = []
+        if step.kind == 'questions':
+            texts.append(step.ack)
+            if self.question_index + 1 < len(step.questions):
+                texts.append(step.questions[self.question_index + 1])
+            else:
+                texts += self._entry(self.flow.steps[self.flow.next_state[self.state]])
+            if step.skippable:
+                texts.append(step.skip_ack)
+        else:
+            texts += self._entry(self.flow.steps[self.flow.next_state[self.state]])
+        if step.retry_prompt and self.retry_count < step.max_retries:
+            texts.append(step.retry_prompt)
+        return [t for t in texts if t]
+
+    @staticmethod
+    def _entry(step: FlowStep) -> List[str]:
+        if step.kind == 'questions':
+            return [step.intro, step.questions[0]]
+        return [step.prompt]
+
+    def handle(self, text: str, intents: Optional[AbstractSet[str]] = None) -> List[Tuple[str, bool]]:
+        """
+        Apply one candidate answer. Returns the utterances to speak, as
+        (text, allow_interruptions) pairs, and advances the state.
+
+        intents may be passed in when the caller already matched the text
+        (see intent_matcher), so each utterance is scanned only once.
+        """
+        self.last_answer = None
+        normalized = normalize(text)
+        if intents is None:
+            intents = INTERVIEW_MATCHER.match_normalized(normalized)
+        step = self.step
+        if step.kind == 'field':
+            return self._handle_field(step, text, normalized, intents)
+        if step.kind == 'questions':
+            return self._handle_question(step, text, normalized, intents)
+        return []
+
+    # ---------------- handlers ----------------
+    def _handle_field(self, step: FlowStep, text: str, normalized: str,
+                      intents: AbstractSet[str]) -> List[Tuple[str, bool]]:
+        if step.min_words and not self.flow.is_answer_sufficient(normalized, intents, step.min_words):
+            if self.retry_count < step.max_retries:
+                self.retry_count += 1
+                return [(step.retry_prompt, True)]
+        self.answers[step.field] = text
+        self.last_answer = (step.field, text)
+        return self._advance()
+
+    def _handle_question(self, step: FlowStep, text: str, normalized: str,
+                         intents: AbstractSet[str]) -> List[Tuple[str, bool]]:
+        out = []
+        if step.skippable and 'skip' in intents:
+            out.append((step.skip_ack, False))
+        else:
+            if not self.flow.is_answer_sufficient(normalized, intents, step.min_words):
+                if self.retry_count < step.max_retries:
+                    self.retry_count += 1
+                    return [(step.retry_prompt, True)]
+            self.answers.setdefault(step.field, []).append(text)
+            self.last_answer = (step.questions[self.question_index], text)
+            out.append((step.ack, False))
+
+        self.retry_count = 0
+        self.question_index += 1
+        if self.question_index < len(step.questions):
+            out.append((step.questions[self.question_index], True))
+            return out
+        return out + self._advance()
+
+    def _advance(self) -> List[Tuple[str, bool]]:
+        self.retry_count = 0
+        self.question_index = 0
+        self.state = self.flow.next_state[self.state]
+        step = self.step
+        if step.kind == 'field':
+            return [(step.prompt, True)]
+        if step.kind == 'questions':
+            return [(step.intro, False), (step.questions[0], True)]
+        return [(step.prompt, False)]
+
+
+def _settings_key(settings: dict) -> tuple:
+    return (
+        settings.get('conversation_flow') or '',
+        settings.get('company_name', 'OnTime'),
+        bool(settings.get('include_hr', True)),
+        bool(settings.get('include_technical', True)),
+        settings.get('strictness_level') or 'medium',
+        tuple(settings.get('hr_questions') or ()),
+        tuple(settings.get('technical_questions') or ()),
+    )
+
+
+def compile_flow(settings: dict) -> CompiledFlow:
+    """Compiled flow for these settings; reused while the settings don't change."""
+    return _compile(_settings_key(settings))
+
+
+@lru_cache(maxsize=64)
+def _compile(key: tuple) -> CompiledFlow:
+    flow_spec, company_name, include_hr, include_tech, strictness, hr_questions, tech_questions = key
+    extra_words, max_retries = STRICTNESS.get(strictness, STRICTNESS['medium'])
+
+    sections = []
+    for section in flow_spec.split(','):
+        section = section.strip()
+        if section and section not in sections:
+            sections.append(section)
+    if not sections:
+        sections = ['greeting', 'hr_interview', 'technical_interview', 'closing']
+    unknown = [s for s in sections if s not in KNOWN_SECTIONS]
+    if unknown:
+        logger.warning(f"⚠️ Unknown conversation_flow sections ignored: {unknown}")
+    # the candidate profile questions always follow the greeting unless placed explicitly
+    if 'candidate_profile' not in sections:
+        at = sections.index('greeting') + 1 if 'greeting' in sections else 0
+        sections.insert(at, 'candidate_profile')
+
+    # the greeting (which also introduces the company) always asks for the name first
+    steps: List[FlowStep] = [FlowStep("ASK_NAME", 'field', field="name", check_off_topic=False)]
+    for section in sections:
+        if section == 'candidate_profile':
+            for state, field, prompt, min_words, retry_prompt in PROFILE_STEPS:
+                steps.append(FlowStep(
+                    state, 'field', field=field, prompt=prompt, retry_prompt=retry_prompt,
+                    min_words=max(1, min_words + extra_words) if min_words else 0,
+                    max_retries=max_retries,
+                    check_off_topic=state not in ("ASK_AGE", "ASK_LOCATION"),
+                ))
+        elif section == 'hr_interview' and include_hr and hr_questions:
+            steps.append(FlowStep(
+                "HR_STAGE", 'questions', field="hr_answers", questions=hr_questions,
+                intro=HR_INTRO, retry_prompt="ممکن است کمی بیشتر شرح دهید؟",
+                min_words=max(1, 6 + extra_words), max_retries=max_retries, skippable=True,
+                ack="متشکرم.", skip_ack="بسیار خوب، می‌رویم سوال بعدی.",
+            ))
+        elif section == 'technical_interview' and include_tech and tech_questions:
+            steps.append(FlowStep(
+                "TECH_STAGE", 'questions', field="technical_answers", questions=tech_questions,
+                intro=TECH_INTRO, retry_prompt="لطفاً با جزئیات بیشتری توضیح دهید.",
+                min_words=max(1, 8 + extra_words), max_retries=max_retries, skippable=True,
+                ack="سپاس‌گزارم.", skip_ack="متوجه هستم. سوال بعدی.",
+            ))
+        elif section == 'closing':
+            break
+        # greeting / company_introduction are spoken by the greeting line
+    steps.append(FlowStep("FINISHED", 'end', prompt=CLOSING))
+
+    logger.info(f"🧭 Compiled interview flow: {' → '.join(s.state for s in steps)}")
+    return CompiledFlow(GREETING_TEMPLATE.format(company_name=company_name), steps)
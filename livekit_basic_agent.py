@@ -7,16 +7,17 @@ Requires only OpenAI and Deepgram API keys.
 
 from dotenv import load_dotenv
 from livekit import agents
-from livekit.agents import Agent, AgentSession, RunContext
+from livekit.agents import AgentSession, RunContext
 from livekit.agents.llm import function_tool
-from livekit.plugins import openai, deepgram, silero
 from datetime import datetime
 import os
+from components import components, prewarm
+from context_compaction import CompactingAgent
 
 # Load environment variables
 load_dotenv(".env")
 
-class Assistant(Agent):
+class Assistant(CompactingAgent):
     """Basic voice assistant with Airbnb booking capabilities."""
 
     def __init__(self):
@@ -177,11 +178,12 @@ async def entrypoint(ctx: agents.JobContext):
     """Entry point for the agent."""
 
     # Configure the voice pipeline with the essentials
+    shared = components(ctx)
     session = AgentSession(
-        stt=deepgram.STT(model="nova-2"),
-        llm=openai.LLM(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini")),
-        tts=openai.TTS(voice="echo"),
-        vad=silero.VAD.load(),
+        stt=shared.deepgram_stt(model="nova-2"),
+        llm=shared.openai_llm(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini")),
+        tts=shared.openai_tts(voice="echo"),
+        vad=shared.vad(),
     )
 
     # Start the session
@@ -189,6 +191,7 @@ async def entrypoint(ctx: agents.JobContext):
         room=ctx.room,
         agent=Assistant()
     )
+    shared.report_job_start()
 
     # Generate initial greeting
     await session.generate_reply(
@@ -197,4 +200,4 @@ async def entrypoint(ctx: agents.JobContext):
 
 if __name__ == "__main__":
     # Run the agent
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
\ No newline at end of file
+    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
\ No newline at end of file
@@ -12,10 +12,10 @@ from dotenv import load_dotenv
 from livekit import agents
 from livekit.agents import Agent, AgentSession, RunContext
 from livekit.agents.llm import function_tool
-from livekit.plugins import openai, deepgram, silero
 from datetime import datetime
 import json
 import os
+from components import components, prewarm
 
 # ---------------------
 # Environment Setup
@@ -102,15 +102,17 @@ Keep your style direct, professional, and respectful.
 # ---------------------
 async def entrypoint(ctx: agents.JobContext):
     """Initialize the OnTime interview voice agent."""
+    shared = components(ctx)
     session = AgentSession(
-        stt=deepgram.STT(model="nova-2"),  # English real-time streaming
-        llm=openai.LLM(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini")),
-        tts=openai.TTS(voice="verse"),     # serious male voice
-        vad=silero.VAD.load(),
+        stt=shared.deepgram_stt(model="nova-2"),  # English real-time streaming
+        llm=shared.openai_llm(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini")),
+        tts=shared.openai_tts(voice="verse"),     # serious male voice
+        vad=shared.vad(),
     )
 
     # Launch the voice I/O session (this activates mic & speaker)
     await session.start(room=ctx.room, agent=OnTimeInterviewAgent())
+    shared.report_job_start()
 
     # Start interview greetings via TTS
     await session.generate_reply(
@@ -125,4 +127,4 @@ async def entrypoint(ctx: agents.JobContext):
 # Run as LiveKit Worker
 # ---------------------
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
+    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
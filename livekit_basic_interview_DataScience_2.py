@@ -13,7 +13,7 @@ from datetime import datetime
 
 from livekit import agents
 from livekit.agents import Agent
-from livekit.plugins import deepgram, silero, openai
+from components import components, prewarm
 
 
 # ---------------------- ENV SETUP ----------------------
@@ -131,18 +131,20 @@ class OnTimeInterviewAgent(Agent):
 # ======================================================
 async def entrypoint(ctx: agents.JobContext):
     """Bootstraps full live interactive session with mic/speaker."""
+    shared = components(ctx)
     session = agents.AgentSession(
-        stt=deepgram.STT(model="nova-2"),    # real-time transcription
-        vad=silero.VAD.load(),               # silence detection
-        llm=openai.LLM(model="gpt-4.1-mini"),
-        tts=openai.TTS(voice="verse"),       # steady, confident HR voice
+        stt=shared.deepgram_stt(model="nova-2"),    # real-time transcription
+        vad=shared.vad(),               # silence detection
+        llm=shared.openai_llm(model="gpt-4.1-mini"),
+        tts=shared.openai_tts(voice="verse"),       # steady, confident HR voice
     )
 
     await session.start(room=ctx.room, agent=OnTimeInterviewAgent())
+    shared.report_job_start()
 
 
 # ======================================================
 # WORKER: LAUNCH AGENT
 # ======================================================
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
+    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
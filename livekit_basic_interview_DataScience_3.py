@@ -5,17 +5,17 @@ Interactive real‑time voice interviewer for OnTime Company.
 Uses Deepgram STT + Silero VAD + OpenAI TTS + OpenAI LLM.
 Interview flow: Greeting → Education → Experience → Technical → Closing.
 Auto-summarizes each user response using LLM and stores
-both full and brief versions in interview_summary.json.
+both full and brief versions in interview_summary.json (via postcall_worker.py).
 """
 
 from dotenv import load_dotenv
 import os
-import json
 from datetime import datetime
 
 from livekit import agents
 from livekit.agents import Agent
-from livekit.plugins import deepgram, silero, openai
+from postcall_queue import enqueue_session_report
+from components import components, prewarm
 
 
 # ---------------------- ENV SETUP ----------------------
@@ -63,16 +63,14 @@ class OnTimeInterviewAgent(Agent):
         }
 
     # ----------------- SUMMARIZATION -----------------
-    async def summarize_answer(self, ctx, full_text: str, section: str):
-        """Use LLM to generate a brief professional summary of interviewee's response."""
+    def summary_prompt(self, full_text: str, section: str):
+        """Prompt for a brief professional summary of the interviewee's response."""
         if not full_text:
             return None
-        prompt = (
+        return (
             f"Summarize this interviewee's {section} answer briefly, "
             f"in one or two sentences, formally and focusing on key information:\n\n{full_text}"
         )
-        result = await ctx.session.llm.respond(prompt)
-        return result.text.strip()
 
     # ----------------- EVENT HANDLERS -----------------
     async def on_start(self, ctx):
@@ -129,22 +127,26 @@ class OnTimeInterviewAgent(Agent):
 
     # ----------------- UTILITIES -----------------
     async def save_summary(self, ctx):
-        """Save full answers and brief summaries to JSON."""
-        summary = {
-            "candidate": self.candidate["name"],
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "education_full": self.candidate["education"],
-            "education_brief": await self.summarize_answer(ctx, self.candidate["education"], "education"),
-            "experience_full": self.candidate["experience"],
-            "experience_brief": await self.summarize_answer(ctx, self.candidate["experience"], "experience"),
-            "technical_full": self.candidate["technical"],
-            "technical_brief": await self.summarize_answer(ctx, self.candidate["technical"], "technical"),
-        }
-
-        with open("pooyan_alavi_interview_summary.json", "w", encoding="utf-8") as f:
-            json.dump(summary, f, indent=4)
-
-        print("✅ Interview summary (full + brief) saved to pooyan_alavi_interview_summary.json")
+        """Queue full answers and brief summaries; postcall_worker.py writes the JSON."""
+        await enqueue_session_report(
+            "pooyan_alavi_interview_summary.json",
+            {
+                "candidate": self.candidate["name"],
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "education_full": self.candidate["education"],
+                "education_brief": None,
+                "experience_full": self.candidate["experience"],
+                "experience_brief": None,
+                "technical_full": self.candidate["technical"],
+                "technical_brief": None,
+            },
+            {
+                "education_brief": self.summary_prompt(self.candidate["education"], "education"),
+                "experience_brief": self.summary_prompt(self.candidate["experience"], "experience"),
+                "technical_brief": self.summary_prompt(self.candidate["technical"], "technical"),
+            },
+        )
+        print("📨 Interview summary queued for post-call processing → pooyan_alavi_interview_summary.json")
 
 
 # ======================================================
@@ -152,21 +154,23 @@ class OnTimeInterviewAgent(Agent):
 # ======================================================
 async def entrypoint(ctx: agents.JobContext):
     """Bootstraps full live interactive session with mic/speaker."""
+    shared = components(ctx)
     session = agents.AgentSession(
-        stt=deepgram.STT(model="nova-2"),    # real-time transcription
-        vad=silero.VAD.load(),               # silence detection
-        llm=openai.LLM(model="gpt-4.1-mini"),  # used for summarization & dynamic reasoning
-        tts=openai.TTS(voice="verse"),       # steady, confident HR voice
+        stt=shared.deepgram_stt(model="nova-2"),    # real-time transcription
+        vad=shared.vad(),               # silence detection
+        llm=shared.openai_llm(model="gpt-4.1-mini"),  # used for summarization & dynamic reasoning
+        tts=shared.openai_tts(voice="verse"),       # steady, confident HR voice
     )
 
     await session.start(room=ctx.room, agent=OnTimeInterviewAgent())
+    shared.report_job_start()
 
 
 # ======================================================
 # WORKER: LAUNCH AGENT
 # ======================================================
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
+    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
 
 
 
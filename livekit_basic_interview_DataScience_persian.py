@@ -8,12 +8,12 @@
 
 from dotenv import load_dotenv
 import os
-import json
 from datetime import datetime
 
 from livekit import agents
 from livekit.agents import Agent
-from livekit.plugins import silero, openai
+from postcall_queue import enqueue_session_report
+from components import components, prewarm
 
 
 # ---------------------- ENV ----------------------
@@ -57,16 +57,14 @@ class OnTimeInterviewAgentFA(Agent):
         }
 
     # ---------------- خلاصه‌سازی ----------------
-    async def summarize_answer(self, ctx, full_text: str, section: str):
-        """خلاصه کوتاه و رسمی از پاسخ شرکت‌کننده بر اساس LLM."""
+    def summary_prompt(self, full_text: str, section: str):
+        """پرامپت خلاصه کوتاه و رسمی از پاسخ شرکت‌کننده."""
         if not full_text:
             return None
-        prompt = (
+        return (
             f"پاسخ زیر مربوط به بخش «{section}» مصاحبه است. آن را در دو جمله‌ی رسمی خلاصه کن:"
             f"\n\n{full_text}"
         )
-        result = await ctx.session.llm.respond(prompt)
-        return result.text.strip()
 
     # ---------------- رویداد شروع ----------------
     async def on_start(self, ctx):
@@ -121,21 +119,26 @@ class OnTimeInterviewAgentFA(Agent):
 
     # ---------------- ذخیره نتایج ----------------
     async def save_summary(self, ctx):
-        summary = {
-            "candidate": self.candidate["name"],
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "education_full": self.candidate["education"],
-            "education_brief": await self.summarize_answer(ctx, self.candidate["education"], "تحصیلات"),
-            "experience_full": self.candidate["experience"],
-            "experience_brief": await self.summarize_answer(ctx, self.candidate["experience"], "تجربه کاری"),
-            "technical_full": self.candidate["technical"],
-            "technical_brief": await self.summarize_answer(ctx, self.candidate["technical"], "فنی"),
-        }
-
-        with open("pooyan_alavi_interview_summary_fa.json", "w", encoding="utf-8") as f:
-            json.dump(summary, f, indent=4, ensure_ascii=False)
-
-        print("✅ خلاصه‌ی مصاحبه (کامل + خلاصه) در فایل pooyan_alavi_interview_summary_fa.json ذخیره شد.")
+        # خلاصه‌های کوتاه بعد از تماس در postcall_worker.py ساخته و در فایل نوشته می‌شوند
+        await enqueue_session_report(
+            "pooyan_alavi_interview_summary_fa.json",
+            {
+                "candidate": self.candidate["name"],
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "education_full": self.candidate["education"],
+                "education_brief": None,
+                "experience_full": self.candidate["experience"],
+                "experience_brief": None,
+                "technical_full": self.candidate["technical"],
+                "technical_brief": None,
+            },
+            {
+                "education_brief": self.summary_prompt(self.candidate["education"], "تحصیلات"),
+                "experience_brief": self.summary_prompt(self.candidate["experience"], "تجربه کاری"),
+                "technical_brief": self.summary_prompt(self.candidate["technical"], "فنی"),
+            },
+        )
+        print("📨 خلاصه‌ی مصاحبه در صف پردازش پس از تماس ثبت شد (pooyan_alavi_interview_summary_fa.json).")
 
 
 # ======================================================
@@ -145,18 +148,20 @@ async def entrypoint(ctx: agents.JobContext):
     """راه‌اندازی کامل جلسه‌ی صوتی فارسی."""
     #alloy, echo, verse   female: coral, sage, marin , cedar   nova, onyx
     # onyx, marin, alloy, marin, sage
+    shared = components(ctx)
     session = agents.AgentSession(
-        stt=openai.STT(model="gpt-4o-mini-transcribe", language="fa"),
-        llm=openai.LLM(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini")),
-        tts=openai.TTS(voice="sage"),
-        vad=silero.VAD.load(),
+        stt=shared.openai_stt(model="gpt-4o-mini-transcribe", language="fa"),
+        llm=shared.openai_llm(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini")),
+        tts=shared.openai_tts(voice="sage"),
+        vad=shared.vad(),
     )
 
     await session.start(room=ctx.room, agent=OnTimeInterviewAgentFA())
+    shared.report_job_start()
 
 
 # ======================================================
 # اجرای عامل
 # ======================================================
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
+    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
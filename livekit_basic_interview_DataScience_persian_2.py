@@ -5,76 +5,23 @@
 
 from dotenv import load_dotenv
 import os
-import json
-import requests
 from datetime import datetime
-import tempfile
-from types import SimpleNamespace
-import aiofiles
 
 from livekit import agents
 from livekit.agents import Agent
-from livekit.plugins import silero, openai
-from livekit.agents.tts import TTS, ChunkedStream, TTSCapabilities
-import requests, tempfile, aiofiles
 
+from avasho_tts import AvashoTTS
+from hedged_tts import HedgedTTS
+from tts_cache import CachedTTS
+from tts_pipeline import SentenceParallelTTS
+from postcall_queue import enqueue_session_report
+from components import components, prewarm
 
 
 # ---------------------- ENV ----------------------
 load_dotenv(".env")
-AVASHO_TOKEN = os.getenv("AVASHO_GATEWAY_TOKEN")
 
 
-# ======================================================
-# کلاس کوچک Avasho TTS جایگزین openai.TTS
-# ======================================================
-class AvashoTTSProxy(TTS):
-    """TTS adapter for Avasho FastAPI proxy — compat with older LiveKit Agents SDK."""
-
-    def __init__(self, server_url="http://37.32.26.165:8000/tts", speaker="shahrzad", speed=1.0):
-        self.server_url = server_url
-        self.speaker = speaker
-        self.speed = speed
-        self._format = "mp3"
-
-        capabilities = TTSCapabilities(streaming=False)
-        super().__init__(capabilities=capabilities, sample_rate=24000, num_channels=1)
-
-    def synthesize(self, text: str, rate: float = 1.0, **kwargs):
-        payload = {"text": text, "speaker": self.speaker, "speed": self.speed, "timestamp": True}
-
-        class SynthContext:
-            def __init__(self, outer):
-                self.outer = outer
-                self.tmpfile = None
-
-            async def __aenter__(self):
-                resp = requests.post(self.outer.server_url, json=payload, stream=True)
-                resp.raise_for_status()
-                self.tmpfile = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
-                for chunk in resp.iter_content(chunk_size=8192):
-                    self.tmpfile.write(chunk)
-                self.tmpfile.flush()
-                return self
-
-            async def __aexit__(self, exc_type, exc_val, exc_tb):
-                pass
-
-            def __aiter__(self):
-                return self._aiter()
-
-            async def _aiter(self):
-                async with aiofiles.open(self.tmpfile.name, "rb") as f:
-                    audio_bytes = await f.read()
-                    yield ChunkedStream.Chunk(
-                        audio=audio_bytes,
-                        sample_rate=self.outer.sample_rate,
-                        num_channels=self.outer.num_channels,
-                        format=self.outer._format,
-                    )
-
-        return SynthContext(self)
-
 # ======================================================
 # کلاس اصلی عامل مصاحبه (بدون تغییر در منطق)
 # ======================================================
@@ -104,14 +51,12 @@ class OnTimeInterviewAgentFA(Agent):
         self.candidate = {"name": self.resume["name"], "education": None, "experience": None, "technical": None}
 
     # ---------------- خلاصه‌سازی ----------------
-    async def summarize_answer(self, ctx, full_text: str, section: str):
+    def summary_prompt(self, full_text: str, section: str):
         if not full_text:
             return None
-        prompt = (
+        return (
             f"پاسخ زیر مربوط به بخش «{section}» مصاحبه است. آن را در دو جمله‌ی رسمی خلاصه کن:\n\n{full_text}"
         )
-        result = await ctx.session.llm.respond(prompt)
-        return result.text.strip()
 
     # ---------------- رویداد شروع ----------------
     async def on_start(self, ctx):
@@ -164,37 +109,62 @@ class OnTimeInterviewAgentFA(Agent):
             self.state = "CLOSE"
 
     async def save_summary(self, ctx):
-        summary = {
-            "candidate": self.candidate["name"],
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "education_full": self.candidate["education"],
-            "education_brief": await self.summarize_answer(ctx, self.candidate["education"], "تحصیلات"),
-            "experience_full": self.candidate["experience"],
-            "experience_brief": await self.summarize_answer(ctx, self.candidate["experience"], "تجربه کاری"),
-            "technical_full": self.candidate["technical"],
-            "technical_brief": await self.summarize_answer(ctx, self.candidate["technical"], "فنی"),
-        }
-
-        with open("pooyan_alavi_interview_summary_fa.json", "w", encoding="utf-8") as f:
-            json.dump(summary, f, indent=4, ensure_ascii=False)
-        print("✅ خلاصه‌ی مصاحبه در فایل pooyan_alavi_interview_summary_fa.json ذخیره شد.")
+        # خلاصه‌های کوتاه بعد از تماس در postcall_worker.py ساخته و در فایل نوشته می‌شوند
+        await enqueue_session_report(
+            "pooyan_alavi_interview_summary_fa.json",
+            {
+                "candidate": self.candidate["name"],
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "education_full": self.candidate["education"],
+                "education_brief": None,
+                "experience_full": self.candidate["experience"],
+                "experience_brief": None,
+                "technical_full": self.candidate["technical"],
+                "technical_brief": None,
+            },
+            {
+                "education_brief": self.summary_prompt(self.candidate["education"], "تحصیلات"),
+                "experience_brief": self.summary_prompt(self.candidate["experience"], "تجربه کاری"),
+                "technical_brief": self.summary_prompt(self.candidate["technical"], "فنی"),
+            },
+        )
+        print("📨 خلاصه‌ی مصاحبه در صف پردازش پس از تماس ثبت شد (pooyan_alavi_interview_summary_fa.json).")
 
 
 # ======================================================
 # ENTRYPOINT
 # ======================================================
 async def entrypoint(ctx: agents.JobContext):
+    shared = components(ctx)
     session = agents.AgentSession(
-        stt=openai.STT(model="gpt-4o-mini-transcribe", language="fa"),
-        llm=openai.LLM(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini")),
-        tts=AvashoTTSProxy(speaker="shahrzad", speed=1.0),  # 🟢 جایگزین TTS آواشو
-        vad=silero.VAD.load(),
+        stt=shared.openai_stt(model="gpt-4o-mini-transcribe", language="fa"),
+        llm=shared.openai_llm(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini")),
+        # 🟢 TTS آواشو به‌صورت streaming (پخش از اولین بایت)، جمله‌به‌جمله و موازی، با کش صوتی
+        # اگر آواشو دیر جواب بدهد، همان پاسخ با OpenAI هم ساخته می‌شود (hedging)؛
+        # انتخاب در سطح کل پاسخ است تا صدا وسط پاسخ عوض نشود
+        tts=HedgedTTS({
+            "avasho": SentenceParallelTTS(
+                CachedTTS(
+                    AvashoTTS(
+                        speaker="shahrzad", speed=1.0,
+                        http_session=shared.http_session,
+                    ),
+                    voice="shahrzad",
+                    speed=1.0,
+                )
+            ),
+            "openai": SentenceParallelTTS(
+                CachedTTS(shared.openai_tts(voice="sage"), voice="sage")
+            ),
+        }),
+        vad=shared.vad(),
     )
     await session.start(room=ctx.room, agent=OnTimeInterviewAgentFA())
+    shared.report_job_start()
 
 
 # ======================================================
 # اجرای عامل
 # ======================================================
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
+    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
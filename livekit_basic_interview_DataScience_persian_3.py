@@ -10,7 +10,8 @@ import os, json
 from datetime import datetime
 from livekit import agents
 from livekit.agents import Agent
-from livekit.plugins import openai, silero
+from postcall_queue import enqueue_session_report
+from components import components, prewarm
 
 load_dotenv(".env")
 
@@ -53,11 +54,9 @@ class OnTimeInterviewAgentFA(Agent):
         self.insist_count = 0
 
 
-    async def summarize_text(self, ctx):
+    def summary_prompt(self):
         data = json.dumps(self.candidate, ensure_ascii=False)
-        prompt = "خلاصه‌ی رسمی از محتوای مصاحبه صوتی زیر بنویس:\n" + data
-        result = await ctx.session.llm.respond(prompt)
-        return result.text.strip()
+        return "خلاصه‌ی رسمی از محتوای مصاحبه صوتی زیر بنویس:\n" + data
 
 
     # 🟢 شروع مصاحبه
@@ -180,8 +179,7 @@ class OnTimeInterviewAgentFA(Agent):
 
     # 🟠 پایان تماس و ذخیره خروجی
     async def on_call_end(self, ctx):
-        print("📞 تماس پایان یافت. ذخیره فایل خلاصه...")
-        summary_text = await self.summarize_text(ctx)
+        print("📞 تماس پایان یافت. ثبت خلاصه در صف پردازش پس از تماس...")
         data = {
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "candidate_name": self.candidate["name"],
@@ -190,24 +188,26 @@ class OnTimeInterviewAgentFA(Agent):
             "experience": self.candidate["experience"],
             "hr_answers": self.candidate["hr_answers"],
             "technical_answers": self.candidate["technical_answers"],
-            "summary": summary_text
+            "summary": None,
         }
-        with open("ontime_interview_session_fa.json", "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-        print("✅ فایل خلاصه ذخیره شد: ontime_interview_session_fa.json")
+        # خلاصه‌سازی و نوشتن فایل در postcall_worker.py انجام می‌شود
+        await enqueue_session_report("ontime_interview_session_fa.json", data, {"summary": self.summary_prompt()})
+        print("📨 خلاصه در صف ثبت شد: ontime_interview_session_fa.json")
 
 
 # ======================================================
 async def entrypoint(ctx: agents.JobContext):
     """راه‌انداز عامل مصاحبه OnTime"""
+    shared = components(ctx)
     session = agents.AgentSession(
-        stt=openai.STT(model="gpt-4o-mini-transcribe", language="fa"),
-        llm=openai.LLM(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini")),
-        tts=openai.TTS(voice="sage"),
-        vad=silero.VAD.load(),
+        stt=shared.openai_stt(model="gpt-4o-mini-transcribe", language="fa"),
+        llm=shared.openai_llm(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini")),
+        tts=shared.openai_tts(voice="sage"),
+        vad=shared.vad(),
     )
     await session.start(room=ctx.room, agent=OnTimeInterviewAgentFA())
+    shared.report_job_start()
 
 
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
+    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
@@ -8,16 +8,17 @@ Requires OpenAI and Deepgram API keys.
 
 from dotenv import load_dotenv
 from livekit import agents
-from livekit.agents import Agent, AgentSession, RunContext
+from livekit.agents import AgentSession, RunContext
 from livekit.agents.llm import function_tool
-from livekit.plugins import openai, deepgram, silero
 from datetime import datetime
 import os
+from components import components, prewarm
+from context_compaction import CompactingAgent
 
 # Load environment variables
 load_dotenv(".env")
 
-class RestaurantOrderAssistant(Agent):
+class RestaurantOrderAssistant(CompactingAgent):
     """Friendly restaurant phone operator that handles food orders."""
 
     def __init__(self):
@@ -178,18 +179,20 @@ class RestaurantOrderAssistant(Agent):
 async def entrypoint(ctx: agents.JobContext):
     """Entry point for the Restaurant Operator."""
 
+    shared = components(ctx)
     session = AgentSession(
-        stt=deepgram.STT(model="nova-2"),
-        llm=openai.LLM(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini")),
-        tts=openai.TTS(voice="echo"),
-        vad=silero.VAD.load(),
+        stt=shared.deepgram_stt(model="nova-2"),
+        llm=shared.openai_llm(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini")),
+        tts=shared.openai_tts(voice="echo"),
+        vad=shared.vad(),
     )
 
     await session.start(room=ctx.room, agent=RestaurantOrderAssistant())
+    shared.report_job_start()
 
     await session.generate_reply(
         instructions="Greet the caller warmly as a restaurant operator, offer to show the menu or take their order."
     )
 
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
+    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
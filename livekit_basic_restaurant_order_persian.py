@@ -11,9 +11,9 @@ from dotenv import load_dotenv
 from livekit import agents
 from livekit.agents import Agent, AgentSession, RunContext
 from livekit.agents.llm import function_tool
-from livekit.plugins import openai, deepgram, silero
 from datetime import datetime
 import os
+from components import components, prewarm
 
 
 # Load environment variables
@@ -147,14 +147,16 @@ class PersianRestaurantAgent(Agent):
 
 async def entrypoint(ctx: agents.JobContext):
     """Initialize Persian-speaking restaurant assistant."""
+    shared = components(ctx)
     session = AgentSession(
-        stt=openai.STT(model="gpt-4o-mini-transcribe", language="fa"),
-        llm=openai.LLM(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini")),
-        tts=openai.TTS(voice="alloy"),
-        vad=silero.VAD.load(),
+        stt=shared.openai_stt(model="gpt-4o-mini-transcribe", language="fa"),
+        llm=shared.openai_llm(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini")),
+        tts=shared.openai_tts(voice="alloy"),
+        vad=shared.vad(),
     )
 
     await session.start(room=ctx.room, agent=PersianRestaurantAgent())
+    shared.report_job_start()
 
     await session.generate_reply(
         instructions="با لحن صمیمی سلام کنید و بپرسید چه غذایی میل دارند."
@@ -162,4 +164,4 @@ async def entrypoint(ctx: agents.JobContext):
 
 
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
+    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
@@ -13,8 +13,13 @@ import json
 from datetime import datetime
 
 from livekit import agents
-from livekit.agents import Agent
-from livekit.plugins import silero, openai
+
+from speech_sequencer import say_sequence
+from tts_cache import CachedTTS
+from tts_pipeline import SentenceParallelTTS
+from scripted_mode import ScriptedAgent
+from postcall_queue import enqueue_session_report
+from components import components, prewarm
 
 # ---------------------- ENV ----------------------
 load_dotenv(".env")
@@ -23,7 +28,7 @@ load_dotenv(".env")
 # ======================================================
 # کلاس اصلی عامل چای‌خانه
 # ======================================================
-class TeaShopAgentFA(Agent):
+class TeaShopAgentFA(ScriptedAgent):
     """عامل فروشنده‌ و مشاور چای‌خانه چلچله‌سار به زبان فارسی."""
 
     def __init__(self):
@@ -51,26 +56,24 @@ class TeaShopAgentFA(Agent):
         }
 
     # ---------------- خلاصه‌سازی ----------------
-    async def summarize_text(self, ctx, text):
+    def summary_prompt(self, text):
         if not text:
             return None
-        prompt = f"خلاصه‌ای محترمانه از مکالمه فروش در چای‌خانه بنویس:\n{text}"
-        result = await ctx.session.llm.respond(prompt)
-        return result.text.strip()
+        return f"خلاصه‌ای محترمانه از مکالمه فروش در چای‌خانه بنویس:\n{text}"
 
     # ---------------- شروع گفت‌وگو ----------------
-    async def on_start(self, ctx):
+    async def on_start(self, session):
         greeting = (
             "سلام و عرض ادب! به چای‌خانه‌ی  چلچله‌سار خوش‌آمدید ☕️ "
             "ما انواع چای سیاه ایرانی داریم — از قلم و بهاره گرفته تا کَله‌مورچه‌ای و ممتاز. "
             "لطفاً بفرمایید دنبال چه نوع چایی هستید یا چه عطری را ترجیح می‌دهید؟"
         )
         print(f"🗣 عامل می‌گوید: {greeting}")
-        await ctx.session.say(greeting, rate=0.9)
+        await say_sequence(session, [(greeting, True)])
         self.state = "OFFERING"
 
     # ---------------- هنگام پاسخ مشتری ----------------
-    async def on_user_spoke(self, ctx, text: str):
+    async def on_user_spoke(self, session, text: str):
         text = text.strip()
         if not text:
             return
@@ -82,7 +85,7 @@ class TeaShopAgentFA(Agent):
                 "بهاره عطر طبیعی گل دارد و کَله‌مورچه‌ای رنگ تیره و طعم‌تر.\n"
                 "مایل هستید درباره‌ی تفاوت کیفیت و قیمتشان توضیح بدهم؟"
             )
-            await ctx.session.say(recommendations, rate=0.9)
+            await say_sequence(session, [(recommendations, True)])
             self.state = "DETAILS"
 
         elif self.state == "DETAILS":
@@ -93,7 +96,7 @@ class TeaShopAgentFA(Agent):
                 "چای قلم و ساقه اقتصادی‌تر هستند و برای مصرف روزانه مناسب‌اند.\n"
                 "مایل هستید یکی از این گزینه‌ها را برای سفارش انتخاب کنم؟"
             )
-            await ctx.session.say(detail_info, rate=0.9)
+            await say_sequence(session, [(detail_info, True)])
             self.state = "ORDER_REQUEST"
 
         elif self.state == "ORDER_REQUEST":
@@ -102,7 +105,7 @@ class TeaShopAgentFA(Agent):
                 f"خیلی خب، سفارش شما برای «{self.customer['chosen_tea']}» ثبت شد. "
                 "لطفاً وزن یا مقدار مورد نظر را هم بفرمایید تا فاکتور آماده شود."
             )
-            await ctx.session.say(confirm, rate=0.9)
+            await say_sequence(session, [(confirm, True)])
             self.state = "ORDER_CONFIRM"
 
         elif self.state == "ORDER_CONFIRM":
@@ -112,27 +115,26 @@ class TeaShopAgentFA(Agent):
                 "امیدوارم عطرو طعم چای‌ تازه چلچله‌سار روزتان را دل‌انگیز کند. "
                 "به امید دیدار دوباره!"
             )
-            await ctx.session.say(closing, rate=0.9)
+            await say_sequence(session, [(closing, True)])
 
             # ذخیره خلاصه‌ سفارش
-            await self.save_summary(ctx)
+            await self.save_summary(session)
             self.state = "CLOSE"
 
     # ---------------- ذخیره خلاصه مکالمه ----------------
-    async def save_summary(self, ctx):
+    async def save_summary(self, session):
+        # خلاصه‌سازی با LLM و نوشتن فایل بعد از تماس در postcall_worker.py انجام می‌شود
         summary_text = json.dumps(self.customer, ensure_ascii=False, indent=4)
-        summarized = await self.summarize_text(ctx, summary_text)
-
-        data = {
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "conversation": self.customer,
-            "summary": summarized,
-        }
-
-        with open("tea_shop_session_fa.json", "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        await enqueue_session_report(
+            "tea_shop_session_fa.json",
+            {
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "conversation": self.customer,
+            },
+            {"summary": self.summary_prompt(summary_text)},
+        )
 
-        print("✅ خلاصه خرید در فایل tea_shop_session_fa.json ذخیره شد.")
+        print("📨 خلاصه خرید در صف پردازش پس از تماس ثبت شد (tea_shop_session_fa.json).")
 
 
 # ======================================================
@@ -140,18 +142,24 @@ class TeaShopAgentFA(Agent):
 # ======================================================
 async def entrypoint(ctx: agents.JobContext):
     """راه‌اندازی کامل عامل صوتی چای‌خانه فارسی."""
+    shared = components(ctx)
     session = agents.AgentSession(
-        stt=openai.STT(model="gpt-4o-mini-transcribe", language="fa"),
-        llm=openai.LLM(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini")),
-        tts=openai.TTS(voice="sage"),   # بهترین صدای فعلی
-        vad=silero.VAD.load(),
+        stt=shared.openai_stt(model="gpt-4o-mini-transcribe", language="fa"),
+        llm=shared.openai_llm(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini")),
+        # جمله‌به‌جمله و موازی سنتز می‌شود (پخش به ترتیب)؛ هر جمله جداگانه کش می‌شود
+        # سرعت 0.9 که قبلاً به say(rate=0.9) داده می‌شد اکنون روی خود TTS است
+        tts=SentenceParallelTTS(
+            CachedTTS(shared.openai_tts(voice="sage", speed=0.9), voice="sage", speed=0.9)
+        ),
+        vad=shared.vad(),
     )
 
     await session.start(room=ctx.room, agent=TeaShopAgentFA())
+    shared.report_job_start()
 
 
 # ======================================================
 # اجرای عامل
 # ======================================================
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
+    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
@@ -9,11 +9,9 @@ from livekit import rtc
 from livekit import agents
 from livekit.agents import (
     NOT_GIVEN,
-    Agent,
     AgentFalseInterruptionEvent,
     AgentSession,
     JobContext,
-    JobProcess,
     MetricsCollectedEvent,
     ModelSettings,
     RoomInputOptions,
@@ -24,12 +22,14 @@ from livekit.agents import (
     metrics,
     mcp
 )
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+# imported at startup so the worker registers the turn detector inference runner
+from livekit.plugins.turn_detector.multilingual import MultilingualModel  # noqa: F401
 from livekit.agents.llm import function_tool
-from livekit.plugins import openai, deepgram, silero
 from datetime import datetime
 import logging
 import os
+from components import components, prewarm
+from context_compaction import CompactingAgent
 
 # uncomment to enable Krisp background voice/noise cancellation
 # from livekit.plugins import noise_cancellation
@@ -41,11 +41,7 @@ load_dotenv(".env")
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
-
-
-class Assistant(Agent):
+class Assistant(CompactingAgent):
     """Main voice assistant implementation."""
     
     def __init__(self):
@@ -75,6 +71,7 @@ class Assistant(Agent):
     async def on_exit(self):
         """Called when the agent session ends."""
         logger.info("Agent session ended")
+        await super().on_exit()
 
 
 async def entrypoint(ctx: agents.JobContext):
@@ -83,30 +80,31 @@ async def entrypoint(ctx: agents.JobContext):
     logger.info(f"Agent started in room: {ctx.room.name}")
     
     # Configure the voice pipeline
+    shared = components(ctx)
     session = AgentSession(
         # Speech-to-Text
-        stt=deepgram.STT(
+        stt=shared.deepgram_stt(
             model="nova-2",
             language="en",
         ),
         
         # Large Language Model
-        llm=openai.LLM(
+        llm=shared.openai_llm(
             model=os.getenv("LLM_CHOICE", "gpt-4.1-mini"),
             temperature=0.7,
         ),
         
         # Text-to-Speech
-        tts=openai.TTS(
+        tts=shared.openai_tts(
             voice="echo",
             speed=1.0,
         ),
         
         # Voice Activity Detection
-        vad=silero.VAD.load(),
+        vad=shared.vad(),
         
         # Turn detection strategy
-        turn_detection=MultilingualModel(),
+        turn_detection=shared.turn_detector(),
 
         # MCP servers
         mcp_servers=[mcp.MCPServerHTTP(url="http://localhost:8089/mcp",)],
@@ -123,6 +121,7 @@ async def entrypoint(ctx: agents.JobContext):
         # ),
         room_output_options=RoomOutputOptions(transcription_enabled=True),
     )
+    shared.report_job_start()
     
     # Handle session events
     @session.on("agent_state_changed")
@@ -13,8 +13,13 @@ import json
 from datetime import datetime
 
 from livekit import agents
-from livekit.agents import Agent
-from livekit.plugins import openai, silero
+
+from speech_sequencer import say_sequence
+from tts_cache import CachedTTS
+from tts_pipeline import SentenceParallelTTS
+from scripted_mode import ScriptedAgent
+from postcall_queue import enqueue_session_report
+from components import components, prewarm
 
 
 # ---------------------- ENV ----------------------
@@ -24,7 +29,7 @@ load_dotenv(".env")
 # ======================================================
 # کلاس اصلی عامل پخش تات
 # ======================================================
-class TatShopAgentFA(Agent):
+class TatShopAgentFA(ScriptedAgent):
     """عامل فروش و مشاور بلورجات پخش تات با تمرکز بر برند زنگان."""
 
     def __init__(self):
@@ -79,26 +84,24 @@ class TatShopAgentFA(Agent):
         }
 
     # ---------------- خلاصه‌سازی ----------------
-    async def summarize_text(self, ctx, text):
+    def summary_prompt(self, text):
         if not text:
             return None
-        prompt = f"خلاصه‌ای محترمانه از مکالمه فروش بلور زنگان در پخش تات بنویس:\n{text}"
-        result = await ctx.session.llm.respond(prompt)
-        return result.text.strip()
+        return f"خلاصه‌ای محترمانه از مکالمه فروش بلور زنگان در پخش تات بنویس:\n{text}"
 
     # ---------------- شروع گفت‌وگو ----------------
-    async def on_start(self, ctx):
+    async def on_start(self, session):
         greeting = (
             "سلام و عرض احترام 🌸 خوش‌آمدید به پخش تات — ما مجموعه‌ای از بهترین بلورهای زنگان را "
             "با طراحی‌های متنوع مثل اپرا، ارغوان، ارکیده، طلایی و تایتانیک داریم. "
             "مایلید درباره‌ی کدام مدل بیشتر بدانید؟"
         )
         print(f"🗣 عامل می‌گوید: {greeting}")
-        await ctx.session.say(greeting, rate=0.9)
+        await say_sequence(session, [(greeting, True)])
         self.state = "OFFERING"
 
     # ---------------- پاسخ‌گویی به مشتری ----------------
-    async def on_user_spoke(self, ctx, text: str):
+    async def on_user_spoke(self, session, text: str):
         text = text.strip()
         if not text:
             return
@@ -117,12 +120,12 @@ class TatShopAgentFA(Agent):
                 f"قیمت آن {product['price']} است. "
                 "می‌خواهید همین مدل را سفارش بدهم؟"
             )
-            await ctx.session.say(msg, rate=0.9)
+            await say_sequence(session, [(msg, True)])
             self.customer["requests"].append(found)
             self.state = "ORDER_REQUEST"
 
         elif "سفارش" in text or "می‌خوام" in text:
-            await ctx.session.say("لطفاً نام دقیق محصول بلور زنگان موردنظر را بفرمایید.", rate=0.9)
+            await say_sequence(session, [("لطفاً نام دقیق محصول بلور زنگان موردنظر را بفرمایید.", True)])
 
         elif self.state == "ORDER_REQUEST":
             self.customer["chosen_product"] = text
@@ -130,7 +133,7 @@ class TatShopAgentFA(Agent):
                 f"خیلی عالی، سفارش شما برای «{text}» ثبت شد. "
                 "لطفاً تعداد مورد نظر را هم بفرمایید تا فاکتور آماده شود."
             )
-            await ctx.session.say(confirm, rate=0.9)
+            await say_sequence(session, [(confirm, True)])
             self.state = "ORDER_CONFIRM"
 
         elif self.state == "ORDER_CONFIRM":
@@ -139,28 +142,27 @@ class TatShopAgentFA(Agent):
                 "تشکر از خریدتون 🌷 سفارش شما با موفقیت ثبت شد و همکاران پخش تات به‌زودی برای هماهنگی تماس می‌گیرند. "
                 "بلور زنگان با شفافیت و دوام عالی، میز شما را زیباتر خواهد کرد!"
             )
-            await ctx.session.say(closing, rate=0.9)
-            await self.save_summary(ctx)
+            await say_sequence(session, [(closing, True)])
+            await self.save_summary(session)
             self.state = "CLOSE"
 
         else:
-            await ctx.session.say("متأسفم، چنین محصولی در لیست بلور زنگان پخش تات وجود ندارد.", rate=0.9)
+            await say_sequence(session, [("متأسفم، چنین محصولی در لیست بلور زنگان پخش تات وجود ندارد.", True)])
 
     # ---------------- ذخیره خلاصه مکالمه ----------------
-    async def save_summary(self, ctx):
+    async def save_summary(self, session):
+        # خلاصه‌سازی با LLM و نوشتن فایل بعد از تماس در postcall_worker.py انجام می‌شود
         summary_text = json.dumps(self.customer, ensure_ascii=False, indent=4)
-        summarized = await self.summarize_text(ctx, summary_text)
-
-        data = {
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "conversation": self.customer,
-            "summary": summarized,
-        }
-
-        with open("tat_shop_session_fa.json", "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        await enqueue_session_report(
+            "tat_shop_session_fa.json",
+            {
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "conversation": self.customer,
+            },
+            {"summary": self.summary_prompt(summary_text)},
+        )
 
-        print("✅ خلاصه خرید در فایل tat_shop_session_fa.json ذخیره شد.")
+        print("📨 خلاصه خرید در صف پردازش پس از تماس ثبت شد (tat_shop_session_fa.json).")
 
 
 # ======================================================
@@ -168,17 +170,23 @@ class TatShopAgentFA(Agent):
 # ======================================================
 async def entrypoint(ctx: agents.JobContext):
     """راه‌اندازی کامل عامل صوتی پخش تات (بلور زنگان)."""
+    shared = components(ctx)
     session = agents.AgentSession(
-        stt=openai.STT(model="gpt-4o-mini-transcribe", language="fa"),
-        llm=openai.LLM(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini")),
-        tts=openai.TTS(voice="sage"),
-        vad=silero.VAD.load(),
+        stt=shared.openai_stt(model="gpt-4o-mini-transcribe", language="fa"),
+        llm=shared.openai_llm(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini")),
+        # جمله‌به‌جمله و موازی سنتز می‌شود (پخش به ترتیب)؛ هر جمله جداگانه کش می‌شود
+        # سرعت 0.9 که قبلاً به say(rate=0.9) داده می‌شد اکنون روی خود TTS است
+        tts=SentenceParallelTTS(
+            CachedTTS(shared.openai_tts(voice="sage", speed=0.9), voice="sage", speed=0.9)
+        ),
+        vad=shared.vad(),
     )
     await session.start(room=ctx.room, agent=TatShopAgentFA())
+    shared.report_job_start()
 
 
 # ======================================================
 # اجرای عامل
 # ======================================================
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
+    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
@@ -0,0 +1,63 @@
+"""
+Event Loop Monitor
+==================
+Debug-mode detector for code that blocks the asyncio event loop.
+
+The job's event loop also pumps room audio (VAD, TTS playout), so any
+callback that holds it for long is audible. When DEBUG_MODE is enabled this
+module turns on asyncio debug mode with a slow-callback threshold, which logs
+every callback/task step that runs longer than SLOW_CALLBACK_THRESHOLD_MS,
+and starts a small watchdog that reports overall loop lag.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Optional
+
+logger = logging.getLogger("loop-monitor")
+logger.setLevel(logging.INFO)
+
+
+def debug_mode_enabled() -> bool:
+    return os.getenv("DEBUG_MODE", "false").lower() in ("1", "true", "yes")
+
+
+def slow_callback_threshold() -> float:
+    """Threshold in seconds, from SLOW_CALLBACK_THRESHOLD_MS (default 100 ms)."""
+    return float(os.getenv("SLOW_CALLBACK_THRESHOLD_MS", "100")) / 1000
+
+
+async def _watch_loop_lag(threshold: float, interval: float):
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag = loop.time() - started - interval
+        if lag > threshold:
+            logger.warning(f"🐢 Event loop was blocked for ~{lag * 1000:.0f} ms")
+
+
+def install_slow_callback_detector(
+    threshold: Optional[float] = None,
+    interval: float = 0.25,
+    force: bool = False,
+) -> Optional[asyncio.Task]:
+    """
+    Enable slow-callback logging on the running loop.
+
+    Does nothing unless DEBUG_MODE is set (or force=True). Returns the lag
+    watchdog task so the caller can cancel it on shutdown.
+    """
+    if not (force or debug_mode_enabled()):
+        return None
+
+    threshold = slow_callback_threshold() if threshold is None else threshold
+    loop = asyncio.get_running_loop()
+    loop.set_debug(True)
+    loop.slow_callback_duration = threshold
+    # asyncio reports slow callbacks on its own logger at WARNING level
+    logging.getLogger("asyncio").setLevel(logging.WARNING)
+
+    logger.info(f"🔍 Slow-callback detector enabled (threshold={threshold * 1000:.0f} ms)")
+    return asyncio.create_task(_watch_loop_lag(threshold, interval), name="loop-lag-watchdog")
@@ -0,0 +1,13 @@
+-- Composite indexes backing DatabaseManager.get_interview_settings
+-- (SETTINGS_WITH_QUESTIONS_QUERY). Each lateral question lookup filters on
+-- company_id / ask / field and orders by order_index, so these indexes serve
+-- both the filter and the ORDER BY without a separate sort.
+--
+-- CONCURRENTLY cannot run inside a transaction block; apply with:
+--   psql "$DATABASE_URL" -f migrations/001_question_indexes.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_custom_hr_questions_lookup
+    ON custom_hr_questions (company_id, ask, field, order_index);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_custom_technical_questions_lookup
+    ON custom_technical_questions (company_id, ask, field, order_index);
@@ -0,0 +1,47 @@
+-- NOTIFY on every change to interview settings or question banks so that
+-- DatabaseManager can invalidate its process-wide settings cache
+-- (see DatabaseManager.start_cache_invalidation).
+--
+-- Payloads on channel 'interview_settings_changed':
+--   {"table": "interview_settings", "id": <settings id>}
+--   {"table": "custom_hr_questions" | "custom_technical_questions", "company_id": "<company>"}
+
+CREATE OR REPLACE FUNCTION notify_interview_settings_changed() RETURNS trigger AS $$
+DECLARE
+    r record;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        r := OLD;
+    ELSE
+        r := NEW;
+    END IF;
+
+    IF TG_TABLE_NAME = 'interview_settings' THEN
+        PERFORM pg_notify('interview_settings_changed',
+            json_build_object('table', TG_TABLE_NAME, 'id', r.id)::text);
+    ELSE
+        PERFORM pg_notify('interview_settings_changed',
+            json_build_object('table', TG_TABLE_NAME, 'company_id', r.company_id)::text);
+        IF TG_OP = 'UPDATE' AND OLD.company_id IS DISTINCT FROM NEW.company_id THEN
+            PERFORM pg_notify('interview_settings_changed',
+                json_build_object('table', TG_TABLE_NAME, 'company_id', OLD.company_id)::text);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS interview_settings_notify ON interview_settings;
+CREATE TRIGGER interview_settings_notify
+    AFTER INSERT OR UPDATE OR DELETE ON interview_settings
+    FOR EACH ROW EXECUTE FUNCTION notify_interview_settings_changed();
+
+DROP TRIGGER IF EXISTS custom_hr_questions_notify ON custom_hr_questions;
+CREATE TRIGGER custom_hr_questions_notify
+    AFTER INSERT OR UPDATE OR DELETE ON custom_hr_questions
+    FOR EACH ROW EXECUTE FUNCTION notify_interview_settings_changed();
+
+DROP TRIGGER IF EXISTS custom_technical_questions_notify ON custom_technical_questions;
+CREATE TRIGGER custom_technical_questions_notify
+    AFTER INSERT OR UPDATE OR DELETE ON custom_technical_questions
+    FOR EACH ROW EXECUTE FUNCTION notify_interview_settings_changed();
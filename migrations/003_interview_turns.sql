@@ -0,0 +1,16 @@
+-- Turn-level transcript storage. Each candidate/agent utterance is appended
+-- while the interview is running (DatabaseManager.record_turn), so a crash
+-- mid-interview loses at most the last unflushed batch. interview_sessions
+-- then only carries the final metadata; its transcript column may be NULL.
+
+CREATE TABLE IF NOT EXISTS interview_turns (
+    session_id  TEXT        NOT NULL,
+    turn_index  INTEGER     NOT NULL,
+    speaker     TEXT        NOT NULL,
+    stage       TEXT,
+    text        TEXT        NOT NULL,
+    created_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (session_id, turn_index)
+);
+
+ALTER TABLE interview_sessions ALTER COLUMN transcript DROP NOT NULL;
@@ -0,0 +1,34 @@
+-- Sessions and turns are replayed from the local outbox until Postgres
+-- acknowledges them, so the same row can arrive more than once. These unique
+-- keys let the writers use INSERT ... ON CONFLICT DO NOTHING.
+-- (interview_turns already has PRIMARY KEY (session_id, turn_index).)
+--
+-- session_id is now "<room name>_<job id>", unique per session; the room
+-- name, which LiveKit rooms may reuse, is kept in room_name.
+
+ALTER TABLE interview_sessions ADD COLUMN IF NOT EXISTS room_name TEXT;
+
+-- Older agents used the room name as session_id, so existing tables can hold
+-- several rows per session_id and the unique index below would fail to build.
+-- Find them with:
+--   SELECT session_id, count(*) FROM interview_sessions GROUP BY 1 HAVING count(*) > 1;
+-- The statements below keep every row: room_name gets the old id, and all
+-- but the oldest row per id get a ":dup<n>" suffix. Run them before the
+-- index. If CREATE INDEX CONCURRENTLY fails anyway, it leaves an INVALID
+-- index; drop it (DROP INDEX CONCURRENTLY interview_sessions_session_id_key),
+-- dedupe, and run it again.
+
+UPDATE interview_sessions SET room_name = session_id WHERE room_name IS NULL;
+
+UPDATE interview_sessions s
+SET session_id = s.session_id || ':dup' || d.n
+FROM (
+    SELECT ctid, row_number() OVER (PARTITION BY session_id ORDER BY created_at) - 1 AS n
+    FROM interview_sessions
+) d
+WHERE s.ctid = d.ctid AND d.n > 0;
+
+-- CONCURRENTLY cannot run inside a transaction block: run this file with
+-- psql -f (autocommit), not wrapped in BEGIN/COMMIT.
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS interview_sessions_session_id_key
+    ON interview_sessions (session_id);
@@ -0,0 +1,164 @@
+"""
+Multi-Persona Worker
+====================
+One LiveKit worker for every agent persona in this repo, instead of one
+worker (and one set of idle processes and model downloads) per script.
+
+Each job is routed to a persona by, in order:
+    1. the dispatch metadata: "tea" or {"persona": "tea", ...}
+    2. the room metadata, in the same format
+    3. the worker's agent name, if it is a persona name (AGENT_NAME)
+    4. the room name prefix: "tea-1234" -> tea
+    5. DEFAULT_PERSONA (default: interview_fa)
+
+The persona's own entrypoint then runs unchanged. All personas take their
+VAD and API clients from components.Components, which this worker prewarms
+with every VAD preset while the process is idle, so whichever persona a job
+resolves to starts with its models loaded. Each process still runs one job
+and exits; nothing but that prewarm-time loading carries over to the job.
+
+    uv run python multi_agent_worker.py download-files
+    uv run python multi_agent_worker.py start
+
+ENABLED_PERSONAS (comma-separated) limits which personas this worker serves.
+A persona whose dependencies (REQUIRES) are not installed is left out, and
+one whose module fails to import is logged and skipped instead of taking the
+whole worker down; its jobs go to DEFAULT_PERSONA.
+"""
+
+import importlib
+import importlib.util
+import json
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from livekit.agents import JobContext, JobProcess, WorkerOptions, cli
+
+from components import VAD_PRESETS, make_prewarm
+
+load_dotenv(".env")
+
+logger = logging.getLogger("multi-agent-worker")
+logger.setLevel(logging.INFO)
+
+# persona -> module with an `entrypoint(ctx)`
+PERSONAS: Dict[str, str] = {
+    'interview': 'agent4',
+    'interview_test': 'agent3_test',
+    'interview_rules': 'agent3',
+    'interview_fa': 'livekit_basic_interview_DataScience_persian',
+    'interview_fa_avasho': 'livekit_basic_interview_DataScience_persian_2',
+    'interview_fa_3': 'livekit_basic_interview_DataScience_persian_3',
+    'interview_en': 'livekit_basic_interview_DataScience',
+    'interview_en_2': 'livekit_basic_interview_DataScience_2',
+    'interview_en_3': 'livekit_basic_interview_DataScience_3',
+    'tea': 'livekit_basic_tea',
+    'valiasr': 'livekit_valiasr',
+    'restaurant': 'livekit_basic_restaurant_order',
+    'restaurant_fa': 'livekit_basic_restaurant_order_persian',
+    'assistant': 'livekit_basic_agent',
+    'assistant_fa': 'agent2',
+    'mcp': 'livekit_mcp_agent',
+}
+
+# persona -> modules it needs beyond the core agent stack
+REQUIRES: Dict[str, Tuple[str, ...]] = {
+    'interview': ('psycopg', 'psycopg_pool'),  # PostgreSQL-backed (db_manager)
+}
+
+
+def _installed(persona: str) -> bool:
+    missing = [m for m in REQUIRES.get(persona, ()) if importlib.util.find_spec(m) is None]
+    if missing:
+        logger.warning(f"⚠️ Persona {persona} disabled: {', '.join(missing)} not installed")
+    return not missing
+
+
+ENABLED = [
+    p.strip() for p in (os.getenv('ENABLED_PERSONAS') or ','.join(PERSONAS)).split(',')
+    if p.strip() in PERSONAS and _installed(p.strip())
+]
+DEFAULT_PERSONA = os.getenv('DEFAULT_PERSONA', 'interview_fa')
+
+# persona -> import error, per process
+_broken: Dict[str, str] = {}
+
+if 'mcp' in ENABLED:
+    # plugins register their inference runners at import, before the worker starts
+    from livekit.plugins.turn_detector.multilingual import MultilingualModel  # noqa: F401
+
+
+def _persona_from_metadata(metadata: str) -> Optional[str]:
+    metadata = (metadata or '').strip()
+    if not metadata:
+        return None
+    if metadata in PERSONAS:
+        return metadata
+    try:
+        data = json.loads(metadata)
+    except ValueError:
+        return None
+    return data.get('persona') if isinstance(data, dict) else None
+
+
+def resolve_persona(ctx: JobContext) -> str:
+    candidates = [
+        _persona_from_metadata(ctx.job.metadata),
+        _persona_from_metadata(ctx.job.room.metadata),
+        ctx.job.agent_name,
+        ctx.job.room.name.split('-', 1)[0],
+    ]
+    for persona in candidates:
+        if persona in ENABLED and persona not in _broken:
+            return persona
+    return DEFAULT_PERSONA
+
+
+def _load(persona: str):
+    try:
+        module = importlib.import_module(PERSONAS[persona])
+    except Exception as e:
+        _broken[persona] = repr(e)
+        logger.exception(f"❌ Persona {persona} ({PERSONAS[persona]}) failed to import")
+        return None
+    _broken.pop(persona, None)
+    return module
+
+
+def prewarm(proc: JobProcess):
+    make_prewarm(*VAD_PRESETS)(proc)
+    # import the persona modules now so the first job of each persona doesn't pay for it;
+    # a persona that fails to import is skipped, the others still serve
+    for persona in ENABLED:
+        _load(persona)
+    if _broken:
+        logger.warning(f"⚠️ Personas unavailable in this process: {', '.join(_broken)}")
+
+
+async def entrypoint(ctx: JobContext):
+    persona = resolve_persona(ctx)
+    logger.info(f"🎭 Room {ctx.job.room.name} → persona {persona}")
+    module = _load(persona)
+    if module is None and persona != DEFAULT_PERSONA:
+        persona = DEFAULT_PERSONA
+        logger.warning(f"⚠️ Falling back to persona {persona}")
+        module = _load(persona)
+    if module is None:
+        raise RuntimeError(f"persona {persona} is unavailable: {_broken.get(persona)}")
+    await module.entrypoint(ctx)
+
+
+if __name__ == "__main__":
+    if DEFAULT_PERSONA not in ENABLED:
+        raise SystemExit(f"DEFAULT_PERSONA {DEFAULT_PERSONA!r} is not in ENABLED_PERSONAS")
+    idle = os.getenv('NUM_IDLE_PROCESSES')
+    options = dict(
+        entrypoint_fnc=entrypoint,
+        prewarm_fnc=prewarm,
+        agent_name=os.getenv('AGENT_NAME', ''),
+    )
+    if idle:
+        options['num_idle_processes'] = int(idle)
+    cli.run_app(WorkerOptions(**options))
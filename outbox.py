@@ -0,0 +1,298 @@
+"""
+Durable Local Outbox
+====================
+SQLite (WAL mode) outbox that every result goes into before Postgres.
+
+Agents write to the outbox, which is a local fsync'd insert that does not
+depend on the database being reachable. A background drainer pushes due
+entries to Postgres in batches through the registered writer (for example
+WriteBehindQueue.write_batch) and deletes them only once the write succeeded.
+Failed entries are retried with exponential backoff. Entries are keyed, and
+the Postgres side ignores duplicate keys, so replays after a crash are
+idempotent.
+
+A writer returns False when the write may succeed later (database down) and
+raises when the database rejected the rows themselves. A rejected batch is
+retried one row at a time, so the good rows are delivered and only the bad
+ones are moved to the outbox_dead table (with their error) instead of
+blocking their batch forever; requeue_dead() puts them back once fixed.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger("outbox")
+logger.setLevel(logging.INFO)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    kind            TEXT    NOT NULL,
+    key             TEXT    NOT NULL,
+    row             TEXT    NOT NULL,
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL    NOT NULL,
+    created_at      REAL    NOT NULL,
+    last_error      TEXT,
+    PRIMARY KEY (kind, key)
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (next_attempt_at);
+CREATE TABLE IF NOT EXISTS outbox_dead (
+    kind            TEXT    NOT NULL,
+    key             TEXT    NOT NULL,
+    row             TEXT    NOT NULL,
+    attempts        INTEGER NOT NULL,
+    created_at      REAL    NOT NULL,
+    failed_at       REAL    NOT NULL,
+    last_error      TEXT,
+    PRIMARY KEY (kind, key)
+);
+"""
+
+# True: written; False: try again later; raises: the rows were rejected
+BatchWriter = Callable[[List[tuple]], Awaitable[bool]]
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot store {type(value).__name__} in outbox")
+
+
+class Outbox:
+    """Durable keyed outbox drained to Postgres in the background."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        drain_interval: Optional[float] = None,
+        batch_size: int = 100,
+        max_backoff: float = 300.0,
+    ):
+        self.path = path or os.getenv('OUTBOX_PATH', 'outbox.sqlite3')
+        self.drain_interval = drain_interval or float(os.getenv('OUTBOX_DRAIN_INTERVAL', '2'))
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+
+        self._writers: Dict[str, BatchWriter] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+        self.delivered = 0
+        self.failed_attempts = 0
+        self.dead_lettered = 0
+
+    # ---------------- storage (runs in worker threads) ----------------
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(SCHEMA)
+            self._db = db
+        return self._db
+
+    def _insert(self, kind: str, entries: Sequence[tuple]):
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            db.execute("BEGIN")
+            db.executemany(
+                "INSERT OR REPLACE INTO outbox (kind, key, row, attempts, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, 0, ?, ?)",
+                [(kind, key, json.dumps(row, ensure_ascii=False, default=_encode), now, now)
+                 for key, row in entries],
+            )
+            db.execute("COMMIT")
+
+    def _due(self, kind: str) -> List[tuple]:
+        with self._lock:
+            return self._conn().execute(
+                "SELECT key, row, attempts FROM outbox WHERE kind = ? AND next_attempt_at <= ? "
+                "ORDER BY created_at LIMIT ?",
+                (kind, time.time(), self.batch_size),
+            ).fetchall()
+
+    def _delete(self, kind: str, keys: List[str]):
+        with self._lock:
+            db = self._conn()
+            db.execute("BEGIN")
+            db.executemany("DELETE FROM outbox WHERE kind = ? AND key = ?", [(kind, k) for k in keys])
+            db.execute("COMMIT")
+
+    def _reschedule(self, kind: str, pending: List[tuple], error: str):
+        with self._lock:
+            db = self._conn()
+            db.execute("BEGIN")
+            for key, _row, attempts in pending:
+                delay = min(self.max_backoff, self.drain_interval * (2 ** attempts))
+                db.execute(
+                    "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? "
+                    "WHERE kind = ? AND key = ?",
+                    (time.time() + delay, error, kind, key),
+                )
+            db.execute("COMMIT")
+
+    def _bury(self, kind: str, key: str, error: str):
+        with self._lock:
+            db = self._conn()
+            db.execute("BEGIN")
+            db.execute(
+                "INSERT OR REPLACE INTO outbox_dead "
+                "(kind, key, row, attempts, created_at, failed_at, last_error) "
+                "SELECT kind, key, row, attempts + 1, created_at, ?, ? FROM outbox WHERE kind = ? AND key = ?",
+                (time.time(), error, kind, key),
+            )
+            db.execute("DELETE FROM outbox WHERE kind = ? AND key = ?", (kind, key))
+            db.execute("COMMIT")
+
+    def _resurrect(self, kind: Optional[str]) -> int:
+        where, params = ("WHERE kind = ?", (kind,)) if kind else ("", ())
+        with self._lock:
+            db = self._conn()
+            db.execute("BEGIN")
+            db.execute(
+                "INSERT OR REPLACE INTO outbox (kind, key, row, attempts, next_attempt_at, created_at) "
+                f"SELECT kind, key, row, 0, ?, created_at FROM outbox_dead {where}",
+                (time.time(), *params),
+            )
+            count = db.execute(f"DELETE FROM outbox_dead {where}", params).rowcount
+            db.execute("COMMIT")
+        return count
+
+    def _counts(self, table: str = "outbox") -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn().execute(f"SELECT kind, COUNT(*) FROM {table} GROUP BY kind").fetchall()
+        return dict(rows)
+
+    # ---------------- public API ----------------
+    def register(self, kind: str, writer: BatchWriter):
+        """Route entries of this kind to writer(rows) -> bool."""
+        self._writers[kind] = writer
+
+    async def put(self, kind: str, key: str, row: tuple):
+        """Durably store one row; returns once it is on local disk."""
+        await self.put_many(kind, [(key, row)])
+
+    async def put_many(self, kind: str, entries: Sequence[tuple]):
+        """Durably store (key, row) pairs in one local transaction."""
+        await asyncio.to_thread(self._insert, kind, entries)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def requeue_dead(self, kind: Optional[str] = None) -> int:
+        """Move dead-lettered entries (of one kind, or all) back into the outbox."""
+        count = await asyncio.to_thread(self._resurrect, kind)
+        if count and self._wakeup is not None:
+            self._wakeup.set()
+        return count
+
+    def open(self):
+        """Open the SQLite file now (sync, e.g. in prewarm); otherwise on first use."""
+        with self._lock:
+            self._conn()
+
+    def start(self):
+        """Start the background drainer (idempotent); also drains leftovers."""
+        if self._task is not None and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._drain_forever(), name="outbox-drainer")
+
+    async def close(self):
+        """Stop the drainer after one last drain attempt; undelivered rows stay on disk."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.drain_once()
+        logger.info(f"📊 Outbox: {await self.stats()}")
+
+    async def _drain_forever(self):
+        while True:
+            try:
+                await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Outbox drain error: {e}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.drain_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def drain_once(self) -> int:
+        """Push every due entry once; returns how many were delivered."""
+        delivered = 0
+        for kind, writer in self._writers.items():
+            while True:
+                pending = await asyncio.to_thread(self._due, kind)
+                if not pending:
+                    break
+                rows = [tuple(json.loads(row)) for _key, row, _attempts in pending]
+                try:
+                    written = await writer(rows)
+                except Exception as e:
+                    logger.warning(f"⚠️ Outbox batch of {len(rows)} {kind} rows rejected ({e}), writing one by one")
+                    written, count = await self._isolate(kind, writer, pending)
+                    delivered += count
+                    if not written:
+                        break
+                else:
+                    if not written:
+                        self.failed_attempts += 1
+                        await asyncio.to_thread(self._reschedule, kind, pending, "write failed")
+                        break
+                    await asyncio.to_thread(self._delete, kind, [p[0] for p in pending])
+                    delivered += len(pending)
+                if len(pending) < self.batch_size:
+                    break
+        self.delivered += delivered
+        return delivered
+
+    async def _isolate(self, kind: str, writer: BatchWriter, pending: List[tuple]):
+        """
+        Write a rejected batch row by row: good rows are delivered, rejected ones
+        dead-lettered. Returns (still writable, rows delivered); stops with the
+        rest rescheduled as soon as a write fails without a rejection.
+        """
+        delivered = 0
+        for i, entry in enumerate(pending):
+            key, row, _attempts = entry
+            try:
+                written = await writer([tuple(json.loads(row))])
+            except Exception as e:
+                self.dead_lettered += 1
+                logger.error(f"❌ Outbox {kind} row {key} rejected, moved to outbox_dead: {e}")
+                await asyncio.to_thread(self._bury, kind, key, str(e))
+                continue
+            if not written:
+                self.failed_attempts += 1
+                await asyncio.to_thread(self._reschedule, kind, pending[i:], "write failed")
+                return False, delivered
+            await asyncio.to_thread(self._delete, kind, [key])
+            delivered += 1
+        return True, delivered
+
+    async def stats(self) -> dict:
+        return {
+            'pending': await asyncio.to_thread(self._counts),
+            'dead': await asyncio.to_thread(self._counts, "outbox_dead"),
+            'delivered': self.delivered,
+            'failed_attempts': self.failed_attempts,
+            'dead_lettered': self.dead_lettered,
+        }
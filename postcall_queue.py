@@ -0,0 +1,241 @@
+"""
+Post-Call Queue
+===============
+Durable SQLite (WAL mode) queue for work that runs after the call ends.
+
+LLM summaries, evaluations and writing the session report used to run
+inside the live job after the caller hung up, keeping the worker process
+and room slot busy for seconds per call. Agents now enqueue the raw session
+payload instead (a local insert) and return; postcall_worker.py runs a
+separate pool of workers that claims jobs, processes them with a
+concurrency limit, and retries failures with exponential backoff.
+
+Claimed jobs hold a lease; a job whose worker died is claimed again once
+the lease expires. Jobs that keep failing are kept as 'failed' with their
+last error instead of being retried forever.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger("postcall-queue")
+logger.setLevel(logging.INFO)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS postcall_jobs (
+    id              TEXT    PRIMARY KEY,
+    kind            TEXT    NOT NULL,
+    payload         TEXT    NOT NULL,
+    status          TEXT    NOT NULL DEFAULT 'pending',
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL    NOT NULL,
+    lease_until     REAL    NOT NULL DEFAULT 0,
+    created_at      REAL    NOT NULL,
+    last_error      TEXT
+);
+CREATE INDEX IF NOT EXISTS postcall_jobs_due ON postcall_jobs (status, next_attempt_at);
+"""
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+class PostCallQueue:
+    """Durable job queue shared by the agents (producers) and postcall_worker.py."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_attempts: Optional[int] = None,
+        lease: float = 300.0,
+        retry_delay: float = 5.0,
+        max_backoff: float = 600.0,
+    ):
+        self.path = path or os.getenv('POSTCALL_QUEUE_PATH', 'postcall.sqlite3')
+        self.max_attempts = max_attempts or int(os.getenv('POSTCALL_MAX_ATTEMPTS', '5'))
+        self.lease = lease
+        self.retry_delay = retry_delay
+        self.max_backoff = max_backoff
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    # ---------------- storage (runs in worker threads) ----------------
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(SCHEMA)
+            self._db = db
+        return self._db
+
+    def _insert(self, job_id: str, kind: str, payload: dict):
+        now = time.time()
+        with self._lock:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO postcall_jobs (id, kind, payload, status, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, 'pending', ?, ?)",
+                (job_id, kind, json.dumps(payload, ensure_ascii=False), now, now),
+            )
+
+    def _claim(self, limit: int) -> List[tuple]:
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            # IMMEDIATE takes the write lock up front, so two worker processes never claim the same job
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = db.execute(
+                    "SELECT id, kind, payload, attempts FROM postcall_jobs "
+                    "WHERE (status = 'pending' AND next_attempt_at <= ?) "
+                    "   OR (status = 'running' AND lease_until <= ?) "
+                    "ORDER BY created_at LIMIT ?",
+                    (now, now, limit),
+                ).fetchall()
+                db.executemany(
+                    "UPDATE postcall_jobs SET status = 'running', lease_until = ? WHERE id = ?",
+                    [(now + self.lease, row[0]) for row in rows],
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return rows
+
+    def _finish(self, job_id: str):
+        with self._lock:
+            self._conn().execute("DELETE FROM postcall_jobs WHERE id = ?", (job_id,))
+
+    def _fail(self, job_id: str, attempts: int, error: str):
+        attempts += 1
+        with self._lock:
+            if attempts >= self.max_attempts:
+                self._conn().execute(
+                    "UPDATE postcall_jobs SET status = 'failed', attempts = ?, last_error = ? WHERE id = ?",
+                    (attempts, error, job_id),
+                )
+                return
+            delay = min(self.max_backoff, self.retry_delay * (2 ** (attempts - 1)))
+            self._conn().execute(
+                "UPDATE postcall_jobs SET status = 'pending', attempts = ?, next_attempt_at = ?, "
+                "last_error = ? WHERE id = ?",
+                (attempts, time.time() + delay, error, job_id),
+            )
+
+    def _counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT status, COUNT(*) FROM postcall_jobs GROUP BY status"
+            ).fetchall()
+        return dict(rows)
+
+    # ---------------- public API ----------------
+    async def enqueue(self, kind: str, payload: dict, job_id: Optional[str] = None) -> str:
+        """Store a job durably and return its id; re-enqueuing an id replaces it."""
+        job_id = job_id or uuid.uuid4().hex
+        await asyncio.to_thread(self._insert, job_id, kind, payload)
+        return job_id
+
+    async def claim(self, limit: int) -> List[tuple]:
+        """Lease up to limit due jobs as (id, kind, payload, attempts)."""
+        rows = await asyncio.to_thread(self._claim, limit)
+        return [(job_id, kind, json.loads(payload), attempts) for job_id, kind, payload, attempts in rows]
+
+    async def finish(self, job_id: str):
+        await asyncio.to_thread(self._finish, job_id)
+
+    async def fail(self, job_id: str, attempts: int, error: str):
+        await asyncio.to_thread(self._fail, job_id, attempts, error)
+
+    async def stats(self) -> Dict[str, int]:
+        return await asyncio.to_thread(self._counts)
+
+
+class PostCallWorker:
+    """Processes queued jobs with at most `concurrency` running at once."""
+
+    def __init__(self, queue: PostCallQueue, handlers: Dict[str, Handler], concurrency: int = 4,
+                 poll_interval: float = 1.0):
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._running: set = set()
+
+        self.done = 0
+        self.failed = 0
+
+    async def run_forever(self):
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.poll_interval)
+
+    async def run_once(self) -> int:
+        """Claim as many jobs as there are free slots and start them."""
+        free = self.concurrency - len(self._running)
+        if free <= 0:
+            return 0
+        jobs = await self.queue.claim(free)
+        for job in jobs:
+            task = asyncio.create_task(self._process(*job), name=f"postcall-{job[0]}")
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+        return len(jobs)
+
+    async def drain(self):
+        """Run until the queue has no due jobs and nothing is running."""
+        while await self.run_once() or self._running:
+            if self._running:
+                await asyncio.wait(self._running, return_when=asyncio.FIRST_COMPLETED)
+
+    async def _process(self, job_id: str, kind: str, payload: dict, attempts: int):
+        handler = self.handlers.get(kind)
+        started = time.perf_counter()
+        try:
+            if handler is None:
+                raise LookupError(f"no handler for job kind {kind!r}")
+            await handler(payload)
+        except asyncio.CancelledError:
+            raise  # the lease expires and another worker picks it up
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"❌ Post-call job {job_id} ({kind}) failed, attempt {attempts + 1}: {e}")
+            await self.queue.fail(job_id, attempts, f"{type(e).__name__}: {e}")
+            return
+        await self.queue.finish(job_id)
+        self.done += 1
+        logger.info(f"✅ Post-call job {job_id} ({kind}) done in {time.perf_counter() - started:.1f}s")
+
+
+SESSION_REPORT = "session_report"
+
+
+async def enqueue_session_report(output_file: str, record: dict, summaries: Dict[str, Optional[str]]) -> str:
+    """
+    Queue a session report: the worker fills record[name] with the LLM
+    result of each prompt in summaries and writes record to output_file.
+    """
+    payload = {'output_file': output_file, 'record': record, 'summaries': summaries}
+    job_id = await postcall_queue().enqueue(SESSION_REPORT, payload)
+    logger.info(f"📨 Queued post-call report {job_id} → {output_file}")
+    return job_id
+
+
+# one queue per process for the agents to enqueue into
+_shared_queue: Optional[PostCallQueue] = None
+
+
+def postcall_queue() -> PostCallQueue:
+    global _shared_queue
+    if _shared_queue is None:
+        _shared_queue = PostCallQueue()
+    return _shared_queue
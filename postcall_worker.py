@@ -0,0 +1,87 @@
+"""
+Post-Call Worker
+================
+Runs the jobs the agents queue after a call (postcall_queue): LLM
+summaries and evaluations, then writing the session report. Runs as its
+own process, next to the LiveKit workers, and shares the queue file with
+them (POSTCALL_QUEUE_PATH).
+
+Usage:
+    uv run python postcall_worker.py --concurrency 4   # run until stopped
+    uv run python postcall_worker.py --once            # drain due jobs and exit
+    uv run python postcall_worker.py --stats           # job counts by status
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import uuid
+
+from dotenv import load_dotenv
+from livekit.plugins import openai
+
+from postcall_queue import SESSION_REPORT, PostCallWorker, postcall_queue
+from summarizer import Summarizer
+
+load_dotenv(".env")
+
+logger = logging.getLogger("postcall-worker")
+logger.setLevel(logging.INFO)
+
+
+def _write_json(path: str, data: dict):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def make_handlers(summarizer: Summarizer) -> dict:
+    async def session_report(payload: dict):
+        prompts = payload.get('summaries') or {}
+        results = await summarizer.summarize_many(prompts)
+        missing = [name for name, prompt in prompts.items() if prompt and results[name] is None]
+        if missing:
+            # retried later; summaries that did succeed are cached already
+            raise RuntimeError(f"LLM summary failed for {', '.join(missing)}")
+        record = dict(payload['record'])
+        record.update(results)
+        await asyncio.to_thread(_write_json, payload['output_file'], record)
+
+    return {SESSION_REPORT: session_report}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv('POSTCALL_CONCURRENCY', '4')))
+    parser.add_argument("--once", action="store_true", help="process due jobs, then exit")
+    parser.add_argument("--stats", action="store_true", help="print job counts and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    queue = postcall_queue()
+    if args.stats:
+        print(await queue.stats())
+        return
+
+    model = openai.LLM(model=os.getenv("LLM_CHOICE", "gpt-4.1-mini"))
+    summarizer = Summarizer(model, concurrency=args.concurrency)
+    worker = PostCallWorker(queue, make_handlers(summarizer), concurrency=args.concurrency)
+    logger.info(f"🛠️ Post-call worker on {queue.path}, concurrency {args.concurrency}")
+    try:
+        if args.once:
+            await worker.drain()
+        else:
+            await worker.run_forever()
+    finally:
+        logger.info(f"📊 Post-call worker: done={worker.done} failed={worker.failed} "
+                    f"summaries={summarizer.stats()} queue={await queue.stats()}")
+        await model.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
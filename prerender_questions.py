@@ -0,0 +1,127 @@
+"""
+Question Audio Pre-renderer
+===========================
+Renders every line an interview can say — greeting, profile prompts,
+section intros, acknowledgements, retry prompts, closing, and every active
+question in custom_hr_questions / custom_technical_questions — for each
+configured voice, into the shared TTS audio cache (tts_cache.AudioCache,
+TTS_CACHE_DIR). The agents then play these lines with no TTS round trip,
+including the first question.
+
+The cache is content-addressed (provider, voice, speed, normalized text),
+so runs are incremental: lines whose hash is already stored are skipped and
+only new or edited question_text rows are rendered. Run it after questions
+change, e.g. from cron or a deploy hook:
+
+    uv run python prerender_questions.py                 # all settings rows
+    uv run python prerender_questions.py --settings-id 3 --concurrency 8
+    uv run python prerender_questions.py --voice sage --dry-run
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from livekit.plugins import openai
+
+from db_manager import DatabaseManager
+from interview_flow import compile_flow
+from tts_cache import CachedTTS, shared_audio_cache
+
+logger = logging.getLogger("prerender")
+logger.setLevel(logging.INFO)
+
+DEFAULT_VOICE = "alloy"  # agent4 falls back to the same voice
+
+
+async def collect_lines(db: DatabaseManager, settings_ids: list, extra_voices: list) -> dict:
+    """voice -> ordered unique lines for the given (or all) settings rows."""
+    if not settings_ids:
+        rows = await db.execute_query_async("SELECT id FROM interview_settings ORDER BY id")
+        settings_ids = [row['id'] for row in rows or []]
+
+    lines = {}
+    for settings_id in settings_ids:
+        settings = await db.get_interview_settings_async(settings_id)
+        texts = compile_flow(settings).spoken_texts()
+        for voice in [settings.get('voice') or DEFAULT_VOICE, *extra_voices]:
+            lines.setdefault(voice, {}).update(dict.fromkeys(texts))
+    return {voice: list(texts) for voice, texts in lines.items()}
+
+
+async def render_all(lines: dict, concurrency: int, retries: int, dry_run: bool) -> dict:
+    cache = shared_audio_cache()
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {'rendered': 0, 'skipped': 0, 'failed': 0, 'bytes': 0}
+
+    async def render_one(engine: CachedTTS, text: str):
+        if await cache.contains(engine.cache_key(text)):
+            counts['skipped'] += 1
+            return
+        if dry_run:
+            logger.info(f"🆕 [{engine.voice}] {text[:60]}")
+            counts['rendered'] += 1
+            return
+        async with semaphore:
+            for attempt in range(retries + 1):
+                try:
+                    counts['bytes'] += await engine.render(text)
+                    counts['rendered'] += 1
+                    return
+                except Exception as e:
+                    if attempt == retries:
+                        logger.error(f"❌ [{engine.voice}] {text[:40]!r}: {e}")
+                        counts['failed'] += 1
+                        return
+                    delay = 2 ** attempt
+                    logger.warning(f"⚠️ [{engine.voice}] retry {attempt + 1} in {delay}s: {e}")
+                    await asyncio.sleep(delay)
+
+    engines = []
+    tasks = []
+    for voice, texts in lines.items():
+        # same wrapper (and therefore same cache keys) as the agents use
+        engine = CachedTTS(openai.TTS(voice=voice), voice=voice, cache=cache)
+        engines.append(engine)
+        tasks += [render_one(engine, text) for text in texts]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for engine in engines:
+            await engine.aclose()
+    return counts
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--settings-id", type=int, action="append", help="only these settings rows (default: all)")
+    parser.add_argument("--voice", action="append", default=[], help="also render for this voice")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--dry-run", action="store_true", help="only list what would be rendered")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = DatabaseManager()
+    await db.open()
+    try:
+        lines = await collect_lines(db, args.settings_id, args.voice)
+    finally:
+        await db.close()
+
+    started = time.perf_counter()
+    counts = await render_all(lines, args.concurrency, args.retries, args.dry_run)
+    logger.info(
+        f"✅ {sum(len(t) for t in lines.values())} lines for {len(lines)} voices: "
+        f"{counts['rendered']} rendered, {counts['skipped']} already cached, {counts['failed']} failed, "
+        f"{counts['bytes'] / 1024 / 1024:.1f} MB in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+"""
+Rolling Summary
+===============
+Running interview summary that is kept up to date during the call.
+
+The interview agents used to send the whole candidate record to the LLM in
+one prompt when the call ended, so the final summary got slower and the
+prompt bigger the longer the interview ran. RollingSummary instead folds
+each completed answer into a compact running summary in a background task
+(previous summary + new answers → new summary) while the next question is
+being spoken. By the time the interview finishes, only the last answer is
+still being folded in and result() returns almost immediately.
+
+Answers given while an update is running are folded together in the next
+update. If an update fails, its answers stay queued and are retried with
+the next answer or by result().
+"""
+
+import asyncio
+import logging
+from typing import List, Optional, Set, Tuple
+
+from livekit.agents import llm
+
+from summarizer import Summarizer
+
+logger = logging.getLogger("rolling-summary")
+logger.setLevel(logging.INFO)
+
+DEFAULT_INSTRUCTIONS = (
+    "خلاصه فعلی مصاحبه را با پاسخ‌های جدید به‌روز کن. "
+    "خلاصه رسمی و فشرده باشد، نکات مهم پاسخ‌های قبلی حفظ شود "
+    "و حداکثر {max_words} کلمه باشد. فقط متن خلاصه را برگردان."
+)
+
+
+class RollingSummary:
+    """Incremental LLM summary of question/answer pairs, updated in the background."""
+
+    def __init__(self, model: llm.LLM, instructions: str = DEFAULT_INSTRUCTIONS, max_words: int = 150):
+        self.instructions = instructions.format(max_words=max_words)
+        # every update's prompt embeds the previous summary, so it never repeats: no cache
+        self._summarizer = Summarizer(model, concurrency=1, cache_size=0, track_requests=True)
+        self._pending: List[Tuple[str, str]] = []
+        self._batch: List[Tuple[str, str]] = []
+        self._task: Optional[asyncio.Task] = None
+
+        self.summary = ""
+        self.answers = 0
+        self.updates = 0
+        self.failures = 0
+
+    def add(self, question: str, answer: str):
+        """Queue one answer; returns at once, the update runs in the background."""
+        self._pending.append((question, answer))
+        self.answers += 1
+        self._ensure_running()
+
+    async def result(self) -> Optional[str]:
+        """
+        The summary with every added answer folded in, waiting for a running
+        update. None if an update still fails, so callers can fall back to
+        summarizing the full record.
+        """
+        if self._task is not None:
+            await asyncio.shield(self._task)
+        if self._pending:
+            # retry what failed earlier, once
+            self._ensure_running()
+            await asyncio.shield(self._task)
+        if self._pending or not self.summary:
+            return None
+        return self.summary
+
+    def unsummarized(self) -> List[Tuple[str, str]]:
+        """Added pairs that are not in summary yet (being folded in or queued)."""
+        return self._batch + self._pending
+
+    @property
+    def request_ids(self) -> Set[str]:
+        """Ids of the LLM requests made for the updates (to tell their metrics apart)."""
+        return self._summarizer.request_ids
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="rolling-summary")
+
+    def prompt(self, batch: List[Tuple[str, str]]) -> str:
+        answers = "\n".join(f"سوال: {question}\nپاسخ: {answer}" for question, answer in batch)
+        return (
+            f"{self.instructions}\n\n"
+            f"خلاصه فعلی:\n{self.summary or '(هنوز خالی)'}\n\n"
+            f"پاسخ‌های جدید:\n{answers}"
+        )
+
+    async def _run(self):
+        while self._pending:
+            batch, self._pending = self._pending, []
+            self._batch = batch
+            summary = await self._summarizer.summarize(self.prompt(batch))
+            self._batch = []
+            if summary is None:
+                self.failures += 1
+                self._pending = batch + self._pending
+                logger.warning(f"⚠️ Rolling summary update failed; {len(self._pending)} answers pending")
+                return
+            self.summary = summary
+            self.updates += 1
+
+    def stats(self) -> dict:
+        return {
+            'answers': self.answers,
+            'updates': self.updates,
+            'failures': self.failures,
+            'pending': len(self._pending),
+            'summary_chars': len(self.summary),
+        }
@@ -0,0 +1,109 @@
+"""
+Scripted Mode
+=============
+Base class for rule-driven agents that decide every reply themselves.
+
+A plain Agent answers each finished user turn with an LLM reply built from
+its instructions. The scripted agents (interview flow, tea shop, Tat shop)
+also speak their own scripted reply for the same turn, so every turn paid
+for an LLM call whose answer raced the script. ScriptedAgent instead hands
+the transcript to on_user_spoke() and raises StopResponse, so the session
+never generates a reply on its own. The LLM is only called explicitly,
+e.g. for summaries or llm_fallback().
+
+Turns are handled one at a time, in order, in background tasks, so a long
+say_sequence() never blocks the session's turn handling. LLM calls on the
+session's LLM are counted per session and logged when the agent exits.
+
+Subclasses implement:
+    async def on_start(self, session)             # after the agent enters (optional)
+    async def on_user_spoke(self, session, text)  # every final user turn (abstract)
+"""
+
+import abc
+import asyncio
+import logging
+from typing import Optional, Set
+
+from livekit.agents import Agent, AgentSession, StopResponse, llm
+from livekit.agents.metrics import LLMMetrics
+
+logger = logging.getLogger("scripted-mode")
+logger.setLevel(logging.INFO)
+
+
+class ScriptedAgent(Agent, metaclass=abc.ABCMeta):
+    """Agent whose replies come from code, never from automatic LLM turns."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._turn_lock = asyncio.Lock()
+        self._tasks: Set[asyncio.Task] = set()
+        self._counted_llm: Optional[llm.LLM] = None
+
+        self.scripted_turns = 0
+        self.llm_calls = 0
+        self.llm_prompt_tokens = 0
+        self.llm_completion_tokens = 0
+
+    # ---------------- hooks for subclasses ----------------
+    async def on_start(self, session: AgentSession):
+        pass
+
+    @abc.abstractmethod
+    async def on_user_spoke(self, session: AgentSession, text: str):
+        """Handle one final user turn; a subclass without it fails at construction."""
+
+    async def llm_fallback(self, instructions: str):
+        """Explicit, off-script LLM reply (counted like any other LLM call)."""
+        await self.session.generate_reply(instructions=instructions)
+
+    # ---------------- framework hooks ----------------
+    async def on_enter(self):
+        session = self.session
+        if session.llm is not None:
+            self._counted_llm = session.llm
+            self._counted_llm.on("metrics_collected", self._count_llm_call)
+        self._spawn(self.on_start(session))
+
+    async def on_user_turn_completed(self, turn_ctx: llm.ChatContext, new_message: llm.ChatMessage):
+        text = (new_message.text_content or "").strip()
+        if text:
+            self.scripted_turns += 1
+            self._spawn(self.on_user_spoke(self.session, text))
+        # the scripted handler speaks instead; no automatic LLM reply
+        raise StopResponse()
+
+    async def on_exit(self):
+        # running turns finish on their own (e.g. the final save)
+        if self._counted_llm is not None:
+            self._counted_llm.off("metrics_collected", self._count_llm_call)
+        logger.info(f"📊 Scripted session: {self.llm_stats()}")
+
+    # ---------------- internals ----------------
+    def _spawn(self, coro):
+        async def run():
+            async with self._turn_lock:
+                try:
+                    await coro
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("❌ Scripted turn failed")
+
+        task = asyncio.create_task(run(), name="scripted-turn")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _count_llm_call(self, metrics: LLMMetrics):
+        self.llm_calls += 1
+        self.llm_prompt_tokens += metrics.prompt_tokens
+        self.llm_completion_tokens += metrics.completion_tokens
+
+    def llm_stats(self) -> dict:
+        return {
+            'scripted_turns': self.scripted_turns,
+            'llm_calls': self.llm_calls,
+            'llm_prompt_tokens': self.llm_prompt_tokens,
+            'llm_completion_tokens': self.llm_completion_tokens,
+        }
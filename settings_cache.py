@@ -0,0 +1,116 @@
+"""
+Settings Cache
+==============
+Process-wide async TTL cache with LRU eviction and single-flight loading.
+
+Used by DatabaseManager for interview settings and question banks: when many
+rooms start at once and ask for the same settings_id, only one load runs and
+every caller shares its result. Entries can be invalidated explicitly (e.g.
+from Postgres LISTEN/NOTIFY) and the cache keeps hit/miss counters.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger("settings-cache")
+logger.setLevel(logging.INFO)
+
+
+class AsyncTTLCache:
+    """TTL + size-bounded LRU cache whose misses are loaded single-flight."""
+
+    def __init__(self, ttl: float = 300.0, max_size: int = 256, name: str = "cache"):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.name = name
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        # bumped on invalidation so a load that started earlier is not stored
+        self._versions: Dict[Hashable, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Return the cached value for key, loading it with loader() on a miss.
+
+        Concurrent misses for the same key share one in-flight load. A loader
+        result of None is returned but not cached.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+
+        # shield: a cancelled caller must not cancel the load for the others
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        version = self._versions.get(key, 0)
+        value = await loader()
+        if value is not None and self._versions.get(key, 0) == version:
+            self._store(key, value)
+        return value
+
+    def _store(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop one key (and make any in-flight load for it non-cacheable)."""
+        self._versions[key] = self._versions.get(key, 0) + 1
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+            return True
+        return False
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Drop every entry for which predicate(key, value) is true."""
+        keys = [k for k, (_, v) in self._entries.items() if predicate(k, v)]
+        for key in keys:
+            self.invalidate(key)
+        return len(keys)
+
+    def clear(self):
+        for key in list(self._entries) + list(self._inflight):
+            self.invalidate(key)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'name': self.name,
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_ratio': round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,179 @@
+"""
+Speech Sequencer
+================
+Plays several utterances back to back without fixed sleeps.
+
+session.say() only starts synthesizing an utterance once the previous one
+has finished playing, and the agents used to add asyncio.sleep(0.3 / 0.5)
+on top of that. say_sequence() instead starts synthesizing utterance N+1
+while utterance N is playing, hands the audio to session.say(audio=...),
+and waits a configurable gap measured from the end of the actual playout.
+If the candidate interrupts, the remaining utterances are dropped.
+
+Lookahead goes one step further: while the candidate is still answering it
+pre-synthesizes the utterances the agent is likely to say next (the next
+question, the retry prompt, the stage transition). say_sequence() plays
+those without waiting for TTS, and the ones whose branch was not taken are
+discarded and counted as wasted bytes.
+"""
+
+import asyncio
+import logging
+import os
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from livekit import rtc
+from livekit.agents import AgentSession, tts
+
+logger = logging.getLogger("speech-sequencer")
+logger.setLevel(logging.INFO)
+
+_END = object()
+
+
+def default_gap() -> float:
+    """Silence between utterances, in seconds (SPEECH_GAP_MS, default 150)."""
+    return float(os.getenv('SPEECH_GAP_MS', '150')) / 1000
+
+
+class _Prefetch:
+    """Synthesizes one utterance in the background into a frame queue."""
+
+    def __init__(self, engine: tts.TTS, text: str):
+        self.text = text
+        self.bytes = 0
+        self._frames: asyncio.Queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run(engine), name="speech-prefetch")
+
+    async def _run(self, engine: tts.TTS):
+        try:
+            async with engine.synthesize(self.text) as stream:
+                async for audio in stream:
+                    self.bytes += audio.frame.data.nbytes
+                    self._frames.put_nowait(audio.frame)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Pre-synthesis failed for {self.text[:40]!r}: {e}")
+        finally:
+            self._frames.put_nowait(_END)
+
+    async def frames(self) -> AsyncIterator[rtc.AudioFrame]:
+        while True:
+            frame = await self._frames.get()
+            if frame is _END:
+                return
+            yield frame
+
+    def cancel(self):
+        self._task.cancel()
+
+
+class Lookahead:
+    """Speculative pre-synthesis of the agent's likely next utterances."""
+
+    def __init__(self, max_items: int = 4):
+        self.max_items = max_items
+        self._ready: Dict[str, _Prefetch] = {}
+        # kept so their byte counts include audio synthesized after take()
+        self._used: List[_Prefetch] = []
+
+        self.wasted = 0
+        self.wasted_bytes = 0
+
+    def prepare(self, session: AgentSession, texts: Iterable[str]):
+        """
+        Start synthesizing texts in the background. Prepared utterances not
+        in texts belong to a branch that was not taken and are discarded.
+        """
+        wanted = [t for t in dict.fromkeys(texts) if t][:self.max_items]
+        for text in list(self._ready):
+            if text not in wanted:
+                self._discard(self._ready.pop(text))
+        if session.tts is None:
+            return
+        for text in wanted:
+            if text not in self._ready:
+                self._ready[text] = _Prefetch(session.tts, text)
+
+    def take(self, text: str) -> Optional[_Prefetch]:
+        prefetch = self._ready.pop(text, None)
+        if prefetch is not None:
+            self._used.append(prefetch)
+        return prefetch
+
+    def _discard(self, prefetch: _Prefetch):
+        prefetch.cancel()
+        self.wasted += 1
+        self.wasted_bytes += prefetch.bytes
+
+    def close(self):
+        for prefetch in self._ready.values():
+            self._discard(prefetch)
+        self._ready.clear()
+
+    def stats(self) -> dict:
+        used_bytes = sum(p.bytes for p in self._used)
+        total = used_bytes + self.wasted_bytes
+        return {
+            'used': len(self._used),
+            'wasted': self.wasted,
+            'used_bytes': used_bytes,
+            'wasted_bytes': self.wasted_bytes,
+            'waste_ratio': round(self.wasted_bytes / total, 3) if total else 0.0,
+        }
+
+
+async def say_sequence(
+    session: AgentSession,
+    utterances: Sequence[Tuple[str, bool]],
+    gap: Optional[float] = None,
+    engine: Optional[tts.TTS] = None,
+    lookahead: Optional[Lookahead] = None,
+) -> bool:
+    """
+    Speak (text, allow_interruptions) pairs in order as one pipeline.
+    Utterances already prepared by lookahead are played from it.
+
+    Returns False if the candidate interrupted and the rest was dropped.
+    """
+    utterances = [(text, allow) for text, allow in utterances if text]
+    if not utterances:
+        return True
+    gap = default_gap() if gap is None else gap
+    engine = engine or session.tts
+
+    if engine is None:
+        # no TTS to pre-synthesize with (e.g. a realtime model): plain say()
+        for i, (text, allow_interruptions) in enumerate(utterances):
+            if i and gap:
+                await asyncio.sleep(gap)
+            handle = session.say(text, allow_interruptions=allow_interruptions)
+            await handle
+            if handle.interrupted:
+                return False
+        return True
+
+    def prefetch(text: str) -> _Prefetch:
+        prepared = lookahead.take(text) if lookahead is not None else None
+        return prepared or _Prefetch(engine, text)
+
+    pending: List[_Prefetch] = [prefetch(utterances[0][0])]
+    try:
+        for i, (text, allow_interruptions) in enumerate(utterances):
+            current = pending[i]
+            # the next utterance synthesizes while this one plays
+            if i + 1 < len(utterances):
+                pending.append(prefetch(utterances[i + 1][0]))
+
+            handle = session.say(text, audio=current.frames(), allow_interruptions=allow_interruptions)
+            await handle  # resolves when playout has actually finished
+            if handle.interrupted:
+                logger.info(f"⏹️ Interrupted, dropping {len(utterances) - i - 1} queued utterances")
+                return False
+            if gap and i + 1 < len(utterances):
+                await asyncio.sleep(gap)
+        return True
+    finally:
+        for prefetch in pending:
+            prefetch.cancel()
@@ -0,0 +1,134 @@
+"""
+Summarizer
+==========
+End-of-session summaries through the session's LLM, concurrent and cached.
+
+The interview agents used to summarize each section (education,
+experience, technical) with its own awaited LLM call, one after the other,
+so closing took the sum of three round trips. summarize_many() runs them
+concurrently under a semaphore instead, so it takes about as long as the
+slowest one.
+
+Every prompt is addressed by sha256(model, prompt):
+- identical prompts in flight at the same time share one LLM call
+- results are kept in a bounded in-memory LRU (SUMMARY_CACHE_SIZE entries,
+  default 256), so a post-call job retried after one of its summaries
+  failed only pays for the ones that are missing
+
+Summaries contain candidate answers, so they are never written to disk;
+the post-call queue already persists the prompts and replays them after a
+crash or restart.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from typing import Dict, Mapping, Optional, Set
+
+from livekit.agents import llm
+
+logger = logging.getLogger("summarizer")
+logger.setLevel(logging.INFO)
+
+
+class Summarizer:
+    """Concurrent, deduplicated, LRU-cached LLM summaries."""
+
+    def __init__(
+        self,
+        model: llm.LLM,
+        concurrency: int = 3,
+        cache_size: Optional[int] = None,
+        track_requests: bool = False,
+    ):
+        self.llm = model
+        self.cache_size = cache_size if cache_size is not None else int(os.getenv("SUMMARY_CACHE_SIZE", "256"))
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._limit = asyncio.Semaphore(concurrency)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # with track_requests, ids of this summarizer's LLM requests, so listeners on
+        # a shared LLM can tell its metrics apart (LLMMetrics.request_id)
+        self.track_requests = track_requests
+        self.request_ids: Set[str] = set()
+
+        self.calls = 0
+        self.cache_hits = 0
+        self.deduped = 0
+
+    def cache_key(self, prompt: str) -> str:
+        model = getattr(self.llm, "model", "") or ""
+        return hashlib.sha256(f"{model}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    # ---------------- cache ----------------
+    def _get(self, key: str) -> Optional[str]:
+        summary = self._cache.get(key)
+        if summary is not None:
+            self._cache.move_to_end(key)
+        return summary
+
+    def _put(self, key: str, summary: str):
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = summary
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # ---------------- summaries ----------------
+    async def summarize(self, prompt: str) -> Optional[str]:
+        """Summary for one prompt; None if the LLM call failed."""
+        key = self.cache_key(prompt)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.deduped += 1
+            return await asyncio.shield(task)
+        task = asyncio.create_task(self._summarize(key, prompt))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def summarize_many(self, prompts: Mapping[str, Optional[str]]) -> Dict[str, Optional[str]]:
+        """Summaries keyed like prompts, all run concurrently; None prompts stay None."""
+        names = [name for name, prompt in prompts.items() if prompt]
+        results = await asyncio.gather(*(self.summarize(prompts[name]) for name in names))
+        summaries = dict.fromkeys(prompts)
+        summaries.update(zip(names, results))
+        return summaries
+
+    async def _summarize(self, key: str, prompt: str) -> Optional[str]:
+        cached = self._get(key)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+
+        async with self._limit:
+            self.calls += 1
+            try:
+                summary = await self._complete(prompt)
+            except Exception as e:
+                logger.error(f"❌ Summary failed: {e}")
+                return None
+        self._put(key, summary)
+        return summary
+
+    async def _complete(self, prompt: str) -> str:
+        chat_ctx = llm.ChatContext.empty()
+        chat_ctx.add_message(role="user", content=prompt)
+        parts = []
+        async with self.llm.chat(chat_ctx=chat_ctx) as stream:
+            async for chunk in stream:
+                if self.track_requests and chunk.id:
+                    self.request_ids.add(chunk.id)
+                if chunk.delta is not None and chunk.delta.content:
+                    parts.append(chunk.delta.content)
+        return "".join(parts).strip()
+
+    def stats(self) -> dict:
+        return {
+            'calls': self.calls,
+            'cache_hits': self.cache_hits,
+            'deduped': self.deduped,
+            'cached': len(self._cache),
+        }
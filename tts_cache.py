@@ -0,0 +1,326 @@
+"""
+TTS Audio Cache
+===============
+Content-addressed cache of synthesized speech for the scripted agents.
+
+Almost everything the rule-driven agents say is fixed text (greetings,
+acknowledgements, retry prompts, questions from the DB), so CachedTTS wraps
+any LiveKit TTS and stores the PCM it produces under
+sha256(provider, model and options of the wrapped TTS, voice, speed,
+sample rate, channels, normalized text), so changing the model or the
+instructions never replays audio rendered with the old configuration.
+
+- hot tier: bytes in memory, LRU, bounded by TTS_CACHE_HOT_MB
+- disk tier: one .pcm file per entry in TTS_CACHE_DIR, LRU by mtime,
+  bounded by TTS_CACHE_MAX_MB; survives restarts and is shared by workers
+
+A hit is pushed straight into the audio emitter, with no network round trip;
+a miss is synthesized by the wrapped TTS, streamed out as it arrives, and
+stored once complete. Retries happen in CachedTTS's own stream only; the
+wrapped stream runs with max_retry=0 so a failing provider is not retried
+at both layers.
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import time
+import unicodedata
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    APIConnectOptions,
+    tts,
+    utils,
+)
+
+logger = logging.getLogger("tts-cache")
+logger.setLevel(logging.INFO)
+
+
+def normalize_text(text: str) -> str:
+    """Cache-key form of an utterance: NFC with collapsed whitespace."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+# attributes that never go into a cache key
+_SECRET_HINTS = ("token", "key", "secret", "password")
+
+
+def tts_config(engine: tts.TTS) -> str:
+    """
+    Cache-key form of a TTS's configuration: its model plus the plain
+    (str/number/bool) fields of its options (`_opts` for the LiveKit
+    plugins, public attributes otherwise), without credentials.
+    """
+    opts = getattr(engine, "_opts", None)
+    if dataclasses.is_dataclass(opts):
+        fields = {f.name: getattr(opts, f.name) for f in dataclasses.fields(opts)}
+    else:
+        fields = {name: value for name, value in vars(engine).items() if not name.startswith("_")}
+    config = {
+        name: value for name, value in fields.items()
+        if isinstance(value, (str, int, float, bool)) and not any(h in name.lower() for h in _SECRET_HINTS)
+    }
+    config.setdefault("model", str(getattr(engine, "model", "") or ""))
+    return json.dumps(config, sort_keys=True, ensure_ascii=False)
+
+
+class AudioCache:
+    """Two-tier (memory + disk) LRU store of PCM blobs keyed by hex digest."""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        hot_max_bytes: Optional[int] = None,
+    ):
+        self.directory = directory or os.getenv('TTS_CACHE_DIR', '.tts_cache')
+        self.max_bytes = max_bytes or int(float(os.getenv('TTS_CACHE_MAX_MB', '200')) * 1024 * 1024)
+        self.hot_max_bytes = hot_max_bytes or int(float(os.getenv('TTS_CACHE_HOT_MB', '16')) * 1024 * 1024)
+
+        self._hot: "OrderedDict[str, bytes]" = OrderedDict()
+        self._hot_bytes = 0
+        # disk index: key -> size, oldest first
+        self._index: Optional["OrderedDict[str, int]"] = None
+        self._disk_bytes = 0
+        self._lock = asyncio.Lock()
+
+        self.hot_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ---------------- disk (runs in worker threads) ----------------
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.pcm")
+
+    def _scan(self) -> "OrderedDict[str, int]":
+        entries = []
+        if os.path.isdir(self.directory):
+            for root, _dirs, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith(".pcm"):
+                        st = os.stat(os.path.join(root, name))
+                        entries.append((st.st_mtime, name[:-4], st.st_size))
+        entries.sort()
+        return OrderedDict((key, size) for _mtime, key, size in entries)
+
+    def _read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # recency survives restarts
+            return data
+        except FileNotFoundError:
+            return None  # evicted by another worker
+
+    def _write(self, key: str, data: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _unlink(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    # ---------------- tiers ----------------
+    async def _ensure_index(self):
+        if self._index is None:
+            async with self._lock:
+                if self._index is None:
+                    self._index = await asyncio.to_thread(self._scan)
+                    self._disk_bytes = sum(self._index.values())
+
+    def _remember_hot(self, key: str, data: bytes):
+        if len(data) > self.hot_max_bytes:
+            return
+        old = self._hot.pop(key, None)
+        if old is not None:
+            self._hot_bytes -= len(old)
+        self._hot[key] = data
+        self._hot_bytes += len(data)
+        while self._hot_bytes > self.hot_max_bytes:
+            _key, evicted = self._hot.popitem(last=False)
+            self._hot_bytes -= len(evicted)
+
+    def get_hot(self, key: str) -> Optional[bytes]:
+        data = self._hot.get(key)
+        if data is not None:
+            self._hot.move_to_end(key)
+            self.hot_hits += 1
+        return data
+
+    async def get(self, key: str) -> Optional[bytes]:
+        data = self.get_hot(key)
+        if data is not None:
+            return data
+        await self._ensure_index()
+        # also read keys missing from the index: another process (e.g.
+        # prerender_questions.py) may have written them since the scan
+        data = await asyncio.to_thread(self._read, key)
+        if data is not None:
+            self._disk_bytes += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self._remember_hot(key, data)
+            self.disk_hits += 1
+            return data
+        if key in self._index:
+            self._disk_bytes -= self._index.pop(key)
+        self.misses += 1
+        return None
+
+    async def contains(self, key: str) -> bool:
+        """True if key is stored in either tier (does not count as a lookup)."""
+        if key in self._hot:
+            return True
+        await self._ensure_index()
+        return key in self._index or await asyncio.to_thread(os.path.exists, self._path(key))
+
+    async def put(self, key: str, data: bytes):
+        self._remember_hot(key, data)
+        await self._ensure_index()
+        await asyncio.to_thread(self._write, key, data)
+        self._disk_bytes += len(data) - self._index.pop(key, 0)
+        self._index[key] = len(data)
+
+        evict = []
+        while self._disk_bytes > self.max_bytes and len(self._index) > 1:
+            old_key, size = self._index.popitem(last=False)
+            self._disk_bytes -= size
+            evict.append(old_key)
+        for old_key in evict:
+            await asyncio.to_thread(self._unlink, old_key)
+        self.evictions += len(evict)
+
+    def stats(self) -> dict:
+        lookups = self.hot_hits + self.disk_hits + self.misses
+        return {
+            'hot_hits': self.hot_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hot_bytes': self._hot_bytes,
+            'disk_bytes': self._disk_bytes,
+            'hit_ratio': round((self.hot_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+
+# one store per process, shared by every CachedTTS
+_shared_cache: Optional[AudioCache] = None
+
+
+def shared_audio_cache() -> AudioCache:
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = AudioCache()
+    return _shared_cache
+
+
+class CachedTTS(tts.TTS):
+    """Wraps a TTS so repeated lines are played from the audio cache."""
+
+    def __init__(
+        self,
+        inner: tts.TTS,
+        *,
+        voice: str = "",
+        speed: float = 1.0,
+        provider: Optional[str] = None,
+        cache: Optional[AudioCache] = None,
+        max_text_chars: int = 500,
+    ):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=inner.sample_rate,
+            num_channels=inner.num_channels,
+        )
+        self.inner = inner
+        self.voice = voice
+        self.speed = speed
+        self.provider_name = provider or f"{type(inner).__module__}.{type(inner).__name__}"
+        self.inner_config = tts_config(inner)
+        self.cache = cache or shared_audio_cache()
+        self.max_text_chars = max_text_chars
+
+    def cache_key(self, text: str) -> str:
+        raw = "\x1f".join((
+            self.provider_name, self.inner_config, self.voice, f"{self.speed:g}",
+            str(self.sample_rate), str(self.num_channels), normalize_text(text),
+        ))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> tts.ChunkedStream:
+        return _CachedChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def prewarm(self) -> None:
+        self.inner.prewarm()
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+    async def render(self, text: str) -> int:
+        """Synthesize text with the wrapped TTS and store it; returns PCM bytes."""
+        chunks = []
+        async with self.inner.synthesize(text) as stream:
+            async for audio in stream:
+                chunks.append(audio.frame.data.tobytes())
+        data = b"".join(chunks)
+        if data:
+            await self.cache.put(self.cache_key(text), data)
+        return len(data)
+
+
+class _CachedChunkedStream(tts.ChunkedStream):
+    def __init__(self, *, tts: CachedTTS, input_text: str, conn_options: APIConnectOptions):
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._cached_tts = tts
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        owner = self._cached_tts
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=owner.sample_rate,
+            num_channels=owner.num_channels,
+            mime_type="audio/pcm",
+        )
+
+        cacheable = len(self.input_text) <= owner.max_text_chars
+        key = owner.cache_key(self.input_text) if cacheable else None
+        if key is not None:
+            data = await owner.cache.get(key)
+            if data is not None:
+                output_emitter.push(data)
+                output_emitter.flush()
+                return
+
+        started = time.perf_counter()
+        chunks = []
+        # this stream already retries; retrying inside the wrapped one too would square the attempts
+        inner_options = dataclasses.replace(self._conn_options, max_retry=0)
+        async with owner.inner.synthesize(self.input_text, conn_options=inner_options) as stream:
+            async for audio in stream:
+                chunk = audio.frame.data.tobytes()
+                chunks.append(chunk)
+                output_emitter.push(chunk)
+        output_emitter.flush()
+
+        if key is not None and chunks:
+            await owner.cache.put(key, b"".join(chunks))
+            logger.debug(
+                f"🗄️ Cached {self.input_text[:40]!r} ({(time.perf_counter() - started) * 1000:.0f} ms to synthesize)"
+            )
@@ -0,0 +1,155 @@
+"""
+Sentence-Parallel TTS
+=====================
+TTS wrapper that speaks long Persian replies sentence by sentence.
+
+The text is split at Persian sentence boundaries ('.', '!', '?', '؟', '…'
+and, for long sentences, '،' / ','), the segments are synthesized
+concurrently by the wrapped TTS within a bounded window, and their audio is
+emitted strictly in order. First audio therefore waits for the first
+sentence only, not the whole paragraph.
+
+Works with any non-streaming LiveKit TTS: openai.TTS, AvashoTTS, or a
+CachedTTS around either (then every sentence is cached on its own and
+reused across replies).
+"""
+
+import asyncio
+import re
+from typing import List, Optional
+
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    APIConnectOptions,
+    tts,
+    utils,
+)
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?؟…])\s+|\n+")
+_CLAUSE_END_RE = re.compile(r"(?<=[،,؛;:])\s+")
+
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    """Split an over-long sentence at clause marks, then at spaces."""
+    if len(text) <= max_chars:
+        return [text]
+    parts, current = [], ""
+    for clause in _CLAUSE_END_RE.split(text):
+        if current and len(current) + 1 + len(clause) > max_chars:
+            parts.append(current)
+            current = clause
+        else:
+            current = f"{current} {clause}" if current else clause
+    if current:
+        parts.append(current)
+
+    out = []
+    for part in parts:
+        while len(part) > max_chars:
+            cut = part.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            out.append(part[:cut].strip())
+            part = part[cut:].strip()
+        if part:
+            out.append(part)
+    return out
+
+
+def split_sentences(text: str, min_chars: int = 20, max_chars: int = 220) -> List[str]:
+    """
+    Segments of text for synthesis: sentences no longer than max_chars,
+    with fragments shorter than min_chars merged into their neighbour.
+    """
+    segments: List[str] = []
+    for sentence in _SENTENCE_END_RE.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        for part in _split_long(sentence, max_chars):
+            if segments and (len(segments[-1]) < min_chars or len(part) < min_chars) \
+                    and len(segments[-1]) + 1 + len(part) <= max_chars:
+                segments[-1] = f"{segments[-1]} {part}"
+            else:
+                segments.append(part)
+    return segments
+
+
+class SentenceParallelTTS(tts.TTS):
+    """Synthesizes sentences concurrently, plays them in order."""
+
+    def __init__(
+        self,
+        inner: tts.TTS,
+        *,
+        window: int = 3,
+        min_chars: int = 20,
+        max_chars: int = 220,
+    ):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=inner.sample_rate,
+            num_channels=inner.num_channels,
+        )
+        self.inner = inner
+        self.window = window
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> tts.ChunkedStream:
+        return _SentenceParallelStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def prewarm(self) -> None:
+        self.inner.prewarm()
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class _SentenceParallelStream(tts.ChunkedStream):
+    def __init__(self, *, tts: SentenceParallelTTS, input_text: str, conn_options: APIConnectOptions):
+        super().__init__(tts=tts, input_text=input_text, conn_options=conn_options)
+        self._pipeline = tts
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        owner = self._pipeline
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=owner.sample_rate,
+            num_channels=owner.num_channels,
+            mime_type="audio/pcm",
+        )
+        segments = split_sentences(self.input_text, owner.min_chars, owner.max_chars)
+        if not segments:
+            return
+
+        window = asyncio.Semaphore(owner.window)
+        queues = [asyncio.Queue() for _ in segments]
+
+        async def produce(segment: str, queue: asyncio.Queue):
+            # the semaphore is FIFO, so segments start in order
+            async with window:
+                try:
+                    async with owner.inner.synthesize(segment, conn_options=self._conn_options) as stream:
+                        async for audio in stream:
+                            queue.put_nowait(audio.frame.data.tobytes())
+                except Exception as e:
+                    queue.put_nowait(e)
+                    return
+                queue.put_nowait(None)
+
+        tasks = [asyncio.create_task(produce(s, q)) for s, q in zip(segments, queues)]
+        try:
+            for queue in queues:
+                while True:
+                    item: Optional[object] = await queue.get()
+                    if item is None:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    output_emitter.push(item)
+            output_emitter.flush()
+        finally:
+            await utils.aio.cancel_and_wait(*tasks)
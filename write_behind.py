@@ -0,0 +1,248 @@
+"""
+Write-Behind Queue
+==================
+Background batch persistence for rows the agents produce during a call.
+
+Agents only enqueue rows; a background task collects them and flushes in
+batches (by size or by time) with a single COPY per batch. The queue is
+bounded: put() applies backpressure when it is full and put_nowait() reports
+a dropped row instead of growing memory. Transient database errors are
+retried with exponential backoff, and close() drains and flushes everything
+that was queued before the worker shuts down. A batch that can neither be
+written nor handed to on_failure is logged and counted as lost; the flusher
+keeps running for the rows after it.
+
+With conflict_columns set, each batch is COPYed into a temporary staging
+table and then inserted with ON CONFLICT DO NOTHING, so replaying a batch
+(after a lost commit acknowledgement, or from the outbox) is idempotent.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, List, Optional, Sequence
+
+import psycopg
+from psycopg import sql
+
+from db_pool import AsyncDatabasePool
+
+logger = logging.getLogger("write-behind")
+logger.setLevel(logging.INFO)
+
+_STOP = object()
+
+# errors worth retrying: lost connections, pool timeouts, lock conflicts
+TRANSIENT_ERRORS = (
+    psycopg.OperationalError,
+    psycopg.errors.SerializationFailure,
+    psycopg.errors.DeadlockDetected,
+)
+
+# errors caused by the rows themselves: retrying the same rows cannot succeed
+REJECTED_ERRORS = (
+    psycopg.IntegrityError,
+    psycopg.DataError,
+)
+
+
+class RejectedRows(Exception):
+    """The database rejected the rows themselves (constraint violation, bad data)."""
+
+
+class WriteBehindQueue:
+    """Bounded async queue of rows flushed to one table with COPY."""
+
+    def __init__(
+        self,
+        pool: AsyncDatabasePool,
+        table: str,
+        columns: Sequence[str],
+        conflict_columns: Optional[Sequence[str]] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_queue: Optional[int] = None,
+        max_retries: int = 5,
+        retry_backoff: float = 0.5,
+        on_failure: Optional[Callable[[List[tuple]], Awaitable[None]]] = None,
+    ):
+        self.pool = pool
+        self.table = table
+        self.columns = list(columns)
+        self.conflict_columns = list(conflict_columns) if conflict_columns else None
+        self.batch_size = batch_size or int(os.getenv('WRITE_BEHIND_BATCH_SIZE', '50'))
+        self.flush_interval = flush_interval or float(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL', '2'))
+        self.max_queue = max_queue or int(os.getenv('WRITE_BEHIND_MAX_QUEUE', '1000'))
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.on_failure = on_failure
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.lost = 0
+        self.batches = 0
+        self.retries = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start the background flusher on the running loop (idempotent)."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run(), name=f"write-behind-{self.table}")
+
+    async def put(self, row: tuple):
+        """Enqueue a row, waiting for room if the queue is full."""
+        self.start()
+        await self._queue.put(row)
+        self.enqueued += 1
+
+    def put_nowait(self, row: tuple) -> bool:
+        """Enqueue without waiting; returns False (and counts a drop) when full."""
+        self.start()
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(f"⚠️ Write-behind queue for {self.table} is full, row dropped")
+            return False
+        self.enqueued += 1
+        return True
+
+    async def close(self, timeout: float = 10.0):
+        """Flush everything queued so far and stop the background task."""
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"❌ Write-behind flush for {self.table} timed out, {self._queue.qsize()} rows left")
+            self._task.cancel()
+        logger.info(f"📊 Write-behind {self.table}: {self.stats()}")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[tuple]):
+        # never raises: a dead _run task would silently drop every row queued after it
+        try:
+            if await self.write_batch(batch) or self.on_failure is None:
+                return
+            # e.g. spill to the durable outbox instead of losing the batch
+            await self.on_failure(batch)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.lost += len(batch)
+            logger.exception(f"❌ Lost {len(batch)} rows for {self.table}: {e}")
+
+    async def write_batch(
+        self, rows: List[tuple], max_retries: Optional[int] = None, raise_rejected: bool = False
+    ) -> bool:
+        """
+        COPY rows into the table, retrying transient errors. True on success.
+        With raise_rejected, rows the database rejects raise RejectedRows
+        instead of returning False (the outbox isolates and parks them).
+        """
+        max_retries = self.max_retries if max_retries is None else max_retries
+        attempt = 0
+        while True:
+            try:
+                await self._copy(rows)
+                self.batches += 1
+                self.written += len(rows)
+                return True
+            except TRANSIENT_ERRORS as e:
+                attempt += 1
+                if attempt > max_retries:
+                    error = e
+                    break
+                self.retries += 1
+                delay = self.retry_backoff * (2 ** (attempt - 1))
+                logger.warning(f"⚠️ Flush to {self.table} failed ({e}), retry {attempt} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            except REJECTED_ERRORS as e:
+                if raise_rejected:
+                    self.failed += len(rows)
+                    raise RejectedRows(f"{self.table}: {e}") from e
+                error = e
+                break
+            except Exception as e:
+                error = e
+                break
+
+        self.failed += len(rows)
+        logger.error(f"❌ Could not write {len(rows)} rows to {self.table}: {error}")
+        return False
+
+    async def _copy(self, rows: List[tuple]):
+        table = sql.Identifier(self.table)
+        columns = sql.SQL(", ").join(map(sql.Identifier, self.columns))
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cursor:
+                if self.conflict_columns is None:
+                    target = table
+                else:
+                    target = sql.Identifier(f"_stage_{self.table}")
+                    await cursor.execute(
+                        sql.SQL(
+                            "CREATE TEMP TABLE {} (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP"
+                        ).format(target, table)
+                    )
+
+                async with cursor.copy(
+                    sql.SQL("COPY {} ({}) FROM STDIN").format(target, columns)
+                ) as copy:
+                    for row in rows:
+                        await copy.write_row(row)
+
+                if self.conflict_columns is not None:
+                    await cursor.execute(
+                        sql.SQL(
+                            "INSERT INTO {} ({}) SELECT {} FROM {} ON CONFLICT ({}) DO NOTHING"
+                        ).format(
+                            table, columns, columns, target,
+                            sql.SQL(", ").join(map(sql.Identifier, self.conflict_columns)),
+                        )
+                    )
+
+    def stats(self) -> dict:
+        return {
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'batches': self.batches,
+            'retries': self.retries,
+            'failed': self.failed,
+            'lost': self.lost,
+            'dropped': self.dropped,
+        }